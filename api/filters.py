@@ -0,0 +1,27 @@
+from rest_framework import filters
+
+from mini_crm.recherche import filtrer_par_recherche
+from mini_crm.texte import filtrer_par_mots
+
+
+class RechercheTexteFilter(filters.SearchFilter):
+    """
+    Paramètre `search` servi par l'index plein texte (mini_crm.recherche)
+    au lieu de filtres icontains sur les champs
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        texte = request.query_params.get(self.search_param, "")
+        return filtrer_par_recherche(queryset, texte)
+
+
+class RechercheNormaliseeFilter(filters.SearchFilter):
+    """
+    Paramètre `search` sur les colonnes normalisées `search_fields` de la
+    vue (minuscules, sans accents) : chaque mot doit figurer dans l'une d'elles
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        texte = request.query_params.get(self.search_param, "")
+        champs = self.get_search_fields(view, request)
+        return filtrer_par_mots(queryset, champs, texte)
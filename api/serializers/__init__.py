@@ -22,6 +22,22 @@ from .projet_serializers import (
     ProjetStatutUpdateSerializer,
 )
 
+from .export_serializers import (
+    ExportJobSerializer,
+    ExportJobCreateSerializer,
+)
+
+from .recherche_serializers import (
+    RechercheParamsSerializer,
+    ResultatRechercheSerializer,
+    ReponseRechercheSerializer,
+)
+
+from .dashboard_serializers import (
+    DashboardMetricsSerializer,
+    TopClientSerializer,
+)
+
 from .user_serializers import (
     UserSerializer,
     UserCreateSerializer,
@@ -47,6 +63,16 @@ __all__ = [
     "ProjetDetailSerializer",
     "ProjetCreateUpdateSerializer",
     "ProjetStatutUpdateSerializer",
+    # Export serializers
+    "ExportJobSerializer",
+    "ExportJobCreateSerializer",
+    # Recherche serializers
+    "RechercheParamsSerializer",
+    "ResultatRechercheSerializer",
+    "ReponseRechercheSerializer",
+    # Dashboard serializers
+    "DashboardMetricsSerializer",
+    "TopClientSerializer",
     # User serializers
     "UserSerializer",
     "UserCreateSerializer",
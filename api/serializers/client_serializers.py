@@ -45,7 +45,13 @@ class ClientSerializer(serializers.ModelSerializer):
             "date_modification",
             "tags",
             "interactions_count",
+            "nb_factures",
+            "total_facture",
+            "total_paye",
+            "encours",
+            "derniere_facture_le",
         ]
+        # Les totaux de factures (editable=False) sont en lecture seule
         read_only_fields = ["date_creation", "date_modification"]
 
     def get_interactions_count(self, obj):
@@ -0,0 +1,43 @@
+from rest_framework import serializers
+
+
+class TopClientSerializer(serializers.Serializer):
+    """Client parmi ceux ayant le plus facturé"""
+
+    id = serializers.IntegerField()
+    nom = serializers.CharField()
+    total_factures = serializers.IntegerField()
+    montant_total = serializers.DecimalField(
+        max_digits=14, decimal_places=2, allow_null=True
+    )
+
+
+class DashboardMetricsSerializer(serializers.Serializer):
+    """Indicateurs et série du graphique du tableau de bord"""
+
+    chiffre_affaire = serializers.DecimalField(max_digits=14, decimal_places=2)
+    ca_mois = serializers.DecimalField(max_digits=14, decimal_places=2)
+    ca_mois_precedent = serializers.DecimalField(max_digits=14, decimal_places=2)
+    ca_annee = serializers.DecimalField(max_digits=14, decimal_places=2)
+    factures_impayees = serializers.IntegerField()
+    montant_impaye = serializers.DecimalField(max_digits=14, decimal_places=2)
+    factures_mois = serializers.IntegerField()
+    factures_en_retard = serializers.IntegerField()
+    factures_payees_mois = serializers.IntegerField()
+    taux_conversion = serializers.FloatField(
+        help_text="Factures payées / émises ce mois (%)"
+    )
+    delai_paiement = serializers.IntegerField(
+        help_text="Délai moyen émission - échéance des factures payées (jours)"
+    )
+    projets_en_cours = serializers.IntegerField()
+    projets_termines = serializers.IntegerField()
+    projets_en_attente = serializers.IntegerField()
+    top_clients = TopClientSerializer(many=True)
+    ca_labels = serializers.ListField(
+        child=serializers.CharField(), help_text="Mois du graphique"
+    )
+    ca_data = serializers.ListField(
+        child=serializers.FloatField(),
+        help_text="Chiffre d'affaires encaissé par mois",
+    )
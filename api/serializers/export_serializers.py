@@ -0,0 +1,60 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from mini_crm.exports import FORMATS_EXPORT
+from mini_crm.models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Serializer des exports en arrière-plan (statut et progression)"""
+
+    statut_display = serializers.CharField(source="get_statut_display", read_only=True)
+    progression = serializers.IntegerField(read_only=True)
+    url_telechargement = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "type_export",
+            "format",
+            "params",
+            "statut",
+            "statut_display",
+            "total_lignes",
+            "lignes_traitees",
+            "progression",
+            "taille",
+            "erreur",
+            "date_creation",
+            "date_debut",
+            "date_fin",
+            "url_telechargement",
+        ]
+        read_only_fields = fields
+
+    def get_url_telechargement(self, obj):
+        if obj.statut != "termine":
+            return None
+        url = reverse("api:export-telecharger", args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class ExportJobCreateSerializer(serializers.ModelSerializer):
+    """Serializer pour la demande d'un export"""
+
+    params = serializers.DictField(
+        child=serializers.CharField(allow_blank=True), required=False
+    )
+
+    class Meta:
+        model = ExportJob
+        fields = ["type_export", "format", "params"]
+
+    def validate(self, attrs):
+        if attrs["format"] not in FORMATS_EXPORT[attrs["type_export"]]:
+            raise serializers.ValidationError(
+                {"format": f"Format indisponible pour l'export {attrs['type_export']}"}
+            )
+        return attrs
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from factures.models import Facture
+from factures.tasks import planifier_pdf_facture
 from clients.models import Client
 from projets.models import Projet
 
@@ -88,6 +89,12 @@ class FactureCreateUpdateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Création avec génération automatique du numéro"""
         facture = Facture.objects.create(**validated_data)
+        planifier_pdf_facture(facture)
+        return facture
+
+    def update(self, instance, validated_data):
+        facture = super().update(instance, validated_data)
+        planifier_pdf_facture(facture)
         return facture
 
 
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+from mini_crm.models import DocumentRecherche
+from mini_crm.recherche import SOURCES_RECHERCHE
+
+
+class RechercheParamsSerializer(serializers.Serializer):
+    """Paramètres de la recherche globale"""
+
+    q = serializers.CharField(help_text="Texte recherché (mots en préfixe)")
+    types = serializers.MultipleChoiceField(
+        choices=list(SOURCES_RECHERCHE), required=False
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class ResultatRechercheSerializer(serializers.Serializer):
+    """Résultat de la recherche globale, classé par pertinence"""
+
+    type = serializers.ChoiceField(choices=DocumentRecherche.TYPE_CHOICES)
+    id = serializers.IntegerField()
+    titre = serializers.CharField()
+    extrait = serializers.CharField()
+    lien = serializers.CharField()
+    score = serializers.FloatField()
+
+
+class ReponseRechercheSerializer(serializers.Serializer):
+    """Réponse de la recherche globale : nombre et liste des résultats"""
+
+    count = serializers.IntegerField()
+    results = ResultatRechercheSerializer(many=True)
@@ -0,0 +1,81 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from clients.models import Client
+from factures.models import Facture
+from projets.models import Projet
+
+
+class DashboardMetricsAPITestCase(APITestCase):
+    """Tests de l'endpoint /api/v1/dashboard/metrics"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse("api:dashboard_metrics")
+
+        self.client_obj = Client.objects.create(nom="Dupont", email="d@example.com")
+        self.projet = Projet.objects.create(
+            titre="Site",
+            client=self.client_obj,
+            date_debut=date(2025, 1, 1),
+            statut="en_cours",
+        )
+        Facture.objects.create(
+            client=self.client_obj,
+            projet=self.projet,
+            montant=1200,
+            statut_paiement="payée",
+        )
+
+    def test_authentification_requise(self):
+        self.client.credentials()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_indicateurs(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["chiffre_affaire"], "1200.00")
+        self.assertEqual(response.data["ca_mois"], "1200.00")
+        self.assertEqual(response.data["projets_en_cours"], 1)
+        self.assertEqual(response.data["top_clients"][0]["nom"], "Dupont")
+        self.assertEqual(len(response.data["ca_labels"]), 6)
+        self.assertEqual(response.data["ca_data"][-1], 1200.0)
+        self.assertIn("ETag", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_requete_conditionnelle(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            # Authentification par jeton uniquement : aucun calcul
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.projet.statut = "termine"
+        self.projet.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["projets_en_cours"], 0)
+
+    def test_etag_tire_des_donnees(self):
+        """Un processus au cache vide (autre worker) donne le même ETag"""
+        etag = self.client.get(self.url)["ETag"]
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
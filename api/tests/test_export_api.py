@@ -0,0 +1,142 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from clients.models import Client
+from factures.models import Facture
+from mini_crm.models import ExportJob
+from projets.models import Projet
+
+
+class ExportJobAPITestCase(APITestCase):
+    """Tests pour l'API des exports en arrière-plan"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        self.client_obj = Client.objects.create(
+            nom="Client Test", email="client@test.com", statut="actif"
+        )
+        self.projet = Projet.objects.create(
+            titre="Projet Test",
+            description="Description du projet test",
+            client=self.client_obj,
+            date_debut=datetime.now().date(),
+            statut="en_cours",
+        )
+        for i in range(3):
+            Facture.objects.create(
+                numero=f"FACT-00{i}",
+                client=self.client_obj,
+                projet=self.projet,
+                montant=1000 + i,
+                statut_paiement="payée" if i else "envoyée",
+            )
+
+    def demander_export(self, donnees):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("api:export-list"), donnees, format="json"
+            )
+
+    def test_export_csv_cycle_complet(self):
+        """202 avec l'identifiant, statut terminé puis téléchargement"""
+        response = self.demander_export(
+            {"type_export": "factures", "format": "csv", "params": {"statut": "payée"}}
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data["id"]
+        self.assertIn(f"/exports/{job_id}", response["Location"])
+
+        response = self.client.get(reverse("api:export-detail", args=[job_id]))
+        self.assertEqual(response.data["statut"], "termine")
+        self.assertEqual(response.data["total_lignes"], 2)
+        self.assertEqual(response.data["lignes_traitees"], 2)
+        self.assertEqual(response.data["progression"], 100)
+
+        response = self.client.get(response.data["url_telechargement"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contenu = b"".join(response.streaming_content).decode()
+        self.assertIn("FACT-001", contenu)
+        self.assertNotIn("FACT-000", contenu)
+
+    def test_export_projets_pdf(self):
+        response = self.demander_export({"type_export": "projets", "format": "pdf"})
+        job = ExportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(job.statut, "termine")
+        self.assertGreater(job.taille, 0)
+
+    def test_zip_reserve_aux_factures(self):
+        response = self.demander_export({"type_export": "clients", "format": "zip"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(EXPORT_ZIP_LIGNES_MAX=2)
+    def test_zip_volumineux_devient_un_export(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse("api:facture-export-zip"))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        job = ExportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(job.statut, "termine")
+        response = self.client.get(reverse("api:export-telecharger", args=[job.pk]))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 3)
+
+    @override_settings(EXPORT_ZIP_LIGNES_MAX=1)
+    def test_zip_volumineux_conserve_filtres_et_tri(self):
+        with self.captureOnCommitCallbacks() as rappels:
+            response = self.client.get(
+                reverse("api:facture-export-zip"),
+                {"statut_paiement": "payée", "ordering": "-montant"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = ExportJob.objects.get(pk=response.data["id"])
+        self.assertNotIn("ids", job.params)
+
+        # Facture créée après la demande : hors de l'export
+        Facture.objects.create(
+            numero="FACT-009",
+            client=self.client_obj,
+            projet=self.projet,
+            montant=5000,
+            statut_paiement="payée",
+        )
+        for rappel in rappels:
+            rappel()
+
+        job.refresh_from_db()
+        self.assertEqual(job.total_lignes, 2)
+        response = self.client.get(reverse("api:export-telecharger", args=[job.pk]))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(), ["facture_FACT-002.pdf", "facture_FACT-001.pdf"]
+        )
+
+    def test_exports_reserves_a_leur_auteur(self):
+        job = ExportJob.objects.create(user=self.user, type_export="clients", format="csv")
+        autre = User.objects.create_user(username="autre", password="motdepasse")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=autre).key}"
+        )
+        self.assertEqual(self.client.get(reverse("api:export-list")).data["count"], 0)
+        response = self.client.get(reverse("api:export-detail", args=[job.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,4 +1,9 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
@@ -15,6 +20,11 @@ class FactureAPITestCase(APITestCase):
 
     def setUp(self):
         """Configuration initiale pour tous les tests"""
+        # PDF rendus dans un MEDIA_ROOT temporaire
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
         # Créer un utilisateur de test
         self.user = User.objects.create_user(
             username="testuser", email="test@example.com", password="testpass123"
@@ -57,6 +67,10 @@ class FactureAPITestCase(APITestCase):
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
     def test_list_factures_authenticated(self):
         """Test de récupération de la liste des factures avec authentification"""
         url = "/api/v1/factures"
@@ -168,3 +182,33 @@ class FactureAPITestCase(APITestCase):
         self.assertIn(
             response.status_code, [status.HTTP_200_OK, status.HTTP_404_NOT_FOUND]
         )
+
+    def test_facture_pdf_endpoint_not_modified(self):
+        """Test du 304 lorsque l'ETag du PDF n'a pas changé"""
+        url = f"/api/v1/factures/{self.facture.id}/pdf"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_facture_zip_endpoint(self):
+        """Test de l'archive ZIP des PDF des factures filtrées"""
+        url = "/api/v1/factures/zip?statut_paiement=envoyée"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f"facture_{self.facture.numero}.pdf"])
+
+    @override_settings(PDF_PRERENDU=True)
+    @mock.patch("factures.tasks.generer_pdf_facture.delay")
+    def test_facture_pdf_endpoint_en_cours(self, delay):
+        """Test du 202 avec URL de suivi lorsque le PDF est en cours de rendu"""
+        self.facture.montant = 1234
+        self.facture.save()
+        url = f"/api/v1/factures/{self.facture.id}/pdf"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["statut"], "en_cours")
+        self.assertTrue(response.data["url"].endswith(url))
+        delay.assert_called_once_with(self.facture.id)
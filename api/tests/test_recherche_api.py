@@ -0,0 +1,146 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from clients.models import Client, Interaction
+from factures.models import Facture
+from mini_crm.models import DocumentRecherche
+from mini_crm.recherche import filtrer_par_recherche, rechercher
+from projets.models import Projet
+
+
+class RechercheAPITestCase(APITestCase):
+    """Tests de l'index plein texte et de l'endpoint /api/v1/search"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        self.dupont = Client.objects.create(
+            nom="Dupont", prenom="Hélène", email="helene@example.fr", ville="Lyon"
+        )
+        self.martin = Client.objects.create(nom="Martin", email="martin@example.com")
+        self.projet = Projet.objects.create(
+            titre="Refonte du site",
+            description="Migration vers Django et nouvelle charte graphique",
+            client=self.dupont,
+            date_debut="2024-01-01",
+        )
+        self.facture = Facture.objects.create(
+            numero="2024-042",
+            client=self.dupont,
+            projet=self.projet,
+            montant=1200,
+            notes="Acompte de la refonte",
+        )
+        Interaction.objects.create(
+            client=self.martin,
+            type="appel",
+            description="Relance téléphonique au sujet du devis",
+            utilisateur=self.user,
+        )
+
+    def test_recherche_globale_typee(self):
+        response = self.client.get("/api/v1/search", {"q": "refonte"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultats = {(r["type"], r["id"]) for r in response.data["results"]}
+        self.assertEqual(
+            resultats, {("projet", self.projet.id), ("facture", self.facture.id)}
+        )
+        # Le projet a le mot dans son titre : il est classé en premier
+        self.assertEqual(response.data["results"][0]["type"], "projet")
+        self.assertEqual(
+            response.data["results"][0]["lien"], f"/projets/{self.projet.id}/"
+        )
+
+    def test_prefixe_accents_et_filtre_par_type(self):
+        response = self.client.get(
+            "/api/v1/search", {"q": "dup hel", "types": "client"}
+        )
+        self.assertEqual(
+            [(r["type"], r["id"]) for r in response.data["results"]],
+            [("client", self.dupont.id)],
+        )
+        response = self.client.get("/api/v1/search", {"q": "telephonique"})
+        self.assertEqual(response.data["results"][0]["type"], "interaction")
+
+    def test_parametres_invalides(self):
+        self.assertEqual(
+            self.client.get("/api/v1/search").status_code, status.HTTP_400_BAD_REQUEST
+        )
+        response = self.client.get("/api/v1/search", {"q": "x", "types": "inconnu"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Ponctuation seule : aucun mot à chercher
+        response = self.client.get("/api/v1/search", {"q": '"*:&'})
+        self.assertEqual(response.data["count"], 0)
+
+    def test_index_synchronise(self):
+        # Renommer le client met à jour les documents qui reprennent son nom
+        self.dupont.nom = "Durand"
+        self.dupont.save()
+        self.assertEqual(len(rechercher("dupont")), 0)
+        self.assertEqual(
+            {r["type"] for r in rechercher("durand")}, {"client", "projet", "facture"}
+        )
+
+        self.projet.delete()
+        self.assertEqual({r["type"] for r in rechercher("durand")}, {"client"})
+        self.assertFalse(DocumentRecherche.objects.filter(type="facture").exists())
+
+    def test_dependants_reindexes_si_le_nom_change(self):
+        client = Client.objects.get(pk=self.dupont.pk)
+        # UPDATE du client et de son document : projets, factures et
+        # interactions ne sont pas relus
+        with self.assertNumQueries(2):
+            client.telephone = "0102030405"
+            client.save()
+
+        projet = Projet.objects.get(pk=self.projet.pk)
+        projet.titre = "Nouvelle boutique"
+        projet.save()
+        self.assertEqual(
+            {r["type"] for r in rechercher("boutique")}, {"projet", "facture"}
+        )
+
+    def test_filtre_search_des_listes(self):
+        response = self.client.get("/api/v1/factures", {"search": "acompte"})
+        self.assertEqual(response.data["count"], 1)
+        response = self.client.get("/api/v1/clients", {"search": "lyon"})
+        self.assertEqual([c["id"] for c in response.data["results"]], [self.dupont.id])
+
+    def test_sous_requete_unique(self):
+        with self.assertNumQueries(1):
+            list(filtrer_par_recherche(Facture.objects.all(), "2024 042"))
+
+    def test_reindexation(self):
+        DocumentRecherche.objects.all().delete()
+        call_command("reindexer_recherche", stdout=open("/dev/null", "w"))
+        self.assertEqual(DocumentRecherche.objects.count(), 5)
+        self.assertEqual(rechercher("martin")[0]["id"], self.martin.id)
+
+    def test_schema_de_la_reponse(self):
+        """Le schéma OpenAPI décrit la réponse paginée (count, results)"""
+        schema = self.client.get(reverse("api:schema"), {"format": "json"}).json()
+        reponse = schema["paths"]["/api/v1/search"]["get"]["responses"]["200"]
+        nom = reponse["content"]["application/json"]["schema"]["$ref"].split("/")[-1]
+        composant = schema["components"]["schemas"][nom]
+        self.assertEqual(set(composant["properties"]), {"count", "results"})
+        self.assertEqual(composant["properties"]["results"]["type"], "array")
+
+    def test_index_plein_texte_utilise(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Plan propre à SQLite")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT rowid FROM mini_crm_recherche_fts "
+                "WHERE mini_crm_recherche_fts MATCH 'dupont*'"
+            )
+            plan = " ".join(str(ligne[-1]) for ligne in cursor.fetchall())
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
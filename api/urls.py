@@ -9,6 +9,9 @@ from drf_spectacular.views import (
 from api.views.client_views import ClientViewSet
 from api.views.facture_views import FactureViewSet
 from api.views.projet_views import ProjetViewSet
+from api.views.export_views import ExportJobViewSet
+from api.views.recherche_views import recherche
+from api.views.dashboard_views import dashboard_metrics
 from api.views.auth_views import CustomObtainAuthToken, register, user_info, logout
 
 app_name = "api"
@@ -18,6 +21,7 @@ router = DefaultRouter(trailing_slash=False)
 router.register(r"clients", ClientViewSet)
 router.register(r"factures", FactureViewSet)
 router.register(r"projets", ProjetViewSet)
+router.register(r"exports", ExportJobViewSet, basename="export")
 
 # URLs de l'API
 urlpatterns = [
@@ -34,6 +38,10 @@ urlpatterns = [
     path("auth/register", register, name="auth_register"),
     path("auth/user", user_info, name="auth_user"),
     path("auth/logout", logout, name="auth_logout"),
+    # Recherche globale
+    path("search", recherche, name="search"),
+    # Indicateurs du tableau de bord
+    path("dashboard/metrics", dashboard_metrics, name="dashboard_metrics"),
     # Endpoints principaux
     path("", include(router.urls)),
 ]
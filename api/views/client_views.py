@@ -12,6 +12,8 @@ from drf_spectacular.utils import (
 )
 
 from clients.models import Client, Interaction
+from clients.services import CHAMPS_RECHERCHE
+from api.filters import RechercheNormaliseeFilter
 from api.serializers import (
     ClientSerializer,
     ClientDetailSerializer,
@@ -29,7 +31,8 @@ from api.serializers import (
         parameters=[
             OpenApiParameter(
                 name="search",
-                description="Recherche dans nom, prénom, email, ville",
+                description="Recherche dans nom, prénom, email, ville (accents "
+                "et casse ignorés)",
                 required=False,
             ),
             OpenApiParameter(
@@ -83,12 +86,20 @@ class ClientViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheNormaliseeFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["statut", "ville", "pays"]
-    search_fields = ["nom", "prenom", "email", "ville"]
-    ordering_fields = ["nom", "prenom", "date_creation", "statut"]
+    search_fields = CHAMPS_RECHERCHE
+    ordering_fields = [
+        "nom",
+        "prenom",
+        "date_creation",
+        "statut",
+        "total_facture",
+        "encours",
+        "derniere_facture_le",
+    ]
     ordering = ["-date_creation"]
 
     def get_serializer_class(self):
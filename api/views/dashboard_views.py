@@ -0,0 +1,39 @@
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from api.serializers import DashboardMetricsSerializer
+from mini_crm.dashboard.services import DashboardMetrics
+
+
+def etag_metriques(request):
+    # Indicateurs gardés sur la requête : l'ETag et la réponse en sont tirés
+    request.metriques = DashboardMetrics.obtenir()
+    return DashboardMetrics.etag(request.metriques)
+
+
+@extend_schema(
+    summary="Indicateurs du tableau de bord",
+    description=(
+        "KPIs des factures et projets, meilleurs clients et chiffre d'affaires "
+        "des six derniers mois. Requête conditionnelle (If-None-Match) : 304 "
+        "tant que les indicateurs sont inchangés."
+    ),
+    tags=["dashboard"],
+    responses={
+        200: DashboardMetricsSerializer,
+        304: OpenApiResponse(description="Indicateurs inchangés"),
+    },
+)
+@api_view(["GET"])
+@condition(etag_func=etag_metriques)
+def dashboard_metrics(request):
+    """
+    Indicateurs du tableau de bord (mis en cache, invalidés par les signaux)
+    """
+    response = Response(DashboardMetricsSerializer(request.metriques).data)
+    # Toujours revalider auprès du serveur, réponse propre à l'utilisateur
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,86 @@
+from django.urls import reverse
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from mini_crm.models import ExportJob
+from mini_crm.tasks import lancer_export
+from mini_crm.views import reponse_fichier_export
+from api.serializers import ExportJobSerializer, ExportJobCreateSerializer
+
+
+def reponse_export_acceptee(request, job):
+    """Réponse 202 d'un export confié à Celery, avec l'URL de suivi"""
+    url = request.build_absolute_uri(reverse("api:export-detail", args=[job.pk]))
+    response = Response(
+        ExportJobSerializer(job, context={"request": request}).data,
+        status=status.HTTP_202_ACCEPTED,
+    )
+    response["Location"] = url
+    return response
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Liste des exports",
+        description="Récupère les exports de l'utilisateur connecté",
+        tags=["exports"],
+    ),
+    retrieve=extend_schema(
+        summary="Statut d'un export",
+        description="Statut et progression (lignes traitées) d'un export",
+        tags=["exports"],
+    ),
+    create=extend_schema(
+        summary="Demander un export",
+        description=(
+            "Crée un export CSV, PDF ou ZIP (factures uniquement) des clients, "
+            "projets ou factures filtrés par `params` (mêmes filtres que les "
+            "listes). Répond 202 avec l'identifiant de l'export."
+        ),
+        tags=["exports"],
+        request=ExportJobCreateSerializer,
+        responses={202: ExportJobSerializer},
+    ),
+)
+class ExportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    ViewSet des exports en arrière-plan via API
+    """
+
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Chaque utilisateur ne voit que ses exports"""
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = lancer_export(
+            request.user,
+            serializer.validated_data["type_export"],
+            serializer.validated_data["format"],
+            serializer.validated_data.get("params", {}),
+        )
+        return reponse_export_acceptee(request, job)
+
+    @extend_schema(
+        summary="Télécharger un export",
+        description="Télécharge le fichier d'un export terminé (404 sinon)",
+        tags=["exports"],
+        responses={200: None, 404: None},
+    )
+    @action(detail=True, methods=["get"])
+    def telecharger(self, request, pk=None):
+        """Télécharger le fichier d'un export"""
+        return reponse_fichier_export(self.get_object())
@@ -1,9 +1,11 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import FileResponse
+from django.db.models import Max
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import (
     extend_schema,
@@ -11,11 +13,16 @@ from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiExample,
 )
-import os
 from datetime import datetime
 
 from factures.models import Facture
+from factures.utils import facture_pdf_response, iter_zip_factures
+from mini_crm.exports import seuil_arriere_plan
+from mini_crm.tasks import lancer_export
+from api.filters import RechercheTexteFilter
+from api.views.export_views import reponse_export_acceptee
 from api.serializers import (
+    ExportJobSerializer,
     FactureSerializer,
     FactureDetailSerializer,
     FactureCreateUpdateSerializer,
@@ -31,7 +38,7 @@ from api.serializers import (
         parameters=[
             OpenApiParameter(
                 name="search",
-                description="Recherche dans numéro, client, projet",
+                description="Recherche plein texte (numéro, client, projet, notes)",
                 required=False,
             ),
             OpenApiParameter(
@@ -90,11 +97,10 @@ class FactureViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheTexteFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["statut_paiement", "client", "projet"]
-    search_fields = ["numero", "client__nom", "projet__titre"]
     ordering_fields = [
         "numero",
         "date_emission",
@@ -131,35 +137,74 @@ class FactureViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Télécharger PDF",
-        description="Génère et télécharge le PDF d'une facture",
+        description=(
+            "Télécharge le PDF d'une facture. Si le PDF est en cours de rendu, "
+            "répond 202 avec l'URL à interroger de nouveau."
+        ),
         tags=["factures"],
-        responses={200: None, 500: None},
+        responses={200: None, 202: None, 304: None, 500: None},
     )
     @action(detail=True, methods=["get"])
     def pdf(self, request, pk=None):
         """Télécharger le PDF d'une facture"""
         facture = self.get_object()
+
+        def reponse_en_cours():
+            url = request.build_absolute_uri()
+            response = Response(
+                {"statut": "en_cours", "url": url}, status=status.HTTP_202_ACCEPTED
+            )
+            response["Location"] = url
+            return response
+
         try:
-            filepath = facture.generer_pdf()
-            if os.path.exists(filepath):
-                response = FileResponse(
-                    open(filepath, "rb"), content_type="application/pdf"
-                )
-                response["Content-Disposition"] = (
-                    f'attachment; filename="facture_{facture.numero}.pdf"'
-                )
-                return response
-            else:
-                return Response(
-                    {"error": "Le PDF n'a pas pu être généré"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+            return facture_pdf_response(request, facture, reponse_en_cours)
         except Exception as e:
             return Response(
                 {"error": f"Erreur lors de la génération du PDF: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @extend_schema(
+        summary="Télécharger les PDF (ZIP)",
+        description=(
+            "Archive ZIP, produite en flux, des PDF des factures correspondant "
+            "aux filtres, à la recherche et au tri de la liste. Au-delà de "
+            "EXPORT_ZIP_LIGNES_MAX factures, répond 202 avec l'export créé "
+            "(suivi via /exports/{id})."
+        ),
+        tags=["factures"],
+        responses={200: None, 202: ExportJobSerializer},
+    )
+    @action(detail=False, methods=["get"], url_path="zip")
+    def export_zip(self, request):
+        """Télécharger les PDF des factures filtrées dans une archive ZIP"""
+        factures = self.filter_queryset(self.get_queryset())
+        if factures.count() > seuil_arriere_plan("zip"):
+            # L'export rejoue les filtres, la recherche et le tri de la
+            # requête, sur les factures existant à cet instant
+            job = lancer_export(
+                request.user,
+                "factures",
+                "zip",
+                {
+                    "api": request.query_params.dict(),
+                    "pk_max": factures.aggregate(pk_max=Max("pk"))["pk_max"],
+                },
+            )
+            return reponse_export_acceptee(request, job)
+
+        response = StreamingHttpResponse(
+            iter_zip_factures(
+                factures.select_related("client", "projet").iterator(chunk_size=200)
+            ),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="factures_{datetime.now().strftime("%Y%m%d")}.zip"'
+        )
+        return response
+
     @extend_schema(
         summary="Mettre à jour le statut",
         description="Met à jour uniquement le statut de paiement d'une facture",
@@ -257,3 +302,17 @@ class FactureViewSet(viewsets.ModelViewSet):
             instance, context=self.get_serializer_context()
         )
         return Response(output_serializer.data)
+
+
+def factures_filtrees_api(params):
+    """
+    Queryset de la liste des factures de l'API pour les paramètres GET
+    `params` : mêmes filtres, recherche et tri que FactureViewSet
+    """
+    http_request = HttpRequest()
+    http_request.GET = QueryDict(mutable=True)
+    http_request.GET.update(params)
+    vue = FactureViewSet(
+        request=Request(http_request), action="list", format_kwarg=None, kwargs={}
+    )
+    return vue.filter_queryset(vue.get_queryset())
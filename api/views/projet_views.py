@@ -11,6 +11,7 @@ from drf_spectacular.utils import (
 )
 
 from projets.models import Projet
+from api.filters import RechercheTexteFilter
 from api.serializers import (
     ProjetSerializer,
     ProjetDetailSerializer,
@@ -81,11 +82,10 @@ class ProjetViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        RechercheTexteFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["statut", "client"]
-    search_fields = ["titre", "description", "client__nom"]
     ordering_fields = ["titre", "date_debut", "date_fin", "statut", "montant"]
     ordering = ["-date_creation"]
 
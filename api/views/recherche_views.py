@@ -0,0 +1,56 @@
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from mini_crm.recherche import SOURCES_RECHERCHE, rechercher
+from api.serializers import (
+    RechercheParamsSerializer,
+    ReponseRechercheSerializer,
+    ResultatRechercheSerializer,
+)
+
+
+@extend_schema(
+    summary="Recherche globale",
+    description=(
+        "Recherche plein texte dans les clients, projets, factures et "
+        "interactions. Les résultats sont typés et classés par pertinence."
+    ),
+    tags=["recherche"],
+    parameters=[
+        OpenApiParameter(name="q", description="Texte recherché", required=True),
+        OpenApiParameter(
+            name="types",
+            description=f"Types de résultats ({', '.join(SOURCES_RECHERCHE)}), "
+            "séparés par des virgules",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="limit", type=int, description="Nombre de résultats (20 par défaut)"
+        ),
+    ],
+    responses={200: ReponseRechercheSerializer},
+)
+@api_view(["GET"])
+def recherche(request):
+    """
+    Recherche globale via l'index plein texte
+    """
+    params = request.query_params.dict()
+    if params.get("types"):
+        params["types"] = [t for t in params["types"].split(",") if t]
+    else:
+        params.pop("types", None)
+    serializer = RechercheParamsSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    resultats = rechercher(
+        serializer.validated_data["q"],
+        types=sorted(serializer.validated_data.get("types", [])),
+        limite=serializer.validated_data["limit"],
+    )
+    return Response(
+        {
+            "count": len(resultats),
+            "results": ResultatRechercheSerializer(resultats, many=True).data,
+        }
+    )
@@ -4,7 +4,7 @@ from .models import Client
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
-    list_display = ("nom", "email", "telephone", "date_creation")
+    list_display = ("nom", "email", "telephone", "total_facture", "date_creation")
     search_fields = ("nom", "email", "telephone")
     list_filter = ("date_creation",)
     ordering = ("-date_creation",)
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:15
+
+import unicodedata
+
+from django.db import migrations, models
+
+COLONNES = ["nom_normalise", "prenom_normalise", "email_normalise", "ville_normalise"]
+
+
+def normaliser(texte):
+    decompose = unicodedata.normalize("NFKD", texte or "")
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c))
+    return " ".join(sans_accents.lower().split())
+
+
+def remplir_champs_normalises(apps, schema_editor):
+    Client = apps.get_model("clients", "Client")
+    champs = ["nom", "prenom", "email", "ville"]
+    lot = []
+    for client in Client.objects.only(*champs).iterator(chunk_size=1000):
+        for champ in champs:
+            setattr(client, f"{champ}_normalise", normaliser(getattr(client, champ)))
+        lot.append(client)
+        if len(lot) == 1000:
+            Client.objects.bulk_update(lot, COLONNES)
+            lot = []
+    Client.objects.bulk_update(lot, COLONNES)
+
+
+def creer_index_trigrammes(apps, schema_editor):
+    """Index GIN trigrammes (recherche « contient ») sous PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for colonne in COLONNES:
+        schema_editor.execute(
+            f"CREATE INDEX clients_client_{colonne}_trgm "
+            f"ON clients_client USING gin ({colonne} gin_trgm_ops)"
+        )
+
+
+def supprimer_index_trigrammes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for colonne in COLONNES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS clients_client_{colonne}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_tag_interaction_client_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='email_normalise',
+            field=models.CharField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='nom_normalise',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='prenom_normalise',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='ville_normalise',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(remplir_champs_normalises, migrations.RunPython.noop),
+        migrations.RunPython(creer_index_trigrammes, supprimer_index_trigrammes),
+    ]
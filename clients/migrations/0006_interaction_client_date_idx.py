@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_client_champs_normalises'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Index composite créé avant la suppression de l'index simple de la clé étrangère
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['client', 'date'], name='interaction_client_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='interaction',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='interactions', to='clients.client'),
+        ),
+    ]
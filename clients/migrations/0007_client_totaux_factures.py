@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:41
+
+from django.db import migrations, models
+from django.db.models import (
+    Count,
+    DecimalField,
+    IntegerField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+STATUTS_FACTURES = ["envoyée", "payée", "en_retard"]
+STATUTS_ENCOURS = ["envoyée", "en_retard"]
+
+
+def remplir_totaux_factures(apps, schema_editor):
+    """Totaux initiaux des clients, calculés depuis leurs factures"""
+    Client = apps.get_model("clients", "Client")
+    Facture = apps.get_model("factures", "Facture")
+
+    def agregat(expression, statuts, output_field=None):
+        factures = (
+            Facture.objects.filter(client=OuterRef("pk"), statut_paiement__in=statuts)
+            .order_by()
+            .values("client")
+            .annotate(valeur=expression)
+            .values("valeur")
+        )
+        if output_field is None:
+            return Subquery(factures)
+        return Coalesce(Subquery(factures), Value(0), output_field=output_field)
+
+    Client.objects.update(
+        nb_factures=agregat(Count("id"), STATUTS_FACTURES, IntegerField()),
+        total_facture=agregat(Sum("montant"), STATUTS_FACTURES, DecimalField()),
+        total_paye=agregat(Sum("montant"), ["payée"], DecimalField()),
+        encours=agregat(Sum("montant"), STATUTS_ENCOURS, DecimalField()),
+        derniere_facture_le=agregat(Max("date_emission"), STATUTS_FACTURES),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_interaction_client_date_idx'),
+        ('factures', '0006_chiffreaffairesmensuel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='derniere_facture_le',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='encours',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='nb_factures',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='total_facture',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='total_paye',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-total_facture', 'id'], name='client_total_facture_idx'),
+        ),
+        migrations.RunPython(remplir_totaux_factures, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,53 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from mini_crm.texte import normaliser
+
 # Create your models here.
 
+# Colonnes de recherche (minuscules, sans accents) tenues à jour à partir
+# des champs saisis
+CHAMPS_NORMALISES = {
+    "nom": "nom_normalise",
+    "prenom": "prenom_normalise",
+    "email": "email_normalise",
+    "ville": "ville_normalise",
+}
+
+# Totaux des factures du client, écrits uniquement par UPDATE (voir
+# factures.models.ajuster_totaux_client) : Client.save ne les réécrit pas
+CHAMPS_TOTAUX_FACTURES = {
+    "nb_factures",
+    "total_facture",
+    "total_paye",
+    "encours",
+    "derniere_facture_le",
+}
+
+
+def _champs_a_normaliser(fields):
+    """Ajoute aux champs mis à jour les colonnes normalisées correspondantes"""
+    fields = list(fields)
+    return fields + [
+        CHAMPS_NORMALISES[champ] for champ in fields if champ in CHAMPS_NORMALISES
+    ]
+
+
+class ClientQuerySet(models.QuerySet):
+    """Les créations et mises à jour en lot normalisent aussi les colonnes"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for client in objs:
+            client.normaliser_champs()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        for client in objs:
+            client.normaliser_champs()
+        return super().bulk_update(objs, _champs_a_normaliser(fields), *args, **kwargs)
+
 
 class Client(models.Model):
     # Choix pour le statut
@@ -31,13 +76,72 @@ class Client(models.Model):
     )
     tags = models.ManyToManyField("Tag", blank=True, related_name="clients")
 
+    # Colonnes de recherche, voir CHAMPS_NORMALISES. Sous PostgreSQL, des
+    # index trigrammes (pg_trgm) servent les recherches « contient »
+    nom_normalise = models.CharField(max_length=100, blank=True, editable=False)
+    prenom_normalise = models.CharField(max_length=100, blank=True, editable=False)
+    email_normalise = models.CharField(max_length=254, blank=True, editable=False)
+    ville_normalise = models.CharField(
+        max_length=100, blank=True, editable=False, db_index=True
+    )
+
+    # Totaux des factures émises (envoyées, payées, en retard), ajustés par
+    # des UPDATE F() à chaque enregistrement ou suppression de facture et
+    # recalculés par la commande recalculer_totaux_clients
+    nb_factures = models.IntegerField(default=0, editable=False)
+    total_facture = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    total_paye = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    encours = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    derniere_facture_le = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ClientQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.prenom} {self.nom}" if self.prenom else self.nom
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from mini_crm.recherche import valeurs_dependants
+
+        instance = super().from_db(db, field_names, values)
+        # Nom enregistré : les documents de recherche qui le reprennent ne
+        # sont réindexés que s'il change
+        instance._valeurs_dependants = valeurs_dependants(instance)
+        return instance
+
+    def normaliser_champs(self):
+        for champ, colonne in CHAMPS_NORMALISES.items():
+            setattr(self, colonne, normaliser(getattr(self, champ)))
+
+    def save(self, *args, **kwargs):
+        self.normaliser_champs()
+        if kwargs.get("update_fields") is None and not self._state.adding:
+            # Totaux en mémoire possiblement périmés : ils ne sont pas réécrits
+            kwargs["update_fields"] = [
+                champ.name
+                for champ in self._meta.concrete_fields
+                if not champ.primary_key and champ.name not in CHAMPS_TOTAUX_FACTURES
+            ]
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = _champs_a_normaliser(kwargs["update_fields"])
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Client"
         verbose_name_plural = "Clients"
         ordering = ["-date_creation"]
+        indexes = [
+            # Meilleurs clients : ORDER BY total_facture DESC, id LIMIT n
+            models.Index(
+                fields=["-total_facture", "id"], name="client_total_facture_idx"
+            )
+        ]
 
 
 class Interaction(models.Model):
@@ -48,8 +152,9 @@ class Interaction(models.Model):
         ("note", "Note interne"),
     ]
 
+    # Index composite (client, date) dans Meta.indexes
     client = models.ForeignKey(
-        Client, on_delete=models.CASCADE, related_name="interactions"
+        Client, on_delete=models.CASCADE, related_name="interactions", db_index=False
     )
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     date = models.DateTimeField(auto_now_add=True)
@@ -58,6 +163,10 @@ class Interaction(models.Model):
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            # Historique d'un client, le plus récent d'abord
+            models.Index(fields=["client", "date"], name="interaction_client_date_idx")
+        ]
 
 
 class Tag(models.Model):
@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from mini_crm.exports import iter_projection
+from mini_crm.texte import filtrer_par_mots, normaliser
+
+from .models import Client
+
+EXPORT_ENTETE = ["Nom", "Prénom", "Email", "Téléphone", "Ville", "Statut"]
+# Colonnes normalisées parcourues par la recherche des clients (liste,
+# exports, API) : chaque mot doit figurer dans l'une d'elles
+CHAMPS_RECHERCHE = [
+    "nom_normalise",
+    "prenom_normalise",
+    "email_normalise",
+    "ville_normalise",
+]
+# Liste des clients des menus de filtre, invalidée par les signaux de Client
+CLE_CHOIX_CLIENTS = "clients:choix"
+
+
+def choix_clients():
+    """
+    Clients (id, nom) proposés dans les filtres des listes, mis en cache
+    """
+    choix = cache.get(CLE_CHOIX_CLIENTS)
+    if choix is None:
+        choix = [
+            {"id": pk, "nom": nom}
+            for pk, nom in Client.objects.order_by("nom").values_list("id", "nom")
+        ]
+        cache.set(CLE_CHOIX_CLIENTS, choix, None)
+    return choix
+
+
+def invalider_choix_clients():
+    cache.delete(CLE_CHOIX_CLIENTS)
+
+
+def filtrer_clients(params, clients=None):
+    """
+    Applique les filtres de la liste des clients (recherche, statut, ville,
+    dates) lus dans `params` (request.GET ou dictionnaire)
+    """
+    if clients is None:
+        clients = Client.objects.all()
+
+    # Récupération des paramètres de filtrage
+    search_query = params.get("q", "").strip()
+    statut = params.get("statut", "").strip()
+    ville = params.get("ville", "").strip()
+    date_debut = params.get("date_debut", "").strip()
+    date_fin = params.get("date_fin", "").strip()
+
+    if search_query:
+        clients = filtrer_par_mots(clients, CHAMPS_RECHERCHE, search_query)
+
+    # Filtrage par statut
+    if statut:
+        clients = clients.filter(statut=statut)
+
+    # Filtrage par ville
+    if ville:
+        clients = clients.filter(ville_normalise=normaliser(ville))
+
+    # Filtrage par date
+    if date_debut:
+        clients = clients.filter(date_creation__gte=date_debut)
+    if date_fin:
+        clients = clients.filter(date_creation__lte=date_fin)
+
+    return clients
+
+
+def lignes_export_clients(clients):
+    """
+    Lignes des exports CSV et PDF des clients
+    """
+    statuts = dict(Client.STATUT_CHOICES)
+    for nom, prenom, email, telephone, ville, statut in iter_projection(
+        clients, ["nom", "prenom", "email", "telephone", "ville", "statut"]
+    ):
+        yield [nom, prenom, email, telephone, ville, statuts.get(statut, statut)]
+
+
+def export_liste_clients(params):
+    """
+    Export de la liste des clients filtrée par `params`
+    """
+    return {
+        "nom": "clients",
+        "titre": "Liste des clients",
+        "entete": EXPORT_ENTETE,
+        "queryset": filtrer_clients(params).order_by("id"),
+        "lignes": lignes_export_clients,
+        "largeurs": [4, 4, 7, 3.5, 4, 3.5],
+    }
+
+
+def document_recherche_client(client):
+    """Document de recherche d'un client : (titre, contenu, lien)"""
+    contenu = [client.nom, client.prenom, client.email, client.telephone, client.ville]
+    return (
+        str(client),
+        " ".join(filter(None, contenu + [client.notes])),
+        reverse("clients:client_detail", args=[client.pk]),
+    )
+
+
+def document_recherche_interaction(interaction):
+    """Document de recherche d'une interaction, rattachée à la fiche client"""
+    return (
+        f"{interaction.get_type_display()} - {interaction.client}",
+        interaction.description,
+        reverse("clients:client_detail", args=[interaction.client_id]),
+    )
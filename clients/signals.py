@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Client
+from .services import invalider_choix_clients
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def client_modifie(sender, **kwargs):
+    """Un client ajouté, renommé ou supprimé invalide la liste des filtres"""
+    invalider_choix_clients()
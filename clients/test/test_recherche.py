@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from clients.models import Client
+from clients.services import filtrer_clients
+from mini_crm.texte import normaliser
+
+
+class ColonnesNormaliseesTest(TestCase):
+    def setUp(self):
+        self.helene = Client.objects.create(
+            nom="Lefèvre",
+            prenom="Hélène",
+            email="H.Lefevre@Example.com",
+            ville="Orléans",
+        )
+        self.autre = Client.objects.create(
+            nom="Martin", email="martin@example.com", ville="Paris"
+        )
+
+    def test_normalisation(self):
+        self.assertEqual(normaliser("  Élodie   D'ÂNGELO "), "elodie d'angelo")
+        self.assertEqual(
+            (self.helene.nom_normalise, self.helene.ville_normalise),
+            ("lefevre", "orleans"),
+        )
+        self.assertEqual(self.helene.email_normalise, "h.lefevre@example.com")
+
+    def test_colonnes_tenues_a_jour(self):
+        self.helene.ville = "Évreux"
+        self.helene.save(update_fields=["ville"])
+        self.helene.refresh_from_db()
+        self.assertEqual(self.helene.ville_normalise, "evreux")
+
+        (cree,) = Client.objects.bulk_create(
+            [Client(nom="Gérard", email="gerard@example.com")]
+        )
+        self.assertEqual(Client.objects.get(pk=cree.pk).nom_normalise, "gerard")
+        cree.nom = "Gérôme"
+        Client.objects.bulk_update([cree], ["nom"])
+        self.assertEqual(Client.objects.get(pk=cree.pk).nom_normalise, "gerome")
+
+    def test_recherche_sans_accents_ni_casse(self):
+        for saisie in ["orleans", "ORLÉANS", "helene lef", "LEFEVRE@exa"]:
+            self.assertEqual(
+                list(filtrer_clients({"q": saisie})), [self.helene], saisie
+            )
+        self.assertEqual(list(filtrer_clients({"ville": "orleans"})), [self.helene])
+
+    def test_liste_export_et_api(self):
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        self.client.login(username="testuser", password="testpassword")
+
+        response = self.client.get(reverse("clients:client_list"), {"q": "Orleans"})
+        self.assertEqual(list(response.context["clients"]), [self.helene])
+
+        response = self.client.get(
+            reverse("clients:client_export", args=["csv"]), {"q": "hélène"}
+        )
+        lignes = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lignes), 2)
+        self.assertIn("Lefèvre", lignes[1])
+
+        token = Token.objects.create(user=user)
+        response = self.client.get(
+            "/api/v1/clients",
+            {"search": "lefevre"},
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        self.assertEqual([c["id"] for c in response.data["results"]], [self.helene.id])
@@ -84,7 +84,7 @@ class ClientViewTest(TestCase):
         response = self.test_client.get(reverse("clients:client_export", args=["csv"]))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "text/csv")
-        content = response.content.decode()
+        content = b"".join(response.streaming_content).decode()
         self.assertIn("Dupont", content)
         self.assertIn("Jean", content)
 
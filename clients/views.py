@@ -11,12 +11,9 @@ from django.views.generic import (
     View,
 )
 from django.urls import reverse_lazy, reverse
-from django.db.models import Q
-import csv
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+from django.http import HttpResponseBadRequest
+from mini_crm.exports import export_en_arriere_plan, reponse_csv, reponse_pdf_liste
+from .services import EXPORT_ENTETE, filtrer_clients, lignes_export_clients
 
 
 class ClientListViews(LoginRequiredMixin, ListView):
@@ -26,38 +23,7 @@ class ClientListViews(LoginRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        qs = Client.objects.all()
-
-        # Récuperatiuon des paramètres de filtrage
-        search_query = self.request.GET.get("q", "").strip()
-        statut = self.request.GET.get("statut", "").strip()
-        ville = self.request.GET.get("ville", "").strip()
-        date_debut = self.request.GET.get("date_debut", "").strip()
-        date_fin = self.request.GET.get("date_fin", "").strip()
-
-        if search_query:
-            qs = qs.filter(
-                Q(nom__icontains=search_query)
-                | Q(email__icontains=search_query)
-                | Q(prenom__icontains=search_query)
-                | Q(ville__icontains=search_query)
-            )
-
-        # Filtrage par statut
-        if statut:
-            qs = qs.filter(statut=statut)
-
-        # Filtrage par ville
-        if ville:
-            qs = qs.filter(ville__iexact=ville)
-
-        # Filtrage par date
-        if date_debut:
-            qs = qs.filter(date_creation__gte=date_debut)
-        if date_fin:
-            qs = qs.filter(date_creation__lte=date_fin)
-
-        return qs.order_by("-date_creation")
+        return filtrer_clients(self.request.GET).order_by("-date_creation")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -137,74 +103,16 @@ class ClientExportView(LoginRequiredMixin, View):
         return HttpResponseBadRequest("Format non supporté")
 
     def export_csv(self):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="clients.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(["Nom", "Prénom", "Email", "Téléphone", "Ville", "Statut"])
-
-        clients = Client.objects.all()
-        for client in clients:
-            writer.writerow(
-                [
-                    client.nom,
-                    client.prenom,
-                    client.email,
-                    client.telephone,
-                    client.ville,
-                    client.get_statut_display(),
-                ]
-            )
-
-        return response
-
-    def export_pdf(self):
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = 'attachment; filename="clients.pdf"'
-
-        doc = SimpleDocTemplate(response, pagesize=letter)
-        elements = []
-
-        # En-tête
-        data = [["Nom", "Prénom", "Email", "Téléphone", "Ville", "Statut"]]
-
-        # Données
-        clients = Client.objects.all()
-        for client in clients:
-            data.append(
-                [
-                    client.nom,
-                    client.prenom,
-                    client.email,
-                    client.telephone,
-                    client.ville,
-                    client.get_statut_display(),
-                ]
-            )
-
-        # Création du tableau
-        table = Table(data)
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 14),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                    ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
-                    ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 12),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ]
-            )
+        clients = filtrer_clients(self.request.GET).order_by("id")
+        redirection = export_en_arriere_plan(
+            self.request, "clients", "csv", clients, reverse("clients:client_list")
         )
+        if redirection:
+            return redirection
+        return reponse_csv("clients.csv", EXPORT_ENTETE, lignes_export_clients(clients))
 
-        elements.append(table)
-        doc.build(elements)
-        return response
+    def export_pdf(self):
+        return reponse_pdf_liste(self.request, "clients", reverse("clients:client_list"))
 
 
 class InteractionCreateView(LoginRequiredMixin, CreateView):
@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Facture
+from .models import (
+    ChiffreAffairesMensuel,
+    EcheancierFacturation,
+    Facture,
+    SequenceFacture,
+)
 
 
 @admin.register(Facture)
@@ -14,3 +19,29 @@ class FactureAdmin(admin.ModelAdmin):
     ]
     list_filter = ["statut_paiement", "date_emission"]
     search_fields = ["numero", "client__nom"]
+
+
+@admin.register(SequenceFacture)
+class SequenceFactureAdmin(admin.ModelAdmin):
+    list_display = ["annee", "dernier_numero"]
+
+
+@admin.register(EcheancierFacturation)
+class EcheancierFacturationAdmin(admin.ModelAdmin):
+    list_display = [
+        "projet",
+        "montant",
+        "periodicite",
+        "premiere_echeance",
+        "prochaine_echeance",
+        "date_fin",
+        "actif",
+    ]
+    list_filter = ["actif", "periodicite"]
+    search_fields = ["projet__titre", "projet__client__nom"]
+
+
+@admin.register(ChiffreAffairesMensuel)
+class ChiffreAffairesMensuelAdmin(admin.ModelAdmin):
+    list_display = ["mois", "statut_paiement", "nb_factures", "montant"]
+    list_filter = ["statut_paiement"]
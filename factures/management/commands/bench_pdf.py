@@ -0,0 +1,141 @@
+import io
+import multiprocessing
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import Facture
+from factures.moteurs import MOTEURS
+from factures.utils import GabaritFacture, generate_facture_pdf, get_gabarit, get_societe
+from projets.models import Projet
+
+
+def facture_synthetique(numero):
+    """Facture non enregistrée, suffisante pour le rendu"""
+    client = Client(
+        id=numero,
+        nom=f"Client {numero}",
+        adresse=f"{numero} rue de la Paix, 75002 Paris",
+        email=f"client{numero}@example.com",
+    )
+    projet = Projet(id=numero, titre=f"Projet {numero}", client=client)
+    return Facture(
+        id=numero,
+        numero=f"BENCH-{numero:05d}",
+        client=client,
+        projet=projet,
+        montant=Decimal("1200.00") + numero,
+        date_emission=timezone.now(),
+    )
+
+
+def mesurer_moteur(nom, iterations):
+    """
+    Rend `iterations` factures avec le moteur `nom` et retourne latences,
+    mémoire et taille des documents. Exécuté dans un processus dédié pour
+    que la mémoire d'un moteur ne fausse pas celle de l'autre.
+    """
+    gabarit = get_gabarit()
+    factures = [facture_synthetique(i) for i in range(iterations)]
+    rss_initial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        # Premier rendu à part : chargement des polices et des styles
+        debut = time.perf_counter()
+        generate_facture_pdf(factures[0], io.BytesIO(), gabarit=gabarit, moteur=nom)
+        premier = time.perf_counter() - debut
+    except Exception as e:  # moteur non installé (ex. Pango absent)
+        return {"moteur": nom, "erreur": str(e).splitlines()[0]}
+
+    latences, tailles = [], []
+    for facture in factures:
+        debut = time.perf_counter()
+        _, taille = generate_facture_pdf(
+            facture, io.BytesIO(), gabarit=gabarit, moteur=nom
+        )
+        latences.append(time.perf_counter() - debut)
+        tailles.append(taille)
+
+    latences.sort()
+    return {
+        "moteur": nom,
+        "premier_ms": premier * 1000,
+        "moyenne_ms": statistics.mean(latences) * 1000,
+        "p50_ms": latences[len(latences) // 2] * 1000,
+        "p95_ms": latences[int(len(latences) * 0.95) - 1] * 1000,
+        "rendus_s": len(latences) / sum(latences),
+        # ru_maxrss est en Ko sous Linux
+        "rss_mo": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_initial)
+        / 1024,
+        "taille_ko": statistics.mean(tailles) / 1024,
+    }
+
+
+class Command(BaseCommand):
+    help = "Mesure le nombre de rendus PDF de factures par seconde"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=200, help="Rendus par mesure"
+        )
+        parser.add_argument(
+            "--moteurs",
+            nargs="+",
+            choices=sorted(MOTEURS),
+            help="Compare les moteurs de rendu (latence, mémoire, taille)",
+        )
+
+    def mesurer(self, factures, gabarit_pour):
+        debut = time.perf_counter()
+        for facture in factures:
+            generate_facture_pdf(facture, io.BytesIO(), gabarit=gabarit_pour())
+        return len(factures) / (time.perf_counter() - debut)
+
+    def comparer_moteurs(self, moteurs, iterations):
+        # Un processus neuf par moteur ; les connexions ne doivent pas être
+        # partagées avec les processus enfants
+        connections.close_all()
+        contexte = multiprocessing.get_context("fork")
+        resultats = []
+        for nom in moteurs:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexte) as executor:
+                resultats.append(executor.submit(mesurer_moteur, nom, iterations).result())
+
+        self.stdout.write(
+            f"{'Moteur':<12}{'1er (ms)':>10}{'moy (ms)':>10}{'p50 (ms)':>10}"
+            f"{'p95 (ms)':>10}{'rendus/s':>10}{'RSS (Mo)':>10}{'taille (Ko)':>12}"
+        )
+        for r in resultats:
+            if "erreur" in r:
+                self.stdout.write(
+                    self.style.WARNING(f"{r['moteur']:<12}indisponible : {r['erreur']}")
+                )
+                continue
+            self.stdout.write(
+                f"{r['moteur']:<12}{r['premier_ms']:>10.1f}{r['moyenne_ms']:>10.1f}"
+                f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['rendus_s']:>10.1f}"
+                f"{r['rss_mo']:>10.1f}{r['taille_ko']:>12.1f}"
+            )
+        return resultats
+
+    def handle(self, *args, **options):
+        if options["moteurs"]:
+            self.comparer_moteurs(options["moteurs"], options["iterations"])
+            return
+
+        factures = [facture_synthetique(i) for i in range(options["iterations"])]
+
+        # Avant : styles, blocs société et requête Société reconstruits à chaque rendu
+        avant = self.mesurer(factures, lambda: GabaritFacture(get_societe()))
+        # Après : gabarit compilé une fois par processus
+        apres = self.mesurer(factures, get_gabarit)
+
+        self.stdout.write(f"Gabarit reconstruit : {avant:.1f} rendus/s")
+        self.stdout.write(f"Gabarit compilé     : {apres:.1f} rendus/s")
+        self.stdout.write(self.style.SUCCESS(f"Gain : x{apres / avant:.2f}"))
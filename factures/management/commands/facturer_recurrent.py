@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from factures.services import generer_factures_recurrentes
+
+
+class Command(BaseCommand):
+    help = "Émet les factures récurrentes arrivées à échéance"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date", help="Date de facturation au format AAAA-MM-JJ (défaut : aujourd'hui)"
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=settings.FACTURATION_TAILLE_LOT,
+            help="Nombre d'échéanciers traités par transaction",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            jour = date.fromisoformat(options["date"]) if options["date"] else None
+        except ValueError:
+            raise CommandError("La date doit être au format AAAA-MM-JJ")
+
+        resume = generer_factures_recurrentes(jour, taille_lot=options["taille_lot"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resume['factures']} factures émises pour "
+                f"{resume['echeanciers']} échéanciers en {resume['lots']} lots "
+                f"({resume['duree_s']} s)"
+            )
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from factures.services import (
+    ecrire_manifeste,
+    filtrer_factures,
+    generer_pdfs_en_masse,
+)
+
+
+class Command(BaseCommand):
+    help = "Génère en parallèle les PDF d'un ensemble de factures"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mois", help="Mois d'émission au format AAAA-MM")
+        parser.add_argument("--client", type=int, help="Identifiant du client")
+        parser.add_argument("--statut", help="Statut de paiement")
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Nombre de processus"
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=100,
+            help="Nombre de factures chargées par lot",
+        )
+        parser.add_argument(
+            "--manifeste", help="Chemin du manifeste JSON (défaut : MEDIA_ROOT/pdf)"
+        )
+        parser.add_argument(
+            "--forcer",
+            action="store_true",
+            help="Régénère les PDF même s'ils sont à jour",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            factures = filtrer_factures(
+                mois=options["mois"],
+                client_id=options["client"],
+                statut=options["statut"],
+            )
+        except ValueError:
+            raise CommandError("Le mois doit être au format AAAA-MM")
+
+        manifeste = generer_pdfs_en_masse(
+            factures,
+            workers=options["workers"],
+            taille_lot=options["taille_lot"],
+            forcer=options["forcer"],
+        )
+        manifeste["filtres"] = {
+            "mois": options["mois"],
+            "client": options["client"],
+            "statut": options["statut"],
+        }
+        chemin = ecrire_manifeste(manifeste, options["manifeste"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{manifeste['total']} PDF traités ({manifeste['depuis_cache']} en cache, "
+                f"{manifeste['erreurs']} erreurs, {manifeste['taille_totale'] / 1024:.1f} Ko) "
+                f"en {manifeste['duree_totale_s']} s"
+            )
+        )
+        self.stdout.write(f"Manifeste : {chemin}")
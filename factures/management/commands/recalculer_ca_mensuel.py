@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from factures.services import reconstruire_chiffre_affaires_mensuel
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit le chiffre d'affaires mensuel "
+        "(agrégat des factures par mois et statut)"
+    )
+
+    def handle(self, *args, **options):
+        lignes = reconstruire_chiffre_affaires_mensuel()
+        self.stdout.write(
+            self.style.SUCCESS(f"{lignes} lignes mois/statut recalculées")
+        )
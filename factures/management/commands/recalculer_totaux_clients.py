@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from factures.services import recalculer_totaux_clients
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule en parallèle les totaux de factures des clients "
+        "(nombre, facturé, payé, encours, dernière facture)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Nombre de processus"
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=1000,
+            help="Nombre de clients recalculés par UPDATE",
+        )
+
+    def handle(self, *args, **options):
+        resultat = recalculer_totaux_clients(
+            workers=options["workers"], taille_lot=options["taille_lot"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultat['clients']} clients recalculés en {resultat['lots']} lots "
+                f"({resultat['workers']} processus) en {resultat['duree_s']} s"
+            )
+        )
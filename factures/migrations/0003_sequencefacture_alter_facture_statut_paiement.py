@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0002_facture_date_echeance_alter_facture_statut_paiement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceFacture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveIntegerField(unique=True)),
+                ('dernier_numero', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Séquence de factures',
+                'verbose_name_plural': 'Séquences de factures',
+            },
+        ),
+        migrations.AlterField(
+            model_name='facture',
+            name='statut_paiement',
+            field=models.CharField(choices=[('envoyée', 'Envoyée'), ('payée', 'Payée'), ('en_retard', 'En retard'), ('annulée', 'Annulée'), ('brouillon', 'Brouillon')], default='envoyée', help_text='Statut du paiement de la facture', max_length=20),
+        ),
+    ]
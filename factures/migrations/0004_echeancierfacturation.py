@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0003_sequencefacture_alter_facture_statut_paiement'),
+        ('projets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EcheancierFacturation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('montant', models.DecimalField(decimal_places=2, help_text='Montant de chaque facture (en euros)', max_digits=10)),
+                ('periodicite', models.CharField(choices=[('mensuelle', 'Mensuelle'), ('trimestrielle', 'Trimestrielle'), ('annuelle', 'Annuelle')], default='mensuelle', max_length=20)),
+                ('prochaine_echeance', models.DateField(help_text="Date d'émission de la prochaine facture")),
+                ('date_fin', models.DateField(blank=True, help_text='Dernière échéance facturable', null=True)),
+                ('delai_paiement', models.PositiveIntegerField(default=30, help_text="Délai de paiement en jours après l'échéance")),
+                ('actif', models.BooleanField(default=True)),
+                ('derniere_facture_le', models.DateField(blank=True, null=True)),
+                ('projet', models.OneToOneField(help_text='Projet facturé périodiquement', on_delete=django.db.models.deletion.CASCADE, related_name='echeancier', to='projets.projet')),
+            ],
+            options={
+                'verbose_name': 'Échéancier de facturation',
+                'verbose_name_plural': 'Échéanciers de facturation',
+                'indexes': [models.Index(fields=['actif', 'prochaine_echeance'], name='factures_ec_actif_29d302_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0004_echeancierfacturation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['statut_paiement', 'date_emission'], name='facture_statut_emission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(condition=models.Q(('date_echeance__isnull', False)), fields=['statut_paiement', 'date_echeance'], name='facture_statut_echeance_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:27
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+
+def remplir_chiffre_affaires(apps, schema_editor):
+    """Agrégat initial des factures existantes, par mois et statut"""
+    Facture = apps.get_model("factures", "Facture")
+    ChiffreAffairesMensuel = apps.get_model("factures", "ChiffreAffairesMensuel")
+    lignes = (
+        Facture.objects.annotate(mois=TruncMonth("date_emission"))
+        .values("mois", "statut_paiement")
+        .annotate(
+            nb_factures=Count("id"),
+            montant=Sum("montant"),
+            nb_echeances=Count("date_echeance"),
+            duree_echeance=Sum(
+                ExpressionWrapper(
+                    F("date_echeance") - TruncDate("date_emission"),
+                    output_field=DurationField(),
+                )
+            ),
+        )
+        .order_by()
+    )
+    ChiffreAffairesMensuel.objects.bulk_create(
+        [
+            ChiffreAffairesMensuel(
+                mois=ligne["mois"].date(),
+                statut_paiement=ligne["statut_paiement"],
+                nb_factures=ligne["nb_factures"],
+                montant=ligne["montant"],
+                nb_echeances=ligne["nb_echeances"],
+                jours_echeance=(ligne["duree_echeance"] or timedelta()).days,
+            )
+            for ligne in lignes
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0005_facture_index_statuts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChiffreAffairesMensuel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField(help_text="Premier jour du mois d'émission")),
+                ('statut_paiement', models.CharField(choices=[('envoyée', 'Envoyée'), ('payée', 'Payée'), ('en_retard', 'En retard'), ('annulée', 'Annulée'), ('brouillon', 'Brouillon')], max_length=20)),
+                ('nb_factures', models.IntegerField(default=0)),
+                ('montant', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('nb_echeances', models.IntegerField(default=0)),
+                ('jours_echeance', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': "Chiffre d'affaires mensuel",
+                'verbose_name_plural': "Chiffres d'affaires mensuels",
+                'ordering': ['mois', 'statut_paiement'],
+                'constraints': [models.UniqueConstraint(fields=('mois', 'statut_paiement'), name='ca_mensuel_mois_statut_unique')],
+            },
+        ),
+        migrations.RunPython(remplir_chiffre_affaires, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def initialiser_premiere_echeance(apps, schema_editor):
+    """Échéanciers existants : la prochaine échéance sert d'ancre"""
+    EcheancierFacturation = apps.get_model("factures", "EcheancierFacturation")
+    EcheancierFacturation.objects.filter(premiere_echeance__isnull=True).update(
+        premiere_echeance=F("prochaine_echeance")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0006_chiffreaffairesmensuel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='echeancierfacturation',
+            name='premiere_echeance',
+            field=models.DateField(blank=True, help_text='Première échéance (défaut : prochaine échéance) ; les suivantes en sont déduites et gardent son jour du mois', null=True),
+        ),
+        migrations.RunPython(initialiser_premiere_echeance, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,126 @@
-from django.db import models
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Count,
+    DecimalField,
+    F,
+    IntegerField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
 from clients.models import Client
 from projets.models import Projet
 from django.utils import timezone
 
 
+class SequenceFacture(models.Model):
+    """
+    Compteur des numéros de facture d'une année.
+    L'incrément se fait par un UPDATE atomique qui verrouille la ligne
+    jusqu'à la fin de la transaction : deux créations simultanées ne
+    peuvent pas obtenir le même numéro, et un numéro alloué dans une
+    transaction annulée est rendu (pas de trou).
+    """
+
+    annee = models.PositiveIntegerField(unique=True)
+    dernier_numero = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Séquence de factures"
+        verbose_name_plural = "Séquences de factures"
+
+    def __str__(self):
+        return f"{self.annee} : {self.dernier_numero}"
+
+    @classmethod
+    def allouer(cls, annee, nombre=1):
+        """
+        Réserve `nombre` numéros consécutifs pour `annee` et retourne leur
+        range. A appeler dans la transaction qui enregistre les factures.
+        """
+        with transaction.atomic():
+            if not cls._incrementer(annee, nombre):
+                cls._creer(annee)
+                cls._incrementer(annee, nombre)
+            dernier = cls.objects.get(annee=annee).dernier_numero
+        return range(dernier - nombre + 1, dernier + 1)
+
+    @classmethod
+    def _incrementer(cls, annee, nombre):
+        return cls.objects.filter(annee=annee).update(
+            dernier_numero=F("dernier_numero") + nombre
+        )
+
+    @classmethod
+    def _creer(cls, annee):
+        """
+        Crée le compteur de l'année, initialisé au plus grand numéro déjà
+        attribué (factures antérieures au compteur)
+        """
+        existants = Facture.objects.filter(numero__startswith=f"{annee}-").values_list(
+            "numero", flat=True
+        )
+        dernier = max(
+            (int(n.split("-")[1]) for n in existants if n.split("-")[1].isdigit()),
+            default=0,
+        )
+        try:
+            # Point de sauvegarde : une création concurrente n'annule pas la transaction
+            with transaction.atomic():
+                cls.objects.create(annee=annee, dernier_numero=dernier)
+        except IntegrityError:
+            pass
+
+
+class FactureQuerySet(models.QuerySet):
+    """Sélections des tâches de relance et de notification"""
+
+    def en_retard(self, jour=None):
+        """Factures envoyées dont l'échéance est dépassée"""
+        jour = jour or timezone.now().date()
+        return self.filter(statut_paiement="envoyée", date_echeance__lt=jour)
+
+    def echeance_proche(self, jours=7, jour=None):
+        """Factures envoyées arrivant à échéance dans les `jours` prochains jours"""
+        jour = jour or timezone.now().date()
+        return self.filter(
+            statut_paiement="envoyée",
+            date_echeance__gt=jour,
+            date_echeance__lte=jour + timedelta(days=jours),
+        )
+
+
+# Statuts des factures comptées comme facturées, et restant à encaisser
+STATUTS_FACTURES = ["envoyée", "payée", "en_retard"]
+STATUTS_ENCOURS = ["envoyée", "en_retard"]
+
+# Champs de la facture repris dans ChiffreAffairesMensuel
+CHAMPS_CHIFFRE_AFFAIRES = {
+    "date_emission",
+    "statut_paiement",
+    "montant",
+    "date_echeance",
+}
+# Champs de la facture repris dans les totaux du client
+CHAMPS_TOTAUX_CLIENT = {"client_id", "date_emission", "statut_paiement", "montant"}
+
+
 class Facture(models.Model):
     """
     Représente une facture liée à un client et un projet
     """
 
+    objects = FactureQuerySet.as_manager()
+
     # Numéro unique de la facture
     numero = models.CharField(
         max_length=20, unique=True, help_text="Identifiant unique de la facture"
@@ -69,6 +181,59 @@ class Facture(models.Model):
         help_text="Remarques sur la facture, par exemple les motifs du retard de paiement",
     )
 
+    class Meta:
+        indexes = [
+            # Liste et tableau de bord : filtre par statut, tri par émission
+            models.Index(
+                fields=["statut_paiement", "date_emission"],
+                name="facture_statut_emission_idx",
+            ),
+            # Relances et notifications : échéances par statut (index partiel,
+            # les factures sans échéance n'y figurent pas)
+            models.Index(
+                fields=["statut_paiement", "date_echeance"],
+                condition=Q(date_echeance__isnull=False),
+                name="facture_statut_echeance_idx",
+            ),
+        ]
+
+    def etat_chiffre_affaires(self):
+        """
+        Contribution de la facture à ChiffreAffairesMensuel : (mois, statut,
+        montant, jours entre émission et échéance ou None). None si l'un des
+        champs n'est pas chargé.
+        """
+        if (
+            CHAMPS_CHIFFRE_AFFAIRES & self.get_deferred_fields()
+            or self.date_emission is None
+        ):
+            return None
+        emission = timezone.localtime(self.date_emission).date()
+        return (
+            emission.replace(day=1),
+            self.statut_paiement,
+            Decimal(str(self.montant)),
+            (self.date_echeance - emission).days if self.date_echeance else None,
+        )
+
+    def etat_client(self):
+        """
+        Contribution de la facture aux totaux de son client : (client_id,
+        statut, montant, date d'émission). None si l'un des champs n'est pas
+        chargé.
+        """
+        if (
+            CHAMPS_TOTAUX_CLIENT & self.get_deferred_fields()
+            or self.date_emission is None
+        ):
+            return None
+        return (
+            self.client_id,
+            self.statut_paiement,
+            Decimal(str(self.montant)),
+            self.date_emission,
+        )
+
     def __str__(self):
         """
         Chaine de représentation dans l'admin et  ailleurs.
@@ -85,35 +250,45 @@ class Facture(models.Model):
         return reverse("detail_facture", args=[str(self.pk)])
 
     def save(self, *args, **kwargs):
-        if not self.numero:
-            self.numero = self.generer_numero()
-        super().save(*args, **kwargs)
+        if self.numero:
+            # Relecture verrouillée de l'état enregistré (pre_save) et
+            # ajustement des agrégats (post_save) dans la même transaction
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+            return
+        # Numéro et facture dans la même transaction : si l'enregistrement
+        # échoue, le numéro est rendu au compteur
+        try:
+            with transaction.atomic():
+                self.numero = self.generer_numero()
+                super().save(*args, **kwargs)
+        except Exception:
+            self.numero = ""
+            raise
+
+    @staticmethod
+    def formater_numero(annee, numero):
+        """Numéro au format ANNEE-NUMERO, exemple : 2024-001"""
+        return f"{annee}-{numero:03d}"
+
+    @classmethod
+    def allouer_numeros(cls, nombre, annee=None):
+        """
+        Réserve `nombre` numéros consécutifs (création en lot) et retourne
+        la liste des numéros formatés
+        """
+        annee = annee or timezone.now().year
+        return [
+            cls.formater_numero(annee, n)
+            for n in SequenceFacture.allouer(annee, nombre)
+        ]
 
     def generer_numero(self):
         """
         Génère un numéro de facture unique au format ANNEE-NUMERO
         Exemple: 2024-001
         """
-        annee = timezone.now().year
-        # Récupère le dernier numero de facture pour cette année
-        dernier_numero = (
-            Facture.objects.filter(numero__startswith=f"{annee}-")
-            .order_by("-numero")
-            .first()
-        )
-
-        if dernier_numero:
-            # Extrait le numero et l'incrémente
-            try:
-                dernier_num = int(dernier_numero.numero.split("-")[1])
-                nouveau_num = dernier_num + 1
-            except (IndexError, ValueError):
-                nouveau_num = 1
-        else:
-            nouveau_num = 1
-
-        # Formate le nouveau numero avec des zéros devant
-        return f"{annee}-{nouveau_num:03d}"
+        return self.allouer_numeros(1)[0]
 
     def get_statut_badge_class(self):
         """
@@ -129,6 +304,286 @@ class Facture(models.Model):
         return statut_classes.get(self.statut_paiement, "bg-secondary")
 
     def generer_pdf(self):
-        from .utils import generate_facture_pdf
+        """
+        Retourne le nom du PDF de la facture dans le stockage des PDF
+        """
+        from .utils import get_facture_pdf
+
+        nom, _ = get_facture_pdf(self)
+        return nom
+
+
+class ChiffreAffairesMensuel(models.Model):
+    """
+    Agrégat des factures par mois d'émission et statut, ajusté à chaque
+    enregistrement ou suppression de facture (factures.signals) : les
+    graphiques et indicateurs lisent quelques lignes au lieu de parcourir
+    les factures. Reconstruit par la commande recalculer_ca_mensuel.
+    """
+
+    mois = models.DateField(help_text="Premier jour du mois d'émission")
+    statut_paiement = models.CharField(max_length=20, choices=Facture.STATUT_CHOICES)
+    nb_factures = models.IntegerField(default=0)
+    montant = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Délai émission -> échéance cumulé, pour le délai moyen de paiement
+    nb_echeances = models.IntegerField(default=0)
+    jours_echeance = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Chiffre d'affaires mensuel"
+        verbose_name_plural = "Chiffres d'affaires mensuels"
+        ordering = ["mois", "statut_paiement"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mois", "statut_paiement"], name="ca_mensuel_mois_statut_unique"
+            )
+        ]
 
-        return generate_facture_pdf(self)
+    def __str__(self):
+        return f"{self.mois:%m/%Y} {self.statut_paiement} : {self.montant} €"
+
+    @classmethod
+    def ajuster(cls, mois, statut, nb_factures, montant, nb_echeances=0, jours=0):
+        """
+        Ajoute (ou retire, valeurs négatives) des factures à la ligne
+        (mois, statut), créée au besoin. UPDATE atomique : pas de perte lors
+        d'enregistrements simultanés.
+        """
+        lignes = cls.objects.filter(mois=mois, statut_paiement=statut)
+        increments = {
+            "nb_factures": F("nb_factures") + nb_factures,
+            "montant": F("montant") + montant,
+            "nb_echeances": F("nb_echeances") + nb_echeances,
+            "jours_echeance": F("jours_echeance") + jours,
+        }
+        if lignes.update(**increments):
+            return
+        try:
+            # Point de sauvegarde : une création concurrente n'annule pas la transaction
+            with transaction.atomic():
+                cls.objects.create(
+                    mois=mois,
+                    statut_paiement=statut,
+                    nb_factures=nb_factures,
+                    montant=montant,
+                    nb_echeances=nb_echeances,
+                    jours_echeance=jours,
+                )
+        except IntegrityError:
+            lignes.update(**increments)
+
+    @classmethod
+    def appliquer(cls, etats, signe=1):
+        """
+        Ajoute (signe=1) ou retire (signe=-1) les factures dont les états
+        (Facture.etat_chiffre_affaires) sont donnés, un UPDATE par ligne
+        """
+        totaux = defaultdict(lambda: [0, Decimal(0), 0, 0])
+        for mois, statut, montant, jours in etats:
+            total = totaux[mois, statut]
+            total[0] += signe
+            total[1] += signe * montant
+            if jours is not None:
+                total[2] += signe
+                total[3] += signe * jours
+        for (mois, statut), (nombre, montant, nb_echeances, jours) in totaux.items():
+            cls.ajuster(mois, statut, nombre, montant, nb_echeances, jours)
+
+
+def _agregat_factures_client(agregat, statuts, output_field):
+    """Agrégat des factures du client de la ligne, 0 sans facture"""
+    factures = (
+        Facture.objects.filter(client=OuterRef("pk"), statut_paiement__in=statuts)
+        .order_by()
+        .values("client")
+        .annotate(valeur=agregat)
+        .values("valeur")
+    )
+    return Coalesce(Subquery(factures), Value(0), output_field=output_field)
+
+
+def _derniere_facture_client():
+    """Date d'émission de la dernière facture émise du client de la ligne"""
+    return Subquery(
+        Facture.objects.filter(
+            client=OuterRef("pk"), statut_paiement__in=STATUTS_FACTURES
+        )
+        .order_by()
+        .values("client")
+        .annotate(derniere=Max("date_emission"))
+        .values("derniere")
+    )
+
+
+def totaux_clients_calcules():
+    """
+    Totaux de factures des clients calculés depuis les factures (sous-requêtes
+    corrélées), pour Client.objects.update(**totaux_clients_calcules())
+    """
+    return {
+        "nb_factures": _agregat_factures_client(
+            Count("id"), STATUTS_FACTURES, IntegerField()
+        ),
+        "total_facture": _agregat_factures_client(
+            Sum("montant"), STATUTS_FACTURES, DecimalField()
+        ),
+        "total_paye": _agregat_factures_client(
+            Sum("montant"), ["payée"], DecimalField()
+        ),
+        "encours": _agregat_factures_client(
+            Sum("montant"), STATUTS_ENCOURS, DecimalField()
+        ),
+        "derniere_facture_le": _derniere_facture_client(),
+    }
+
+
+def ajuster_totaux_client(ancien, nouveau):
+    """
+    Reporte dans les totaux des clients le passage d'une facture de l'état
+    `ancien` à l'état `nouveau` (Facture.etat_client ; None à la création ou
+    à la suppression). Un UPDATE atomique (F()) par client concerné, aucun
+    si les totaux ne changent pas.
+    """
+    variations = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+    for etat, signe in ((ancien, -1), (nouveau, 1)):
+        if etat is None:
+            continue
+        client_id, statut, montant, _ = etat
+        variation = variations[client_id]
+        if statut in STATUTS_FACTURES:
+            variation[0] += signe
+            variation[1] += signe * montant
+        if statut == "payée":
+            variation[2] += signe * montant
+        if statut in STATUTS_ENCOURS:
+            variation[3] += signe * montant
+
+    for client_id, (nombre, total, paye, encours) in variations.items():
+        emise_avant = (
+            ancien and ancien[0] == client_id and ancien[1] in STATUTS_FACTURES
+        )
+        emise_apres = (
+            nouveau and nouveau[0] == client_id and nouveau[1] in STATUTS_FACTURES
+        )
+        champs = {}
+        if emise_avant and not (emise_apres and nouveau[3] >= ancien[3]):
+            # La dernière facture a pu disparaître : date relue dans les factures
+            champs["derniere_facture_le"] = _derniere_facture_client()
+        elif emise_apres and (not emise_avant or nouveau[3] != ancien[3]):
+            emission = Value(nouveau[3])
+            champs["derniere_facture_le"] = Greatest(
+                Coalesce("derniere_facture_le", emission), emission
+            )
+        if nombre:
+            champs["nb_factures"] = F("nb_factures") + nombre
+        if total:
+            champs["total_facture"] = F("total_facture") + total
+        if paye:
+            champs["total_paye"] = F("total_paye") + paye
+        if encours:
+            champs["encours"] = F("encours") + encours
+        if champs:
+            Client.objects.filter(pk=client_id).update(**champs)
+
+
+def ajouter_mois(jour, mois):
+    """
+    Ajoute `mois` mois à une date ; le jour est ramené au dernier jour du
+    mois si nécessaire (31 janvier + 1 mois = 28 ou 29 février)
+    """
+    index = jour.month - 1 + mois
+    annee, mois = jour.year + index // 12, index % 12 + 1
+    return date(annee, mois, min(jour.day, calendar.monthrange(annee, mois)[1]))
+
+
+class EcheancierFacturation(models.Model):
+    """
+    Facturation récurrente d'un projet : une facture est émise à chaque
+    échéance par generer_factures_recurrentes (tâche Celery quotidienne ou
+    commande facturer_recurrent)
+    """
+
+    PERIODICITE_CHOICES = [
+        ("mensuelle", "Mensuelle"),
+        ("trimestrielle", "Trimestrielle"),
+        ("annuelle", "Annuelle"),
+    ]
+    MOIS_PAR_PERIODE = {"mensuelle": 1, "trimestrielle": 3, "annuelle": 12}
+
+    projet = models.OneToOneField(
+        Projet,
+        on_delete=models.CASCADE,
+        related_name="echeancier",
+        help_text="Projet facturé périodiquement",
+    )
+    montant = models.DecimalField(
+        max_digits=10, decimal_places=2, help_text="Montant de chaque facture (en euros)"
+    )
+    periodicite = models.CharField(
+        max_length=20, choices=PERIODICITE_CHOICES, default="mensuelle"
+    )
+    premiere_echeance = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Première échéance (défaut : prochaine échéance) ; les "
+        "suivantes en sont déduites et gardent son jour du mois",
+    )
+    prochaine_echeance = models.DateField(
+        help_text="Date d'émission de la prochaine facture"
+    )
+    date_fin = models.DateField(
+        null=True, blank=True, help_text="Dernière échéance facturable"
+    )
+    delai_paiement = models.PositiveIntegerField(
+        default=30, help_text="Délai de paiement en jours après l'échéance"
+    )
+    actif = models.BooleanField(default=True)
+    derniere_facture_le = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Échéancier de facturation"
+        verbose_name_plural = "Échéanciers de facturation"
+        indexes = [models.Index(fields=["actif", "prochaine_echeance"])]
+
+    def __str__(self):
+        return f"{self.projet} - {self.get_periodicite_display()} ({self.montant} €)"
+
+    def save(self, *args, **kwargs):
+        if self.premiere_echeance is None:
+            self.premiere_echeance = self.prochaine_echeance
+        super().save(*args, **kwargs)
+
+    def echeances_dues(self, jour):
+        """
+        Échéances non facturées jusqu'à `jour` inclus (rattrapage compris).
+        La k-ième échéance est calculée depuis la première, et non depuis la
+        précédente : un échéancier du 31 revient au 31 après février.
+        """
+        ancre = self.premiere_echeance or self.prochaine_echeance
+        pas = self.MOIS_PAR_PERIODE[self.periodicite]
+        # Rang de la prochaine échéance depuis la première
+        rang = (
+            (self.prochaine_echeance.year - ancre.year) * 12
+            + self.prochaine_echeance.month
+            - ancre.month
+        ) // pas
+        echeances = []
+        echeance = self.prochaine_echeance
+        while echeance <= jour and (self.date_fin is None or echeance <= self.date_fin):
+            echeances.append(echeance)
+            rang += 1
+            echeance = ajouter_mois(ancre, rang * pas)
+        return echeances, echeance
+
+    def facture_pour(self, echeance, numero):
+        """Facture (non enregistrée) de l'échéance"""
+        return Facture(
+            numero=numero,
+            client_id=self.projet.client_id,
+            projet_id=self.projet_id,
+            montant=self.montant,
+            date_echeance=echeance + timedelta(days=self.delai_paiement),
+            statut_paiement="envoyée",
+            notes=f"Facturation {self.get_periodicite_display().lower()} "
+            f"- échéance du {echeance:%d/%m/%Y}",
+        )
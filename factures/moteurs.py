@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import render_to_string
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+
+TAUX_TVA = 0.20  # 20%
+
+
+def calculer_totaux(facture):
+    """
+    Retourne (montant HT, TVA) d'une facture dont le montant est TTC
+    """
+    montant_ht = float(facture.montant) / (1 + TAUX_TVA)
+    return montant_ht, float(facture.montant) - montant_ht
+
+
+class MoteurPdf:
+    """
+    Interface d'un moteur de rendu des factures : écrit le PDF d'une facture
+    dans un flux ouvert en écriture, à partir du gabarit du processus
+    """
+
+    nom = None
+
+    def rendre(self, facture, flux, gabarit):
+        raise NotImplementedError
+
+
+class MoteurReportLab(MoteurPdf):
+    """Mise en page programmée avec ReportLab (GabaritFacture)"""
+
+    nom = "reportlab"
+
+    def rendre(self, facture, flux, gabarit):
+        # Pages compressées par défaut ; les polices standard (Helvetica) ne
+        # sont pas embarquées et le gabarit n'a pas d'image : rien de plus
+        # à réduire
+        doc = SimpleDocTemplate(flux, pagesize=A4, **gabarit.MARGES)
+        doc.build(gabarit.construire(facture))
+
+
+class MoteurWeasyPrint(MoteurPdf):
+    """
+    Gabarit HTML factures/facture_pdf.html converti par WeasyPrint.
+    La feuille de style et la configuration des polices sont chargées une
+    fois par processus. Avec PDF_COMPACT, les polices embarquées sont
+    réduites aux glyphes utilisés et les images optimisées.
+    """
+
+    nom = "weasyprint"
+    FEUILLE_DE_STYLE = "css/facture_pdf.css"
+
+    def __init__(self):
+        self._css = None
+        self._polices = None
+
+    def _charger_styles(self):
+        # Import différé : WeasyPrint nécessite Pango sur le système
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+
+        self._polices = FontConfiguration()
+        self._css = CSS(
+            filename=finders.find(self.FEUILLE_DE_STYLE),
+            font_config=self._polices,
+        )
+
+    def rendre(self, facture, flux, gabarit):
+        from weasyprint import HTML
+
+        compact = settings.PDF_COMPACT
+
+        if self._css is None:
+            self._charger_styles()
+        montant_ht, tva = calculer_totaux(facture)
+        html = render_to_string(
+            "factures/facture_pdf.html",
+            {
+                "facture": facture,
+                "societe": gabarit.societe,
+                "montant_ht": montant_ht,
+                "tva": tva,
+                "taux_tva": int(TAUX_TVA * 100),
+            },
+        )
+        HTML(string=html).write_pdf(
+            flux,
+            stylesheets=[self._css],
+            font_config=self._polices,
+            uncompressed_pdf=not compact,
+            full_fonts=not compact,
+            hinting=not compact,
+            optimize_images=compact,
+        )
+
+
+MOTEURS = {moteur.nom: moteur for moteur in [MoteurReportLab, MoteurWeasyPrint]}
+_instances = {}
+
+
+def get_moteur(nom=None):
+    """
+    Retourne l'instance (une par processus) du moteur `nom`, par défaut
+    celui de la configuration (PDF_MOTEUR)
+    """
+    nom = nom or settings.PDF_MOTEUR
+    if nom not in MOTEURS:
+        raise ValueError(f"Moteur PDF inconnu : {nom}")
+    if nom not in _instances:
+        _instances[nom] = MOTEURS[nom]()
+    return _instances[nom]
@@ -0,0 +1,506 @@
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.urls import reverse
+from django.utils import timezone
+
+from clients.models import Client
+from mini_crm.exports import iter_projection
+from mini_crm.recherche import filtrer_par_recherche, indexer_queryset
+
+from .models import (
+    ChiffreAffairesMensuel,
+    EcheancierFacturation,
+    Facture,
+    ajouter_mois,
+    totaux_clients_calcules,
+)
+from .utils import (
+    facture_fingerprint,
+    facture_pdf_name,
+    generate_facture_pdf,
+    get_facture_pdf,
+    get_gabarit,
+    get_pdf_storage,
+)
+
+
+def filtrer_factures(mois=None, client_id=None, statut=None):
+    """
+    Sélectionne les factures à traiter.
+    `mois` est une chaîne AAAA-MM filtrée sur la date d'émission.
+    """
+    factures = Facture.objects.all()
+    if mois:
+        annee, numero_mois = (int(partie) for partie in mois.split("-"))
+        factures = factures.filter(
+            date_emission__year=annee, date_emission__month=numero_mois
+        )
+    if client_id:
+        factures = factures.filter(client_id=client_id)
+    if statut:
+        factures = factures.filter(statut_paiement=statut)
+    return factures.order_by("id")
+
+
+def filtrer_liste_factures(params, factures=None):
+    """
+    Applique les filtres de la liste des factures (recherche, client, statut,
+    dates) lus dans `params` (request.GET ou dictionnaire)
+    """
+    if factures is None:
+        factures = Facture.objects.all()
+
+    # Récupération des paramètres de filtrage
+    search_query = params.get("q", "").strip()
+    client_id = params.get("client", "").strip()
+    projet_id = params.get("projet", "").strip()
+    statut = params.get("statut", "").strip()
+    date_debut = params.get("date_debut", "").strip()
+    date_fin = params.get("date_fin", "").strip()
+
+    # Filtrage par recherche textuelle
+    if search_query:
+        factures = filtrer_par_recherche(factures, search_query)
+
+    # Filtrage par client
+    if client_id:
+        factures = factures.filter(client_id=client_id)
+    if projet_id:
+        factures = factures.filter(projet_id=projet_id)
+
+    # Filtrage par statut
+    if statut:
+        factures = factures.filter(statut_paiement=statut)
+
+    # Filtrage par date
+    if date_debut:
+        factures = factures.filter(date_emission__gte=date_debut)
+    if date_fin:
+        factures = factures.filter(date_emission__lte=date_fin)
+
+    return factures
+
+
+def document_recherche_facture(facture):
+    """Document de recherche d'une facture : (titre, contenu, lien)"""
+    return (
+        facture.numero,
+        f"{facture.client.nom} {facture.projet.titre} {facture.notes}",
+        reverse("factures:facture_detail", args=[facture.pk]),
+    )
+
+
+EXPORT_CSV_ENTETE = [
+    "Numéro",
+    "Client",
+    "Projet",
+    "Montant",
+    "Date d'émission",
+    "Date d'échéance",
+    "Statut",
+]
+
+
+def lignes_csv_factures(factures):
+    """
+    Lignes de l'export CSV des factures, client et projet joints en SQL
+    """
+    statuts = dict(Facture.STATUT_CHOICES)
+    champs = [
+        "numero",
+        "client__nom",
+        "projet__titre",
+        "montant",
+        "date_emission",
+        "date_echeance",
+        "statut_paiement",
+    ]
+    for numero, client, projet, montant, emission, echeance, statut in iter_projection(
+        factures, champs
+    ):
+        yield [
+            numero,
+            client,
+            projet,
+            montant,
+            emission.strftime("%d/%m/%Y"),
+            echeance.strftime("%d/%m/%Y") if echeance else "-",
+            statuts.get(statut, statut),
+        ]
+
+
+def _lignes_pdf_factures(factures):
+    for ligne in lignes_csv_factures(factures):
+        ligne[3] = f"{ligne[3]} €"
+        yield ligne
+
+
+def export_liste_factures(params):
+    """
+    Export de la liste des factures filtrée par `params`.
+    `params["api"]` reprend une sélection de l'API (paramètres GET de la
+    liste), bornée aux factures existant lors de la demande (`pk_max`).
+    """
+    if "api" in params:
+        from api.views.facture_views import factures_filtrees_api
+
+        factures = factures_filtrees_api(params["api"]).filter(
+            pk__lte=params.get("pk_max") or 0
+        )
+    else:
+        factures = filtrer_liste_factures(params).order_by("id")
+    return {
+        "nom": "factures",
+        "titre": "Liste des factures",
+        "entete": EXPORT_CSV_ENTETE,
+        "queryset": factures,
+        "lignes": _lignes_pdf_factures,
+        "largeurs": [3.5, 5, 6, 3, 3, 3, 3],
+    }
+
+
+def rendre_lot_pdf(ids, forcer=False):
+    """
+    Rend les PDF d'un lot de factures.
+    Les factures, clients et projets du lot sont chargés en une seule requête.
+    """
+    factures = Facture.objects.select_related("client", "projet").filter(id__in=ids)
+    gabarit = get_gabarit()
+    storage = get_pdf_storage()
+    resultats = []
+    for facture in factures:
+        debut = time.perf_counter()
+        resultat = {"id": facture.id, "numero": facture.numero}
+        try:
+            empreinte = facture_fingerprint(facture, gabarit.societe)
+            nom = facture_pdf_name(facture, empreinte)
+            resultat["cache"] = storage.exists(nom) and not forcer
+            if forcer:
+                nom, taille = generate_facture_pdf(facture, nom, gabarit=gabarit)
+            else:
+                nom, empreinte = get_facture_pdf(facture, gabarit)
+                taille = storage.size(nom)
+            resultat.update(
+                {
+                    "statut": "ok",
+                    "fichier": nom,
+                    "empreinte": empreinte,
+                    "taille": taille,
+                }
+            )
+        except Exception as e:
+            resultat.update({"statut": "erreur", "erreur": str(e)})
+        resultat["duree_ms"] = round((time.perf_counter() - debut) * 1000, 2)
+        resultats.append(resultat)
+    return resultats
+
+
+def _executer_par_lots(fonction, lots, workers=None, *arguments):
+    """
+    Applique `fonction(lot, *arguments)` à chaque lot, réparti sur un pool
+    de `workers` processus (par défaut un par cœur). Retourne (résultats
+    dans l'ordre des lots, nombre de processus).
+    """
+    workers = workers or os.cpu_count() or 1
+
+    # Sans fork (Windows), les processus fils n'ont pas Django initialisé
+    if "fork" not in multiprocessing.get_all_start_methods():
+        workers = 1
+
+    if workers == 1 or len(lots) <= 1:
+        return [fonction(lot, *arguments) for lot in lots], workers
+
+    # Les processus forkés ne doivent pas hériter des connexions ouvertes
+    connections.close_all()
+    contexte = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexte) as pool:
+        iterables = [[argument] * len(lots) for argument in arguments]
+        return list(pool.map(fonction, lots, *iterables)), workers
+
+
+def generer_pdfs_en_masse(factures, workers=None, taille_lot=100, forcer=False):
+    """
+    Rend les PDF d'un ensemble de factures réparti sur un pool de processus.
+    Retourne le manifeste de l'exécution (fichiers produits et durées).
+    """
+    debut = time.perf_counter()
+    ids = list(factures.values_list("id", flat=True))
+    lots = [ids[i : i + taille_lot] for i in range(0, len(ids), taille_lot)]
+    resultats_lots, workers = _executer_par_lots(rendre_lot_pdf, lots, workers, forcer)
+    resultats = [resultat for lot in resultats_lots for resultat in lot]
+
+    return {
+        "genere_le": timezone.now().isoformat(),
+        "workers": workers,
+        "taille_lot": taille_lot,
+        "total": len(resultats),
+        "erreurs": sum(1 for r in resultats if r["statut"] == "erreur"),
+        "depuis_cache": sum(1 for r in resultats if r.get("cache")),
+        "taille_totale": sum(r.get("taille", 0) for r in resultats),
+        "duree_totale_s": round(time.perf_counter() - debut, 3),
+        "factures": resultats,
+    }
+
+
+def ecrire_manifeste(manifeste, chemin=None):
+    """
+    Écrit le manifeste JSON et retourne son chemin
+    """
+    if chemin is None:
+        dossier = os.path.join(settings.MEDIA_ROOT, "pdf", "manifestes")
+        os.makedirs(dossier, exist_ok=True)
+        horodatage = timezone.now().strftime("%Y%m%d_%H%M%S")
+        chemin = os.path.join(dossier, f"manifeste_{horodatage}.json")
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+    return chemin
+
+
+def nettoyer_pdfs_orphelins(age_temporaires=3600, taille_lot=500):
+    """
+    Supprime du stockage les PDF des factures qui n'existent plus, ceux de
+    l'ancien emplacement non réparti, et les fichiers temporaires abandonnés
+    depuis plus de `age_temporaires` secondes.
+    Retourne le nombre de fichiers supprimés.
+    """
+    storage = get_pdf_storage()
+    limite = timezone.now() - timedelta(seconds=age_temporaires)
+    supprimes = 0
+    pdfs = {}
+
+    try:
+        niveau_1, fichiers_racine = storage.listdir("pdf")
+    except FileNotFoundError:
+        return 0
+    # PDF de l'ancien emplacement à plat (pdf/facture_<id>*.pdf)
+    for fichier in fichiers_racine:
+        if re.fullmatch(r"facture_\d+(_[0-9a-f]+)?\.pdf", fichier):
+            storage.delete(f"pdf/{fichier}")
+            supprimes += 1
+    for d1 in niveau_1:
+        # Seuls les dossiers de répartition (pdf/ab/cd/) contiennent des PDF
+        if not re.fullmatch(r"[0-9a-f]{2}", d1):
+            continue
+        for d2 in storage.listdir(f"pdf/{d1}")[0]:
+            dossier = f"pdf/{d1}/{d2}"
+            for fichier in storage.listdir(dossier)[1]:
+                nom = f"{dossier}/{fichier}"
+                correspondance = re.fullmatch(r"facture_(\d+)_[0-9a-f]+\.pdf", fichier)
+                if correspondance:
+                    pdfs.setdefault(int(correspondance.group(1)), []).append(nom)
+                elif (
+                    fichier.endswith(".tmp") and storage.get_modified_time(nom) < limite
+                ):
+                    storage.delete(nom)
+                    supprimes += 1
+
+    ids = list(pdfs)
+    for i in range(0, len(ids), taille_lot):
+        lot = ids[i : i + taille_lot]
+        existants = set(
+            Facture.objects.filter(id__in=lot).values_list("id", flat=True)
+        )
+        for facture_id in lot:
+            if facture_id not in existants:
+                for nom in pdfs[facture_id]:
+                    storage.delete(nom)
+                    supprimes += 1
+    return supprimes
+
+
+def _facturer_lot(ids, jour):
+    """
+    Émet, dans une transaction, les factures échues des échéanciers `ids`.
+    Les numéros sont réservés en une fois pour tout le lot.
+    """
+    echeanciers = list(
+        EcheancierFacturation.objects.select_for_update()
+        .select_related("projet")
+        .filter(id__in=ids, actif=True, prochaine_echeance__lte=jour)
+        .order_by("id")
+    )
+    a_facturer = []
+    for echeancier in echeanciers:
+        # Échéanciers créés en lot (sans save) : la prochaine échéance sert d'ancre
+        echeancier.premiere_echeance = (
+            echeancier.premiere_echeance or echeancier.prochaine_echeance
+        )
+        echeances, suivante = echeancier.echeances_dues(jour)
+        a_facturer.extend((echeancier, echeance) for echeance in echeances)
+        if echeances:
+            echeancier.derniere_facture_le = echeances[-1]
+        echeancier.prochaine_echeance = suivante
+        # Échéancier arrivé à son terme
+        if echeancier.date_fin and suivante > echeancier.date_fin:
+            echeancier.actif = False
+    if not a_facturer:
+        return []
+
+    numeros = Facture.allouer_numeros(len(a_facturer), annee=jour.year)
+    factures = Facture.objects.bulk_create(
+        [
+            echeancier.facture_pour(echeance, numero)
+            for (echeancier, echeance), numero in zip(a_facturer, numeros)
+        ]
+    )
+    EcheancierFacturation.objects.bulk_update(
+        echeanciers,
+        ["premiere_echeance", "prochaine_echeance", "derniere_facture_le", "actif"],
+    )
+    ids = [facture.id for facture in factures]
+    # bulk_create n'émet pas post_save : indexation du lot pour la recherche,
+    # report dans le chiffre d'affaires mensuel et totaux des clients facturés
+    # (recalculés en un UPDATE plutôt qu'un par client)
+    indexer_queryset("facture", Facture.objects.filter(id__in=ids))
+    ChiffreAffairesMensuel.appliquer(
+        [facture.etat_chiffre_affaires() for facture in factures]
+    )
+    recalculer_lot_totaux_clients({facture.client_id for facture in factures})
+    return ids
+
+
+def generer_factures_recurrentes(jour=None, taille_lot=500):
+    """
+    Émet les factures de tous les échéanciers arrivés à échéance au `jour`
+    (aujourd'hui par défaut), échéances manquées comprises.
+
+    Les échéanciers sont traités par lots de `taille_lot` : une transaction,
+    une réservation de numéros, un INSERT groupé par lot. Le pré-rendu des
+    PDF et les notifications sont planifiés par lot après validation.
+    """
+    from .tasks import planifier_suites_facturation
+
+    debut = time.perf_counter()
+    jour = jour or timezone.now().date()
+    ids = list(
+        EcheancierFacturation.objects.filter(actif=True, prochaine_echeance__lte=jour)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    total, lots = 0, 0
+    for i in range(0, len(ids), taille_lot):
+        with transaction.atomic():
+            factures_ids = _facturer_lot(ids[i : i + taille_lot], jour)
+            if factures_ids:
+                planifier_suites_facturation(factures_ids)
+        total += len(factures_ids)
+        lots += 1
+    if total:
+        from mini_crm.dashboard.services import DashboardMetrics
+
+        # Les INSERT groupés n'émettent pas de signaux
+        DashboardMetrics.invalider()
+    return {
+        "date": jour.isoformat(),
+        "echeanciers": len(ids),
+        "factures": total,
+        "lots": lots,
+        "duree_s": round(time.perf_counter() - debut, 3),
+    }
+
+
+def reconstruire_chiffre_affaires_mensuel():
+    """
+    Recalcule ChiffreAffairesMensuel à partir des factures (une agrégation
+    par mois et statut). Retourne le nombre de lignes.
+    """
+    lignes = (
+        Facture.objects.annotate(mois=TruncMonth("date_emission"))
+        .values("mois", "statut_paiement")
+        .annotate(
+            nb_factures=Count("id"),
+            montant=Sum("montant"),
+            nb_echeances=Count("date_echeance"),
+            duree_echeance=Sum(
+                ExpressionWrapper(
+                    F("date_echeance") - TruncDate("date_emission"),
+                    output_field=DurationField(),
+                )
+            ),
+        )
+        .order_by()
+    )
+    agregats = [
+        ChiffreAffairesMensuel(
+            mois=ligne["mois"].date(),
+            statut_paiement=ligne["statut_paiement"],
+            nb_factures=ligne["nb_factures"],
+            montant=ligne["montant"],
+            nb_echeances=ligne["nb_echeances"],
+            jours_echeance=(ligne["duree_echeance"] or timedelta()).days,
+        )
+        for ligne in lignes
+    ]
+    with transaction.atomic():
+        ChiffreAffairesMensuel.objects.all().delete()
+        ChiffreAffairesMensuel.objects.bulk_create(agregats)
+    return len(agregats)
+
+
+def serie_chiffre_affaires(debut, fin, statuts=("payée",)):
+    """
+    Série mensuelle des factures aux `statuts` du mois de `debut` au mois de
+    `fin` inclus : [{"mois", "nb_factures", "montant"}], mois sans facture
+    à zéro. Lue dans ChiffreAffairesMensuel (une ligne par mois et statut).
+    """
+    debut, fin = debut.replace(day=1), fin.replace(day=1)
+    totaux = {
+        ligne["mois"]: ligne
+        for ligne in ChiffreAffairesMensuel.objects.filter(
+            mois__gte=debut, mois__lte=fin, statut_paiement__in=statuts
+        )
+        .values("mois")
+        .annotate(nb_factures=Sum("nb_factures"), montant=Sum("montant"))
+        .order_by()
+    }
+    serie = []
+    mois = debut
+    while mois <= fin:
+        ligne = totaux.get(mois, {})
+        serie.append(
+            {
+                "mois": mois,
+                "nb_factures": ligne.get("nb_factures") or 0,
+                "montant": ligne.get("montant") or Decimal(0),
+            }
+        )
+        mois = ajouter_mois(mois, 1)
+    return serie
+
+
+def recalculer_lot_totaux_clients(ids):
+    """
+    Recalcule depuis les factures les totaux des clients `ids`, en un UPDATE
+    à sous-requêtes corrélées. Retourne le nombre de clients.
+    """
+    return Client.objects.filter(id__in=ids).update(**totaux_clients_calcules())
+
+
+def recalculer_totaux_clients(workers=None, taille_lot=1000):
+    """
+    Recalcule les totaux de factures de tous les clients (dérive des UPDATE
+    incrémentaux, modifications faites hors de l'ORM), par lots de
+    `taille_lot` clients répartis sur un pool de processus.
+    """
+    debut = time.perf_counter()
+    ids = list(Client.objects.order_by("id").values_list("id", flat=True))
+    lots = [ids[i : i + taille_lot] for i in range(0, len(ids), taille_lot)]
+    nombres, workers = _executer_par_lots(recalculer_lot_totaux_clients, lots, workers)
+
+    return {
+        "clients": sum(nombres),
+        "lots": len(lots),
+        "workers": workers,
+        "duree_s": round(time.perf_counter() - debut, 3),
+    }
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    CHAMPS_CHIFFRE_AFFAIRES,
+    CHAMPS_TOTAUX_CLIENT,
+    ChiffreAffairesMensuel,
+    Facture,
+    ajuster_totaux_client,
+)
+from societe.models import Societe
+
+from .utils import invalider_gabarit, supprimer_pdfs_facture
+
+
+@receiver(post_delete, sender=Facture)
+def supprimer_pdfs_facture_supprimee(sender, instance, **kwargs):
+    """Supprime les PDF stockés d'une facture une fois sa suppression validée"""
+    facture_id = instance.id
+    transaction.on_commit(lambda: supprimer_pdfs_facture(facture_id))
+
+
+@receiver(post_save, sender=Societe)
+@receiver(post_delete, sender=Societe)
+def invalider_gabarit_societe(sender, raw=False, **kwargs):
+    """
+    L'en-tête et le pied de page des factures reprennent la société : toute
+    modification (formulaire, admin, shell) reconstruit le gabarit
+    """
+    if not raw:
+        invalider_gabarit()
+
+
+@receiver(pre_save, sender=Facture)
+def lire_etat_enregistre(sender, instance, raw=False, **kwargs):
+    """
+    État enregistré d'une facture modifiée, relu sous verrou dans la
+    transaction de Facture.save : l'état lu au chargement de l'instance a
+    pu changer depuis, et deux modifications concurrentes ajustent ainsi
+    les agrégats l'une après l'autre
+    """
+    if raw or instance._state.adding:
+        return
+    ancienne = Facture.objects.select_for_update().filter(pk=instance.pk).first()
+    instance._etat_ca = ancienne.etat_chiffre_affaires() if ancienne else None
+    instance._etat_client = ancienne.etat_client() if ancienne else None
+
+
+@receiver(pre_delete, sender=Facture)
+def lire_etat_avant_suppression(sender, instance, **kwargs):
+    """État enregistré d'une facture supprimée, relu sous verrou"""
+    ancienne = Facture.objects.select_for_update().filter(pk=instance.pk).first()
+    if ancienne:
+        instance._etat_ca = ancienne.etat_chiffre_affaires()
+        instance._etat_client = ancienne.etat_client()
+
+
+@receiver(post_save, sender=Facture)
+def ajuster_agregats(sender, instance, created, raw=False, **kwargs):
+    """
+    Reporte la création ou la modification (statut, montant, client...) dans
+    le chiffre d'affaires mensuel et les totaux du client
+    """
+    if raw:
+        return
+    differes = (
+        CHAMPS_CHIFFRE_AFFAIRES | CHAMPS_TOTAUX_CLIENT
+    ) & instance.get_deferred_fields()
+    if differes:
+        instance.refresh_from_db(fields=list(differes))
+
+    ancien = None if created else getattr(instance, "_etat_ca", None)
+    nouveau = instance.etat_chiffre_affaires()
+    if ancien != nouveau:
+        if ancien:
+            ChiffreAffairesMensuel.appliquer([ancien], signe=-1)
+        ChiffreAffairesMensuel.appliquer([nouveau])
+    instance._etat_ca = nouveau
+
+    ancien = None if created else getattr(instance, "_etat_client", None)
+    nouveau = instance.etat_client()
+    if ancien != nouveau:
+        ajuster_totaux_client(ancien, nouveau)
+    instance._etat_client = nouveau
+
+
+@receiver(post_delete, sender=Facture)
+def retirer_agregats(sender, instance, **kwargs):
+    etat = getattr(instance, "_etat_ca", None) or instance.etat_chiffre_affaires()
+    if etat:
+        ChiffreAffairesMensuel.appliquer([etat], signe=-1)
+    etat = getattr(instance, "_etat_client", None) or instance.etat_client()
+    if etat:
+        ajuster_totaux_client(etat, None)
@@ -1,7 +1,95 @@
-from django.utils import timezone
+from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
+import logging
 from .models import Facture
+from .utils import get_facture_pdf
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generer_pdf_facture(facture_id):
+    """Pré-rend le PDF d'une facture pour que le téléchargement soit immédiat"""
+    facture = (
+        Facture.objects.select_related("client", "projet").filter(pk=facture_id).first()
+    )
+    if facture is None:
+        return None
+    nom, _ = get_facture_pdf(facture)
+    return nom
+
+
+@shared_task
+def nettoyer_pdfs_orphelins():
+    """Tâche planifiée : supprime les PDF des factures supprimées"""
+    from .services import nettoyer_pdfs_orphelins as nettoyer
+
+    return nettoyer()
+
+
+def planifier_pdf_facture(facture):
+    """
+    Planifie le pré-rendu du PDF une fois la transaction validée
+    """
+    if not settings.PDF_PRERENDU:
+        return
+
+    def envoyer():
+        # Sans nouvelle tentative : un broker indisponible ne doit pas
+        # retarder l'enregistrement de la facture
+        try:
+            generer_pdf_facture.apply_async((facture.id,), retry=False)
+        except Exception as e:
+            logger.warning(f"Pré-rendu du PDF {facture.numero} non planifié : {e}")
+
+    transaction.on_commit(envoyer)
+
+
+@shared_task
+def generer_pdfs_lot(ids):
+    """Pré-rend les PDF d'un lot de factures (facturation récurrente)"""
+    from .services import rendre_lot_pdf
+
+    return len(rendre_lot_pdf(ids))
+
+
+@shared_task
+def notifier_factures_creees(ids):
+    """Notifie l'équipe des factures créées en lot"""
+    from notifications.services import NotificationService
+
+    return NotificationService.notifier_creations(
+        Facture.objects.filter(id__in=ids).order_by("id")
+    )
+
+
+@shared_task
+def facturer_echeanciers():
+    """Tâche planifiée : émet les factures récurrentes arrivées à échéance"""
+    from .services import generer_factures_recurrentes
+
+    return generer_factures_recurrentes(taille_lot=settings.FACTURATION_TAILLE_LOT)
+
+
+def planifier_suites_facturation(ids):
+    """
+    Planifie, une fois la transaction validée, le pré-rendu des PDF et les
+    notifications d'un lot de factures créées en masse
+    """
+
+    def envoyer():
+        try:
+            if settings.PDF_PRERENDU:
+                generer_pdfs_lot.apply_async((ids,), retry=False)
+            notifier_factures_creees.apply_async((ids,), retry=False)
+        except Exception as e:
+            logger.warning(
+                f"Suites de la facturation de {len(ids)} factures non planifiées : {e}"
+            )
+
+    transaction.on_commit(envoyer)
 
 
 def relancer_factures_en_retard():
@@ -12,9 +100,7 @@ def relancer_factures_en_retard():
     - Sa date d'échéance est dépassée
     """
     # Récupérer toutes les factures en retard
-    factures_en_retard = Facture.objects.filter(
-        statut_paiement="envoyée", date_echeance__lt=timezone.now().date()
-    )
+    factures_en_retard = Facture.objects.en_retard()
 
     for facture in factures_en_retard:
         # Mettre à jour le statut de la facture
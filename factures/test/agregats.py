@@ -0,0 +1,69 @@
+from datetime import date
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import Facture
+from projets.models import Projet
+
+
+class AgregatsFactureMixin:
+    """
+    Tests communs aux agrégats tenus à jour par les signaux de Facture.
+    La classe de test définit `etat()` (agrégat enregistré), `recalculer()`
+    (recalcul complet) et la commande de recalcul `commande`.
+    """
+
+    commande = None
+    options_commande = {}
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(nom="Client", email="c@example.com")
+        self.autre = Client.objects.create(nom="Autre", email="a@example.com")
+        self.projet = Projet.objects.create(
+            titre="Projet", client=self.client_obj, date_debut=date(2025, 1, 1)
+        )
+        self.mois = timezone.localdate().replace(day=1)
+
+    def creer(self, montant, statut="envoyée", client=None, **kwargs):
+        return Facture.objects.create(
+            client=client or self.client_obj,
+            projet=self.projet,
+            montant=montant,
+            statut_paiement=statut,
+            **kwargs,
+        )
+
+    def assertAgregatCoherent(self):
+        """L'agrégat incrémental est celui que donne un recalcul complet"""
+        incremental = self.etat()
+        self.recalculer()
+        self.assertEqual(incremental, self.etat())
+
+    def test_modifications_concurrentes(self):
+        """Une instance chargée avant une autre modification ne fausse rien"""
+        facture = self.creer(100)
+        premiere = Facture.objects.get(pk=facture.pk)
+        seconde = Facture.objects.get(pk=facture.pk)
+        premiere.montant = 80
+        premiere.client = self.autre
+        premiere.save()
+        seconde.statut_paiement = "payée"
+        seconde.save()
+
+        self.assertAgregatCoherent()
+
+    def test_commande_de_recalcul(self):
+        """La commande rétablit l'agrégat après des UPDATE sans signaux"""
+        facture = self.creer(100)
+        self.creer(40, statut="payée", client=self.autre)
+        incremental = self.etat()
+
+        Facture.objects.filter(pk=facture.pk).update(statut_paiement="payée")
+        call_command(self.commande, verbosity=0, **self.options_commande)
+        self.assertNotEqual(self.etat(), incremental)
+
+        Facture.objects.filter(pk=facture.pk).update(statut_paiement="envoyée")
+        call_command(self.commande, verbosity=0, **self.options_commande)
+        self.assertEqual(self.etat(), incremental)
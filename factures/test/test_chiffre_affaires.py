@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from factures.models import ChiffreAffairesMensuel, Facture
+from factures.services import (
+    reconstruire_chiffre_affaires_mensuel,
+    serie_chiffre_affaires,
+)
+
+from .agregats import AgregatsFactureMixin
+
+
+def agregat():
+    """Lignes non vides de l'agrégat : {(mois, statut): (nombre, montant, jours)}"""
+    return {
+        (ligne.mois, ligne.statut_paiement): (
+            ligne.nb_factures,
+            ligne.montant,
+            ligne.jours_echeance,
+        )
+        for ligne in ChiffreAffairesMensuel.objects.exclude(nb_factures=0)
+    }
+
+
+class ChiffreAffairesMensuelTest(AgregatsFactureMixin, TestCase):
+    commande = "recalculer_ca_mensuel"
+
+    def etat(self):
+        return agregat()
+
+    def recalculer(self):
+        reconstruire_chiffre_affaires_mensuel()
+
+    def test_creation(self):
+        self.creer(100, date_echeance=timezone.localdate() + timedelta(days=30))
+        self.creer(Decimal("50.50"))
+        self.creer(20, statut="payée")
+
+        self.assertEqual(
+            agregat(),
+            {
+                (self.mois, "envoyée"): (2, Decimal("150.50"), 30),
+                (self.mois, "payée"): (1, Decimal("20"), 0),
+            },
+        )
+        self.assertAgregatCoherent()
+
+    def test_changement_de_statut_et_de_montant(self):
+        facture = self.creer(100)
+        autre = self.creer(40)
+
+        facture.statut_paiement = "payée"
+        facture.save()
+        rechargee = Facture.objects.get(pk=autre.pk)
+        rechargee.montant = 60
+        rechargee.save()
+
+        self.assertEqual(
+            agregat(),
+            {
+                (self.mois, "envoyée"): (1, Decimal("60"), 0),
+                (self.mois, "payée"): (1, Decimal("100"), 0),
+            },
+        )
+        self.assertAgregatCoherent()
+
+    def test_enregistrement_sans_changement(self):
+        facture = self.creer(100)
+        # Relecture verrouillée, UPDATE de la facture et indexation pour la
+        # recherche dans un point de sauvegarde : agrégat inchangé
+        with self.assertNumQueries(5):
+            facture.notes = "Relance téléphonique"
+            facture.save()
+
+    def test_instance_partielle(self):
+        facture = self.creer(100)
+        partielle = Facture.objects.only("id", "notes").get(pk=facture.pk)
+        partielle.statut_paiement = "annulée"
+        partielle.save()
+
+        self.assertEqual(agregat(), {(self.mois, "annulée"): (1, Decimal("100"), 0)})
+        self.assertAgregatCoherent()
+
+    def test_suppression(self):
+        self.creer(100)
+        self.creer(30).delete()
+        Facture.objects.filter(montant=100).delete()
+
+        self.assertEqual(agregat(), {})
+        self.assertAgregatCoherent()
+
+    def test_serie_mois_calendaires_completes_par_des_zeros(self):
+        for mois, montant in [(date(2024, 11, 1), 10), (date(2025, 1, 1), 30)]:
+            ChiffreAffairesMensuel.objects.create(
+                mois=mois, statut_paiement="payée", nb_factures=1, montant=montant
+            )
+        ChiffreAffairesMensuel.objects.create(
+            mois=date(2025, 1, 1), statut_paiement="envoyée", nb_factures=1, montant=5
+        )
+
+        with self.assertNumQueries(1):
+            serie = serie_chiffre_affaires(date(2024, 10, 31), date(2025, 2, 15))
+
+        self.assertEqual(
+            [(point["mois"], point["montant"]) for point in serie],
+            [
+                (date(2024, 10, 1), Decimal(0)),
+                (date(2024, 11, 1), Decimal("10")),
+                (date(2024, 12, 1), Decimal(0)),
+                (date(2025, 1, 1), Decimal("30")),
+                (date(2025, 2, 1), Decimal(0)),
+            ],
+        )
@@ -0,0 +1,176 @@
+import io
+import shutil
+import tempfile
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client as TestClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import Facture
+from mini_crm.exports import ecrire_pdf_liste, get_export_liste
+from mini_crm.models import ExportJob
+from mini_crm.recherche import reindexer
+from notifications.models import Notification
+from projets.models import Projet
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.test_client = TestClient()
+        self.test_client.login(username="testuser", password="testpassword")
+
+    def creer_factures(self, nombre, statut="payée"):
+        debut = Facture.objects.count()
+        clients = Client.objects.bulk_create(
+            Client(nom=f"Client {i}", email=f"client{i}@example.com")
+            for i in range(debut, debut + nombre)
+        )
+        projets = Projet.objects.bulk_create(
+            Projet(titre=f"Projet {c.nom}", client=c, date_debut=timezone.now())
+            for c in clients
+        )
+        Facture.objects.bulk_create(
+            Facture(
+                numero=f"EXP-{debut + i:06d}",
+                client=c,
+                projet=p,
+                montant=Decimal("100.00") + i,
+                statut_paiement=statut,
+            )
+            for i, (c, p) in enumerate(zip(clients, projets))
+        )
+        # bulk_create n'émet pas de signaux : index de recherche reconstruit
+        reindexer(["facture"])
+
+
+
+@override_settings(EXPORT_CHUNK_SIZE=100)
+class ExportCsvStreamingTest(ExportTestCase):
+    """
+    Benchmark des exports CSV : une seule requête SQL et une mémoire qui ne
+    dépend pas du nombre de lignes exportées
+    """
+
+    def mesurer_export(self, url):
+        """Retourne (nombre de lignes, pic mémoire en octets) de l'export"""
+        response = self.test_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        tracemalloc.start()
+        try:
+            lignes = sum(bloc.count(b"\n") for bloc in response.streaming_content)
+            _, pic = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lignes, pic
+
+    def test_export_factures_une_requete(self):
+        self.creer_factures(300)
+        response = self.test_client.get(reverse("factures:export_csv"))
+        with self.assertNumQueries(1):
+            contenu = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(contenu.splitlines()), 301)
+        self.assertIn("EXP-000299,Client 299,Projet Client 299,399.00", contenu)
+        self.assertIn("Payée", contenu)
+
+    def test_export_factures_memoire_constante(self):
+        self.creer_factures(300)
+        lignes, pic_petit = self.mesurer_export(reverse("factures:export_csv"))
+        self.assertEqual(lignes, 301)
+
+        self.creer_factures(2700)
+        lignes, pic_grand = self.mesurer_export(reverse("factures:export_csv"))
+        self.assertEqual(lignes, 3001)
+        # 10 fois plus de lignes, même pic (un bloc de EXPORT_CHUNK_SIZE lignes)
+        self.assertLess(pic_grand, pic_petit * 1.5)
+
+    def test_export_clients_memoire_constante(self):
+        url = reverse("clients:client_export", args=["csv"])
+        self.creer_factures(300)
+        response = self.test_client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(b"".join(response.streaming_content).count(b"\n"), 301)
+        _, pic_petit = self.mesurer_export(url)
+
+        self.creer_factures(2700)
+        lignes, pic_grand = self.mesurer_export(url)
+        self.assertEqual(lignes, 3001)
+        self.assertLess(pic_grand, pic_petit * 1.5)
+
+
+@override_settings(EXPORT_PDF_TAILLE_BLOC=100, EXPORT_PDF_LIGNES_MAX=1000)
+class ExportPdfListeTest(ExportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_export_pdf_pagine_et_filtre(self):
+        self.creer_factures(450)
+        self.creer_factures(600, statut="envoyée")
+
+        response = self.test_client.get(
+            reverse("factures:export_pdf"), {"statut": "payée"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.streaming)
+        contenu = b"".join(response.streaming_content)
+        # 450 lignes réparties en tableaux de 100 sur plusieurs pages
+        self.assertGreater(contenu.count(b"/Type /Page\n"), 5)
+
+        # Tous les blocs sont mis en page : autant de pages qu'en un seul bloc
+        export = get_export_liste("factures", {"statut": "payée"})
+        un_bloc = io.BytesIO()
+        ecrire_pdf_liste(un_bloc, export, taille_bloc=1000)
+        self.assertEqual(
+            contenu.count(b"/Type /Page\n"), un_bloc.getvalue().count(b"/Type /Page\n")
+        )
+
+    def test_export_volumineux_en_tache_de_fond(self):
+        self.creer_factures(1200)
+        url_liste = reverse("factures:facture_list")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.test_client.get(
+                reverse("factures:export_pdf"), {"q": "EXP"}
+            )
+        self.assertRedirects(response, f"{url_liste}?q=EXP")
+
+        # Celery en mode eager : l'export est prêt et l'utilisateur notifié
+        job = ExportJob.objects.get(user=self.user)
+        self.assertEqual((job.statut, job.format, job.params), ("termine", "pdf", {"q": "EXP"}))
+        self.assertEqual((job.total_lignes, job.lignes_traitees), (1200, 1200))
+        notification = Notification.objects.get(user=self.user, type="EXPORT")
+        response = self.test_client.get(notification.lien)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+        # Un autre utilisateur n'y a pas accès
+        User.objects.create_user(username="autre", password="motdepasse")
+        self.test_client.login(username="autre", password="motdepasse")
+        self.assertEqual(self.test_client.get(notification.lien).status_code, 404)
+
+    def test_export_clients_filtre(self):
+        Client.objects.create(nom="Dupont", email="dupont@example.com", statut="actif")
+        Client.objects.create(nom="Martin", email="martin@example.com")
+        url = reverse("clients:client_export", args=["csv"])
+
+        response = self.test_client.get(url, {"statut": "actif"})
+        contenu = b"".join(response.streaming_content).decode()
+        self.assertIn("Dupont", contenu)
+        self.assertNotIn("Martin", contenu)
+
+        response = self.test_client.get(
+            reverse("clients:client_export", args=["pdf"]), {"statut": "actif"}
+        )
+        self.assertEqual(response["Content-Type"], "application/pdf")
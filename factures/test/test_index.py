@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import Facture
+from notifications.models import Notification
+from projets.models import Projet
+
+
+def plan_execution(queryset):
+    """
+    Plan d'exécution (EXPLAIN) de `queryset`. Sur PostgreSQL, les tables de
+    test sont trop petites pour que le planificateur préfère un index : le
+    parcours séquentiel est désactivé pour la transaction du test.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+class IndexFiltresFrequentsTest(TestCase):
+    """Les requêtes des chemins fréquents utilisent leur index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="staff", is_staff=True)
+        cls.client_obj = Client.objects.create(nom="Client", email="client@example.com")
+        cls.projet = Projet.objects.create(
+            titre="Projet", client=cls.client_obj, date_debut=timezone.now().date()
+        )
+
+    def assertUtiliseIndex(self, queryset, index):
+        plan = plan_execution(queryset)
+        self.assertIn(index, plan, f"Index {index} non utilisé :\n{plan}")
+
+    def test_factures_en_retard(self):
+        self.assertUtiliseIndex(
+            Facture.objects.en_retard(), "facture_statut_echeance_idx"
+        )
+
+    def test_factures_echeance_proche(self):
+        self.assertUtiliseIndex(
+            Facture.objects.echeance_proche(jours=7), "facture_statut_echeance_idx"
+        )
+
+    def test_factures_par_statut_triees_par_emission(self):
+        self.assertUtiliseIndex(
+            Facture.objects.filter(statut_paiement="payée").order_by("-date_emission"),
+            "facture_statut_emission_idx",
+        )
+
+    def test_notifications_non_lues(self):
+        self.assertUtiliseIndex(
+            Notification.objects.filter(user=self.user, lu=False),
+            "notification_non_lue_idx",
+        )
+
+    def test_notifications_utilisateur(self):
+        self.assertUtiliseIndex(
+            Notification.objects.filter(user=self.user), "notification_user_date_idx"
+        )
+
+    def test_interactions_client(self):
+        self.assertUtiliseIndex(
+            self.client_obj.interactions.all(), "interaction_client_date_idx"
+        )
+
+    def test_meilleurs_clients(self):
+        self.assertUtiliseIndex(
+            Client.objects.order_by("-total_facture", "id")[:5],
+            "client_total_facture_idx",
+        )
+
+    def test_projets_par_statut(self):
+        self.assertUtiliseIndex(
+            Projet.objects.filter(statut="en_cours"), "projet_statut_creation_idx"
+        )
+
+
+class SelectionsRelanceTest(TestCase):
+    def setUp(self):
+        client = Client.objects.create(nom="Client", email="client@example.com")
+        projet = Projet.objects.create(
+            titre="Projet", client=client, date_debut=timezone.now().date()
+        )
+        aujourd_hui = timezone.now().date()
+        self.factures = {}
+        for nom, jours, statut in [
+            ("retard", -3, "envoyée"),
+            ("proche", 5, "envoyée"),
+            ("lointaine", 30, "envoyée"),
+            ("payee", -3, "payée"),
+        ]:
+            self.factures[nom] = Facture.objects.create(
+                client=client,
+                projet=projet,
+                montant=100,
+                statut_paiement=statut,
+                date_echeance=aujourd_hui + timedelta(days=jours),
+            )
+        Facture.objects.create(client=client, projet=projet, montant=100)
+
+    def test_en_retard(self):
+        self.assertEqual(list(Facture.objects.en_retard()), [self.factures["retard"]])
+
+    def test_echeance_proche(self):
+        self.assertEqual(
+            list(Facture.objects.echeance_proche(jours=7)), [self.factures["proche"]]
+        )
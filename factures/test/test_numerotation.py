@@ -0,0 +1,117 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import Facture, SequenceFacture
+from projets.models import Projet
+
+
+def creer_factures(client_id, projet_id, nombre):
+    """Crée `nombre` factures et retourne leurs numéros (threads et processus)"""
+    try:
+        return [
+            Facture.objects.create(
+                client_id=client_id, projet_id=projet_id, montant=100
+            ).numero
+            for _ in range(nombre)
+        ]
+    finally:
+        connection.close()
+
+
+class NumerotationTestMixin:
+    def setUp(self):
+        self.annee = timezone.now().year
+        self.client_obj = Client.objects.create(
+            nom="Client de test", email="client@example.com"
+        )
+        self.projet = Projet.objects.create(
+            titre="Projet test", client=self.client_obj, date_debut=timezone.now()
+        )
+
+    def creer(self, **kwargs):
+        return Facture.objects.create(
+            client=self.client_obj, projet=self.projet, montant=100, **kwargs
+        )
+
+
+class SequenceFactureTest(NumerotationTestMixin, TestCase):
+    def test_numeros_consecutifs(self):
+        self.assertEqual(self.creer().numero, f"{self.annee}-001")
+        self.assertEqual(self.creer().numero, f"{self.annee}-002")
+
+    def test_reprise_des_numeros_existants_au_dela_de_999(self):
+        """Le compteur part du plus grand numéro existant, comparé numériquement"""
+        self.creer(numero=f"{self.annee}-999")
+        self.creer(numero=f"{self.annee}-1000")
+        self.assertEqual(self.creer().numero, f"{self.annee}-1001")
+
+    def test_allocation_par_plage(self):
+        self.creer()
+        numeros = Facture.allouer_numeros(5)
+        self.assertEqual(numeros, [f"{self.annee}-{n:03d}" for n in range(2, 7)])
+        self.assertEqual(self.creer().numero, f"{self.annee}-007")
+
+    def test_numero_rendu_si_transaction_annulee(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.creer()
+            raise RuntimeError()
+        self.assertEqual(self.creer().numero, f"{self.annee}-001")
+
+    def test_annees_independantes(self):
+        Facture.allouer_numeros(3, annee=2020)
+        self.assertEqual(Facture.allouer_numeros(1, annee=2021), ["2021-001"])
+        self.assertEqual(SequenceFacture.objects.get(annee=2020).dernier_numero, 3)
+
+
+class ConcurrenceNumerotationTest(NumerotationTestMixin, TransactionTestCase):
+    """Créations simultanées : aucun doublon, aucun trou"""
+
+    NB_PARALLELES = 4
+    NB_PAR_TACHE = 10
+
+    def verifier_numeros(self, numeros):
+        attendus = [
+            f"{self.annee}-{n:03d}"
+            for n in range(1, self.NB_PARALLELES * self.NB_PAR_TACHE + 1)
+        ]
+        self.assertEqual(sorted(numeros), attendus)
+        self.assertEqual(
+            sorted(Facture.objects.values_list("numero", flat=True)), attendus
+        )
+
+    def test_threads(self):
+        resultats = []
+
+        def tache():
+            resultats.extend(
+                creer_factures(self.client_obj.id, self.projet.id, self.NB_PAR_TACHE)
+            )
+
+        threads = [threading.Thread(target=tache) for _ in range(self.NB_PARALLELES)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.verifier_numeros(resultats)
+
+    def test_processus(self):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("fork indisponible")
+        # Les processus forkés ne doivent pas hériter des connexions ouvertes
+        connections.close_all()
+        contexte = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(self.NB_PARALLELES, mp_context=contexte) as pool:
+            lots = pool.map(
+                creer_factures,
+                [self.client_obj.id] * self.NB_PARALLELES,
+                [self.projet.id] * self.NB_PARALLELES,
+                [self.NB_PAR_TACHE] * self.NB_PARALLELES,
+            )
+            numeros = [numero for lot in lots for numero in lot]
+        self.verifier_numeros(numeros)
@@ -0,0 +1,429 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, Client as TestClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clients.models import Client
+from factures import moteurs, services, utils, verrous
+from factures.management.commands.bench_pdf import mesurer_moteur
+from factures.models import Facture
+from societe.models import Societe
+from projets.models import Projet
+
+
+def weasyprint_disponible():
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):  # bibliothèques Pango absentes
+        return False
+    return True
+
+
+class PdfTestCase(TestCase):
+    """Données communes, PDF écrits dans un MEDIA_ROOT temporaire"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.test_client = TestClient()
+        self.test_client.login(username="testuser", password="testpassword")
+
+        self.client_obj = Client.objects.create(
+            nom="Client de test", email="client@example.com"
+        )
+        self.projet = Projet.objects.create(
+            titre="Projet test",
+            client=self.client_obj,
+            date_debut=timezone.now(),
+        )
+        self.facture = Facture.objects.create(
+            numero="FACT-001",
+            client=self.client_obj,
+            projet=self.projet,
+            montant=1000.00,
+            statut_paiement="envoyée",
+        )
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+
+class FacturePdfCacheTest(PdfTestCase):
+    def test_fingerprint_change_avec_les_donnees(self):
+        """L'empreinte change quand un champ rendu change, pas autrement"""
+        empreinte = utils.facture_fingerprint(self.facture)
+        self.assertEqual(empreinte, utils.facture_fingerprint(self.facture))
+
+        self.facture.statut_paiement = "payée"
+        self.assertEqual(empreinte, utils.facture_fingerprint(self.facture))
+
+        self.facture.montant = 1500
+        self.assertNotEqual(empreinte, utils.facture_fingerprint(self.facture))
+
+    def test_pdf_en_cache_non_regenere(self):
+        """Le PDF n'est généré qu'une fois tant que la facture ne change pas"""
+        with mock.patch(
+            "factures.utils.generate_facture_pdf", wraps=utils.generate_facture_pdf
+        ) as generate:
+            nom, _ = utils.get_facture_pdf(self.facture)
+            self.assertEqual(utils.get_facture_pdf(self.facture)[0], nom)
+            self.assertEqual(generate.call_count, 1)
+        self.assertTrue(utils.get_pdf_storage().exists(nom))
+
+    def test_ancienne_version_supprimee(self):
+        """Une modification régénère le PDF et supprime l'ancienne version"""
+        ancien, _ = utils.get_facture_pdf(self.facture)
+        self.facture.montant = 2000
+        nouveau, _ = utils.get_facture_pdf(self.facture)
+        self.assertNotEqual(ancien, nouveau)
+        self.assertFalse(utils.get_pdf_storage().exists(ancien))
+        self.assertTrue(utils.get_pdf_storage().exists(nouveau))
+
+    @override_settings(PDF_X_ACCEL_REDIRECT=True)
+    def test_telechargement_delegue_a_nginx(self):
+        """En mode X-Accel-Redirect, Django ne renvoie que l'en-tête de redirection"""
+        url = reverse("factures:facture_pdf", args=[self.facture.pk])
+        response = self.test_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        nom, _ = utils.get_facture_pdf(self.facture)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/" + nom)
+        self.assertIn("attachment", response["Content-Disposition"])
+
+    def test_telechargement_etag_304(self):
+        """Le téléchargement expose un ETag et répond 304 s'il correspond"""
+        url = reverse("factures:facture_pdf", args=[self.facture.pk])
+        response = self.test_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        etag = response["ETag"]
+
+        response = self.test_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+
+class GenererPdfsCommandTest(PdfTestCase):
+    def test_commande_genere_pdfs_et_manifeste(self):
+        """La commande rend les PDF filtrés et écrit un manifeste"""
+        autre = Facture.objects.create(
+            numero="FACT-002",
+            client=self.client_obj,
+            projet=self.projet,
+            montant=500.00,
+            statut_paiement="payée",
+        )
+        manifeste_path = os.path.join(self.media_root, "manifeste.json")
+        call_command(
+            "generer_pdfs",
+            "--statut=payée",
+            "--workers=1",
+            f"--manifeste={manifeste_path}",
+            stdout=StringIO(),
+        )
+        with open(manifeste_path, encoding="utf-8") as f:
+            manifeste = json.load(f)
+
+        self.assertEqual(manifeste["total"], 1)
+        self.assertEqual(manifeste["factures"][0]["id"], autre.id)
+        self.assertEqual(manifeste["factures"][0]["statut"], "ok")
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.media_root, manifeste["factures"][0]["fichier"])
+            )
+        )
+
+    def test_lot_charge_en_une_requete(self):
+        """Un lot charge factures, clients et projets en une seule requête"""
+        # Le gabarit (et la société) est construit une fois par processus
+        utils.get_gabarit()
+        with self.assertNumQueries(1):
+            resultats = services.rendre_lot_pdf([self.facture.id])
+        self.assertEqual(resultats[0]["statut"], "ok")
+        self.assertFalse(resultats[0]["cache"])
+        self.assertTrue(services.rendre_lot_pdf([self.facture.id])[0]["cache"])
+
+
+@override_settings(PDF_PRERENDU=True)
+class PreRenduPdfTest(PdfTestCase):
+    def test_creation_planifie_le_rendu(self):
+        """La création d'une facture pré-rend son PDF après le commit"""
+        data = {
+            "client": self.client_obj.id,
+            "projet": self.projet.id,
+            "montant": 2000.00,
+            "statut_paiement": "envoyée",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.test_client.post(reverse("factures:facture_create"), data)
+        self.assertEqual(response.status_code, 302)
+        facture = Facture.objects.exclude(pk=self.facture.pk).get()
+        nom = utils.facture_pdf_name(facture, utils.facture_fingerprint(facture))
+        self.assertTrue(utils.get_pdf_storage().exists(nom))
+
+    @mock.patch(
+        "factures.tasks.generer_pdf_facture.apply_async",
+        side_effect=OSError("broker"),
+    )
+    def test_creation_sans_broker(self, apply_async):
+        """Un broker indisponible n'empêche pas l'enregistrement"""
+        data = {
+            "client": self.client_obj.id,
+            "projet": self.projet.id,
+            "montant": 100,
+            "statut_paiement": "envoyée",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.test_client.post(reverse("factures:facture_create"), data)
+        self.assertEqual(response.status_code, 302)
+        facture = Facture.objects.exclude(pk=self.facture.pk).get()
+        apply_async.assert_called_once_with((facture.id,), retry=False)
+
+    @mock.patch("factures.tasks.generer_pdf_facture.delay")
+    def test_telechargement_202_si_pdf_en_cours(self, delay):
+        """Le téléchargement répond 202 tant que le worker n'a pas rendu le PDF"""
+        url = reverse("factures:facture_pdf", args=[self.facture.pk])
+        response = self.test_client.get(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertTemplateUsed(response, "factures/facture_pdf_en_cours.html")
+        delay.assert_called_once_with(self.facture.pk)
+
+        # Pas de nouvelle demande tant que la première est en attente
+        self.assertEqual(self.test_client.get(url).status_code, 202)
+        delay.assert_called_once()
+
+        # Une fois le PDF rendu, il est servi directement
+        utils.get_facture_pdf(self.facture)
+        self.assertEqual(self.test_client.get(url).status_code, 200)
+
+    @mock.patch("factures.tasks.generer_pdf_facture.delay")
+    def test_rendu_synchrone_si_worker_absent(self, delay):
+        """Passé le délai d'attente, le PDF est rendu dans la requête"""
+        url = reverse("factures:facture_pdf", args=[self.facture.pk])
+        self.assertEqual(self.test_client.get(url).status_code, 202)
+        with override_settings(PDF_PRERENDU_DELAI=0):
+            self.assertEqual(self.test_client.get(url).status_code, 200)
+
+    @mock.patch(
+        "factures.tasks.generer_pdf_facture.delay", side_effect=OSError("broker")
+    )
+    def test_rendu_synchrone_si_broker_indisponible(self, delay):
+        """Sans broker joignable, le PDF est rendu dans la requête"""
+        url = reverse("factures:facture_pdf", args=[self.facture.pk])
+        self.assertEqual(self.test_client.get(url).status_code, 200)
+        delay.assert_called_once_with(self.facture.pk)
+
+
+class GabaritFactureTest(PdfTestCase):
+    def test_gabarit_construit_une_fois(self):
+        """Le gabarit est réutilisé d'un rendu à l'autre sans requête"""
+        gabarit = utils.get_gabarit()
+        with self.assertNumQueries(0):
+            self.assertIs(utils.get_gabarit(), gabarit)
+            utils.generate_facture_pdf(self.facture, io.BytesIO())
+
+    def test_modification_societe_invalide_le_gabarit(self):
+        """societe_edit reconstruit l'en-tête et change l'empreinte des PDF"""
+        utils.get_gabarit()
+        empreinte = utils.facture_fingerprint(self.facture)
+        data = {
+            "nom": "Ma Société",
+            "adresse": "1 rue du Port",
+            "code_postal": "44000",
+            "ville": "Nantes",
+            "telephone": "0240000000",
+            "email": "contact@ma-societe.fr",
+        }
+        response = self.test_client.post(reverse("societe_edit"), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(utils.get_gabarit().societe.nom, "Ma Société")
+        self.assertNotEqual(utils.facture_fingerprint(self.facture), empreinte)
+
+    def test_modification_hors_formulaire_invalide_le_gabarit(self):
+        """Admin ou shell : le signal de la société invalide aussi le gabarit"""
+        societe = Societe.objects.create(nom="Avant")
+        self.assertEqual(utils.get_gabarit().societe.nom, "Avant")
+        societe.nom = "Après"
+        societe.save()
+        self.assertEqual(utils.get_gabarit().societe.nom, "Après")
+
+
+class MoteursPdfTest(PdfTestCase):
+    def test_moteur_par_defaut_et_inconnu(self):
+        self.assertEqual(moteurs.get_moteur().nom, "reportlab")
+        with self.assertRaises(ValueError):
+            moteurs.get_moteur("inconnu")
+
+    def test_changement_de_moteur_change_l_empreinte(self):
+        empreinte = utils.facture_fingerprint(self.facture)
+        with override_settings(PDF_MOTEUR="weasyprint"):
+            self.assertNotEqual(empreinte, utils.facture_fingerprint(self.facture))
+
+    def test_pdf_compact_sans_effet_avec_reportlab(self):
+        """PDF_COMPACT ne concerne que WeasyPrint : rendu et empreinte inchangés"""
+        empreinte = utils.facture_fingerprint(self.facture)
+        pdf = utils.generate_facture_pdf(self.facture, io.BytesIO())[0].getvalue()
+        with override_settings(PDF_COMPACT=False):
+            self.assertEqual(empreinte, utils.facture_fingerprint(self.facture))
+            brut = utils.generate_facture_pdf(self.facture, io.BytesIO())[0]
+            self.assertEqual(len(pdf), len(brut.getvalue()))
+
+    def test_mesure_moteur(self):
+        resultat = mesurer_moteur("reportlab", 5)
+        self.assertGreater(resultat["rendus_s"], 0)
+        self.assertGreater(resultat["taille_ko"], 0)
+        self.assertLessEqual(resultat["p50_ms"], resultat["p95_ms"])
+
+    @skipUnless(weasyprint_disponible(), "WeasyPrint ou Pango non installé")
+    def test_rendu_weasyprint(self):
+        flux, _ = utils.generate_facture_pdf(
+            self.facture, io.BytesIO(), moteur="weasyprint"
+        )
+        self.assertTrue(flux.getvalue().startswith(b"%PDF"))
+
+
+class StockagePdfTest(PdfTestCase):
+    def test_nom_reparti_par_hachage(self):
+        """Les PDF sont rangés dans des sous-dossiers pdf/ab/cd/"""
+        nom, empreinte = utils.get_facture_pdf(self.facture)
+        self.assertRegex(
+            nom,
+            rf"^pdf/[0-9a-f]{{2}}/[0-9a-f]{{2}}/facture_{self.facture.id}_{empreinte[:16]}\.pdf$",
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, nom)))
+
+    def test_suppression_facture_supprime_pdf(self):
+        """Supprimer une facture supprime son PDF après le commit"""
+        nom, _ = utils.get_facture_pdf(self.facture)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.facture.delete()
+        self.assertFalse(utils.get_pdf_storage().exists(nom))
+
+    def test_nettoyage_orphelins(self):
+        """Le nettoyage supprime les PDF sans facture et garde les autres"""
+        nom, _ = utils.get_facture_pdf(self.facture)
+        orphelin = utils.get_pdf_storage().save(
+            f"{utils.facture_pdf_dir(999999)}/facture_999999_0123456789abcdef.pdf",
+            ContentFile(b"%PDF"),
+        )
+        self.assertEqual(services.nettoyer_pdfs_orphelins(), 1)
+        self.assertFalse(utils.get_pdf_storage().exists(orphelin))
+        self.assertTrue(utils.get_pdf_storage().exists(nom))
+
+
+class RenduConcurrentTest(PdfTestCase):
+    def setUp(self):
+        super().setUp()
+        self.verrous = override_settings(PDF_VERROUS_DIR=self.media_root)
+        self.verrous.enable()
+        self.addCleanup(self.verrous.disable)
+        # Charge gabarit, client et projet avant de passer aux threads
+        utils.get_gabarit()
+        self.facture.client, self.facture.projet
+
+    def test_single_flight(self):
+        """Des demandes simultanées d'une même facture ne lancent qu'un rendu"""
+        rendu_original = utils.generate_facture_pdf
+
+        def rendu_lent(*args, **kwargs):
+            time.sleep(0.2)
+            return rendu_original(*args, **kwargs)
+
+        noms = []
+        with mock.patch(
+            "factures.utils.generate_facture_pdf", side_effect=rendu_lent
+        ) as generate:
+            threads = [
+                threading.Thread(
+                    target=lambda: noms.append(
+                        utils.get_facture_pdf(self.facture)[0]
+                    )
+                )
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(len(set(noms)), 1)
+        _, fichiers = utils.get_pdf_storage().listdir(
+            utils.facture_pdf_dir(self.facture.id)
+        )
+        self.assertEqual(fichiers, [os.path.basename(noms[0])])
+
+    @override_settings(PDF_RENDUS_SIMULTANES=1, PDF_RENDU_ATTENTE=0)
+    def test_telechargement_503_si_creneaux_occupes(self):
+        """Sans créneau de rendu libre, le téléchargement répond 503"""
+        url = reverse("factures:facture_pdf", args=[self.facture.pk])
+        with verrous.creneau_rendu():
+            response = self.test_client.get(url)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.test_client.get(url).status_code, 200)
+
+
+class ExportZipTest(PdfTestCase):
+    def test_export_zip_filtre(self):
+        """Le ZIP contient les PDF des factures filtrées, produit en flux"""
+        Facture.objects.create(
+            numero="FACT-002",
+            client=self.client_obj,
+            projet=self.projet,
+            montant=500.00,
+            statut_paiement="payée",
+        )
+        response = self.test_client.get(
+            reverse("factures:export_zip"), {"statut": "envoyée"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/zip")
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.namelist(), ["facture_FACT-001.pdf"])
+        self.assertTrue(archive.read("facture_FACT-001.pdf").startswith(b"%PDF"))
+
+    @override_settings(PDF_RENDUS_SIMULTANES=1, PDF_RENDU_ATTENTE=0)
+    def test_export_zip_complet_si_creneaux_satures_en_cours_de_flux(self):
+        """Une saturation en cours de flux ne tronque pas l'archive"""
+        seconde = Facture.objects.create(
+            numero="FACT-002",
+            client=self.client_obj,
+            projet=self.projet,
+            montant=500.00,
+        )
+        morceaux = utils.iter_zip_factures([self.facture, seconde])
+        contenu = [next(morceaux)]
+        with verrous.creneau_rendu():
+            with self.assertLogs("factures.utils", "WARNING"):
+                contenu.extend(morceaux)
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(contenu)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(
+            archive.namelist(), ["facture_FACT-001.pdf", "facture_FACT-002.pdf"]
+        )
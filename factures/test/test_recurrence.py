@@ -0,0 +1,143 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import (
+    ChiffreAffairesMensuel,
+    EcheancierFacturation,
+    Facture,
+    SequenceFacture,
+    ajouter_mois,
+)
+from factures.services import generer_factures_recurrentes
+from notifications.models import Notification
+from projets.models import Projet
+
+
+class AjouterMoisTest(TestCase):
+    def test_fin_de_mois(self):
+        self.assertEqual(ajouter_mois(date(2024, 1, 31), 1), date(2024, 2, 29))
+        self.assertEqual(ajouter_mois(date(2023, 11, 30), 3), date(2024, 2, 29))
+        self.assertEqual(ajouter_mois(date(2024, 12, 15), 12), date(2025, 12, 15))
+
+
+class FacturationRecurrenteTest(TestCase):
+    def setUp(self):
+        self.jour = date(2024, 6, 1)
+        self.client_obj = Client.objects.create(
+            nom="Client de test", email="client@example.com"
+        )
+        User.objects.create_user("staff", password="x", is_staff=True)
+
+    def creer_echeanciers(self, nombre, **kwargs):
+        projets = Projet.objects.bulk_create(
+            [
+                Projet(
+                    titre=f"Projet {i}",
+                    client=self.client_obj,
+                    date_debut=timezone.now(),
+                )
+                for i in range(nombre)
+            ]
+        )
+        valeurs = {"montant": Decimal("100.00"), "prochaine_echeance": self.jour}
+        valeurs.update(kwargs)
+        return EcheancierFacturation.objects.bulk_create(
+            [EcheancierFacturation(projet=projet, **valeurs) for projet in projets]
+        )
+
+    def test_factures_emises_et_echeance_avancee(self):
+        self.creer_echeanciers(3, periodicite="trimestrielle")
+        with self.captureOnCommitCallbacks(execute=True):
+            resume = generer_factures_recurrentes(self.jour)
+
+        self.assertEqual(resume["factures"], 3)
+        self.assertEqual(
+            sorted(Facture.objects.values_list("numero", flat=True)),
+            ["2024-001", "2024-002", "2024-003"],
+        )
+        facture = Facture.objects.first()
+        self.assertEqual(facture.date_echeance, date(2024, 7, 1))
+        self.assertEqual(facture.statut_paiement, "envoyée")
+        echeancier = EcheancierFacturation.objects.first()
+        self.assertEqual(echeancier.prochaine_echeance, date(2024, 9, 1))
+        self.assertEqual(echeancier.derniere_facture_le, self.jour)
+        self.assertEqual(Notification.objects.filter(type="CREATION").count(), 3)
+
+        # Deuxième passage le même jour : rien à facturer
+        self.assertEqual(generer_factures_recurrentes(self.jour)["factures"], 0)
+
+    def test_rattrapage_et_fin_d_echeancier(self):
+        self.creer_echeanciers(
+            1, prochaine_echeance=date(2024, 3, 1), date_fin=date(2024, 5, 1)
+        )
+        resume = generer_factures_recurrentes(self.jour)
+
+        # Mars, avril et mai
+        self.assertEqual(resume["factures"], 3)
+        echeancier = EcheancierFacturation.objects.get()
+        self.assertFalse(echeancier.actif)
+        self.assertEqual(echeancier.derniere_facture_le, date(2024, 5, 1))
+
+    def test_fin_de_mois_conservee(self):
+        self.creer_echeanciers(1, prochaine_echeance=date(2024, 1, 31))
+        generer_factures_recurrentes(self.jour)
+
+        self.assertEqual(
+            sorted(Facture.objects.values_list("date_echeance", flat=True)),
+            [
+                date(2024, 3, 1),
+                date(2024, 3, 30),
+                date(2024, 4, 30),
+                date(2024, 5, 30),
+                date(2024, 6, 30),
+            ],
+        )
+        echeancier = EcheancierFacturation.objects.get()
+        self.assertEqual(echeancier.derniere_facture_le, date(2024, 5, 31))
+        self.assertEqual(echeancier.prochaine_echeance, date(2024, 6, 30))
+
+        # Passage suivant : l'échéance de juin (30) ne décale pas juillet
+        generer_factures_recurrentes(date(2024, 7, 31))
+        echeancier.refresh_from_db()
+        self.assertEqual(echeancier.derniere_facture_le, date(2024, 7, 31))
+        self.assertEqual(echeancier.prochaine_echeance, date(2024, 8, 31))
+
+    def test_echeanciers_non_echus_ou_inactifs_ignores(self):
+        self.creer_echeanciers(1, prochaine_echeance=date(2024, 6, 2))
+        self.creer_echeanciers(1, actif=False)
+        self.assertEqual(generer_factures_recurrentes(self.jour)["factures"], 0)
+        self.assertFalse(Facture.objects.exists())
+
+    def test_requetes_constantes_par_lot(self):
+        """Le nombre de requêtes dépend du nombre de lots, pas d'échéanciers"""
+        SequenceFacture.objects.create(annee=2024)
+        ChiffreAffairesMensuel.objects.create(
+            mois=timezone.localdate().replace(day=1), statut_paiement="envoyée"
+        )
+        self.creer_echeanciers(10)
+        with CaptureQueriesContext(connection) as dix:
+            generer_factures_recurrentes(self.jour, taille_lot=5)
+
+        # Deux lots dans les deux cas, quatre fois plus d'échéanciers
+        EcheancierFacturation.objects.update(
+            premiere_echeance=self.jour, prochaine_echeance=self.jour
+        )
+        self.creer_echeanciers(30)
+        with CaptureQueriesContext(connection) as quarante:
+            generer_factures_recurrentes(self.jour, taille_lot=20)
+
+        self.assertEqual(len(quarante), len(dix))
+        self.assertEqual(Facture.objects.count(), 50)
+
+    def test_commande(self):
+        self.creer_echeanciers(2)
+        call_command("facturer_recurrent", "--date", "2024-06-01", verbosity=0)
+        self.assertEqual(Facture.objects.count(), 2)
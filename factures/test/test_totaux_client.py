@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from clients.models import Client
+from factures.models import Facture
+from factures.services import recalculer_totaux_clients
+
+from .agregats import AgregatsFactureMixin
+
+CHAMPS = [
+    "nb_factures",
+    "total_facture",
+    "total_paye",
+    "encours",
+    "derniere_facture_le",
+]
+
+
+def totaux(client):
+    """Totaux enregistrés du client : (nombre, facturé, payé, encours, dernière)"""
+    return tuple(Client.objects.values_list(*CHAMPS).get(pk=client.pk))
+
+
+class TotauxClientTest(AgregatsFactureMixin, TestCase):
+    commande = "recalculer_totaux_clients"
+    options_commande = {"workers": 1, "taille_lot": 1}
+
+    def etat(self):
+        return [totaux(self.client_obj), totaux(self.autre)]
+
+    def recalculer(self):
+        recalculer_totaux_clients(workers=1)
+
+    def test_creation(self):
+        self.creer(100)
+        self.creer(Decimal("50.50"), statut="payée")
+        derniere = self.creer(20, statut="en_retard")
+        self.creer(999, statut="brouillon")
+
+        self.assertEqual(
+            totaux(self.client_obj),
+            (
+                3,
+                Decimal("170.50"),
+                Decimal("50.50"),
+                Decimal("120"),
+                derniere.date_emission,
+            ),
+        )
+        self.assertAgregatCoherent()
+
+    def test_changement_de_statut_et_de_montant(self):
+        facture = self.creer(100)
+        facture.statut_paiement = "payée"
+        facture.save()
+        self.assertEqual(totaux(self.client_obj)[:4], (1, 100, 100, 0))
+
+        facture.montant = 80
+        facture.save()
+        self.assertEqual(totaux(self.client_obj)[:4], (1, 80, 80, 0))
+
+        facture.statut_paiement = "annulée"
+        facture.save()
+        self.assertEqual(totaux(self.client_obj), (0, 0, 0, 0, None))
+        self.assertAgregatCoherent()
+
+    def test_changement_de_client(self):
+        facture = self.creer(100)
+        partielle = Facture.objects.only("id", "notes").get(pk=facture.pk)
+        partielle.client = self.autre
+        partielle.save()
+
+        self.assertEqual(totaux(self.client_obj), (0, 0, 0, 0, None))
+        self.assertEqual(totaux(self.autre), (1, 100, 0, 100, facture.date_emission))
+        self.assertAgregatCoherent()
+
+    def test_suppression_de_la_derniere_facture(self):
+        premiere = self.creer(100)
+        self.creer(30).delete()
+
+        self.assertEqual(
+            totaux(self.client_obj), (1, 100, 0, 100, premiere.date_emission)
+        )
+        self.assertAgregatCoherent()
+
+    def test_enregistrement_du_client_sans_ecraser_les_totaux(self):
+        client = Client.objects.get(pk=self.client_obj.pk)
+        self.creer(100)
+        client.telephone = "0102030405"
+        client.save()
+
+        self.assertEqual(totaux(self.client_obj)[:2], (1, 100))
@@ -59,4 +59,68 @@ class FactureViewTest(TestCase):
         }
         response = self.test_client.post(reverse("factures:facture_create"), data)
         self.assertEqual(response.status_code, 302)  # Redirection après création
-        self.assertTrue(Facture.objects.filter(numero="FACT-002").exists())
+        # Numéro attribué par le compteur annuel
+        numero = f"{timezone.now().year}-001"
+        self.assertTrue(Facture.objects.filter(numero=numero).exists())
+
+
+class FactureListPaginationTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="testuser", password="testpassword")
+        self.client.login(username="testuser", password="testpassword")
+        client_obj = Client.objects.create(nom="Client de test")
+        projet = Projet.objects.create(
+            titre="Projet test", client=client_obj, date_debut=timezone.now()
+        )
+        Facture.objects.bulk_create(
+            [
+                Facture(
+                    numero=f"F-{i:03d}", client=client_obj, projet=projet, montant=100
+                )
+                for i in range(25)
+            ]
+        )
+        # Dates en partie identiques : l'id départage
+        for facture in Facture.objects.all():
+            Facture.objects.filter(pk=facture.pk).update(
+                date_emission=timezone.now() - timezone.timedelta(days=facture.pk // 3)
+            )
+        self.url = reverse("factures:facture_list")
+
+    def numeros(self, response):
+        return [facture.numero for facture in response.context["factures"]]
+
+    def test_parcours_complet_sans_doublon(self):
+        attendus = list(
+            Facture.objects.order_by("-date_emission", "-id").values_list(
+                "numero", flat=True
+            )
+        )
+        vus, url = [], self.url
+        while url:
+            response = self.client.get(url)
+            vus.extend(self.numeros(response))
+            lien = response.context["page_obj"].liens.get("apres")
+            url = f"{self.url}{lien}" if lien else None
+        self.assertEqual(vus, attendus)
+
+    def test_page_precedente(self):
+        page1 = self.client.get(self.url)
+        page2 = self.client.get(self.url + page1.context["page_obj"].liens["apres"])
+        retour = self.client.get(self.url + page2.context["page_obj"].liens["avant"])
+        self.assertEqual(self.numeros(retour), self.numeros(page1))
+        self.assertFalse(retour.context["page_obj"].has_previous)
+
+    def test_requetes_constantes_quelle_que_soit_la_page(self):
+        self.client.get(self.url)  # menu des clients mis en cache
+        with self.assertNumQueries(4):
+            page = self.client.get(self.url + "?statut=envoyée")
+        page = self.client.get(self.url + page.context["page_obj"].liens["apres"])
+        with self.assertNumQueries(4):
+            self.client.get(self.url + page.context["page_obj"].liens["apres"])
+
+    def test_parametres_invalides(self):
+        for parametres in ["?page=abc", "?apres=abc", "?avant=%%%"]:
+            response = self.client.get(self.url + parametres)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(self.numeros(response)), 10)
@@ -1,52 +1,57 @@
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
 from reportlab.platypus import (
-    SimpleDocTemplate,
     Table,
     TableStyle,
     Paragraph,
     Spacer,
-    Image,
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import cm
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from contextlib import nullcontext
+import copy
+import hashlib
+import io
+import json
+import logging
 import os
+import threading
+import time
+import zipfile
+from urllib.parse import quote
 from societe.models import Societe
+from .moteurs import TAUX_TVA, calculer_totaux, get_moteur
+from .verrous import RenduPdfSature, creneau_rendu, verrou_facture
 
+logger = logging.getLogger(__name__)
 
-def generate_facture_pdf(facture):
-    # Crée le dossier si besoin
-    pdf_dir = os.path.join(settings.MEDIA_ROOT, "pdf")
-    os.makedirs(pdf_dir, exist_ok=True)
+# A incrémenter à chaque modification de la mise en page : invalide le cache PDF
+PDF_LAYOUT_VERSION = 1
 
-    # Chemin du fichier PDF
-    filename = f"facture_{facture.id}.pdf"
-    file_path = os.path.join(pdf_dir, filename)
+# Champs de la société repris dans l'en-tête et le pied de page
+SOCIETE_CHAMPS = [
+    "nom",
+    "adresse",
+    "code_postal",
+    "ville",
+    "telephone",
+    "email",
+    "siret",
+    "tva",
+    "iban",
+    "bic",
+]
 
-    # Crée le document PDF
-    doc = SimpleDocTemplate(
-        file_path,
-        pagesize=A4,
-        rightMargin=2 * cm,
-        leftMargin=2 * cm,
-        topMargin=1.5 * cm,
-        bottomMargin=1.5 * cm,
-    )
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=24,
-        spaceAfter=30,
-    )
-
-    # Contenu
-    elements = []
 
-    # En-tête entreprise/client
+def get_societe():
+    """
+    Retourne la société émettrice, ou des valeurs par défaut si elle n'existe pas
+    """
     societe = Societe.objects.first()
     if not societe:
         # Valeurs par défaut si jamais
@@ -66,22 +71,281 @@ def generate_facture_pdf(facture):
                 "bic": "",
             },
         )()
-    header_data = [
-        [
-            Paragraph(
-                f"<b>{societe.nom}</b><br/>{societe.adresse}<br/>{societe.code_postal} {societe.ville}<br/>"
-                f"Tél : {societe.telephone}<br/>{societe.email}",
-                styles["Normal"],
-            ),
-            Paragraph(
-                f"<b>{facture.client.nom}</b><br/>{facture.client.adresse}<br/>{facture.client.email}",
-                styles["Normal"],
-            ),
-        ]
+    return societe
+
+
+def facture_fingerprint(facture, societe=None):
+    """
+    Empreinte SHA-256 des données utilisées par le rendu PDF d'une facture.
+    Deux factures de même empreinte produisent le même document.
+    """
+    if societe is None:
+        societe = get_gabarit().societe
+    client = facture.client
+    donnees = [
+        PDF_LAYOUT_VERSION,
+        settings.PDF_MOTEUR,
+        settings.PDF_MOTEUR == "weasyprint" and settings.PDF_COMPACT,
+        facture.id,
+        facture.numero,
+        facture.date_emission.isoformat(),
+        f"{facture.montant:.2f}",
+        client.id,
+        client.nom,
+        client.adresse,
+        client.email,
+        facture.projet.titre,
+        [getattr(societe, champ) for champ in SOCIETE_CHAMPS],
     ]
-    header_table = Table(header_data, colWidths=[8 * cm, 8 * cm])
-    header_table.setStyle(
-        TableStyle(
+    contenu = json.dumps(donnees, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+def get_pdf_storage():
+    """
+    Stockage des PDF générés (STORAGES["factures_pdf"]) : disque local par
+    défaut, stockage partagé pour plusieurs serveurs web
+    """
+    return storages["factures_pdf"]
+
+
+def facture_pdf_dir(facture_id):
+    """
+    Dossier des PDF d'une facture, réparti par hachage de l'identifiant
+    (pdf/ab/cd/) pour éviter un dossier unique de dizaines de milliers de fichiers
+    """
+    h = hashlib.sha1(str(facture_id).encode()).hexdigest()
+    return f"pdf/{h[:2]}/{h[2:4]}"
+
+
+def facture_pdf_name(facture, fingerprint):
+    """
+    Nom, dans le stockage des PDF, du PDF d'une facture pour une empreinte donnée
+    """
+    return f"{facture_pdf_dir(facture.id)}/facture_{facture.id}_{fingerprint[:16]}.pdf"
+
+
+def supprimer_pdfs_facture(facture_id, sauf=None):
+    """
+    Supprime les PDF stockés d'une facture, à l'exception de `sauf`
+    """
+    storage = get_pdf_storage()
+    dossier = facture_pdf_dir(facture_id)
+    try:
+        _, fichiers = storage.listdir(dossier)
+    except FileNotFoundError:
+        return
+    for fichier in fichiers:
+        nom = f"{dossier}/{fichier}"
+        if fichier.startswith(f"facture_{facture_id}_") and nom != sauf:
+            storage.delete(nom)
+
+
+def publier_pdf(nom, contenu):
+    """
+    Publie un PDF dans le stockage sans qu'un lecteur puisse voir un fichier
+    partiellement écrit
+    """
+    storage = get_pdf_storage()
+    try:
+        chemin = storage.path(nom)
+    except NotImplementedError:
+        # Stockage distant : l'écriture d'un objet y est déjà atomique
+        if storage.exists(nom):
+            storage.delete(nom)
+        storage.save(nom, ContentFile(contenu))
+        return
+
+    # Disque local : écriture dans un fichier temporaire puis renommage atomique
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    temp_path = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(contenu)
+        os.replace(temp_path, chemin)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def get_facture_pdf(facture, gabarit=None, limiter=False):
+    """
+    Retourne (nom, empreinte) du PDF de la facture dans le stockage des PDF.
+    Le PDF n'est régénéré que si les données de la facture ont changé, et
+    une seule fois pour des demandes simultanées. Avec `limiter`, le rendu
+    attend un créneau libre (RenduPdfSature si aucun ne se libère).
+    """
+    if gabarit is None:
+        gabarit = get_gabarit()
+    fingerprint = facture_fingerprint(facture, gabarit.societe)
+    nom = facture_pdf_name(facture, fingerprint)
+    storage = get_pdf_storage()
+    if not storage.exists(nom):
+        with verrou_facture(facture.id):
+            # Un rendu concurrent a pu publier le fichier pendant l'attente
+            if not storage.exists(nom):
+                with creneau_rendu() if limiter else nullcontext():
+                    generate_facture_pdf(facture, nom, gabarit=gabarit)
+                # Supprime les anciennes versions de ce PDF
+                supprimer_pdfs_facture(facture.id, sauf=nom)
+    return nom, fingerprint
+
+
+def demander_pdf_en_tache_de_fond(facture, fingerprint):
+    """
+    Demande le rendu du PDF au worker Celery.
+    Retourne False si le rendu doit être fait dans la requête : broker
+    indisponible, ou demande en attente depuis plus de PDF_PRERENDU_DELAI.
+    """
+    from .tasks import generer_pdf_facture
+
+    cle = f"factures:pdf_demande:{facture.id}:{fingerprint}"
+    demande_le = cache.get(cle)
+    if demande_le is None:
+        try:
+            generer_pdf_facture.delay(facture.id)
+        except Exception as e:
+            logger.warning(f"Rendu PDF en tâche de fond impossible : {e}")
+            return False
+        cache.set(cle, time.time(), 3600)
+        return True
+    return time.time() - demande_le < settings.PDF_PRERENDU_DELAI
+
+
+def reponse_fichier_pdf(nom, nom_telechargement):
+    """
+    Réponse de livraison d'un PDF déjà autorisé par la vue.
+    Avec PDF_X_ACCEL_REDIRECT, le transfert est délégué à nginx (emplacement
+    interne PDF_X_ACCEL_PREFIX, stockage sur disque sous MEDIA_ROOT) ;
+    sinon le fichier est diffusé par Django.
+    """
+    if settings.PDF_X_ACCEL_REDIRECT:
+        response = HttpResponse(content_type="application/pdf")
+        response["X-Accel-Redirect"] = settings.PDF_X_ACCEL_PREFIX + quote(nom)
+    else:
+        response = FileResponse(
+            get_pdf_storage().open(nom, "rb"), content_type="application/pdf"
+        )
+    response["Content-Disposition"] = f'attachment; filename="{nom_telechargement}"'
+    return response
+
+
+def facture_pdf_response(request, facture, reponse_en_cours=None):
+    """
+    Réponse de téléchargement du PDF d'une facture avec support ETag/304.
+    Si le PDF n'est pas encore prêt et que le pré-rendu est actif,
+    retourne reponse_en_cours() (202) au lieu de bloquer sur le rendu.
+    """
+    gabarit = get_gabarit()
+    fingerprint = facture_fingerprint(facture, gabarit.societe)
+    etag = f'"{fingerprint}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if (
+            not get_pdf_storage().exists(facture_pdf_name(facture, fingerprint))
+            and reponse_en_cours is not None
+            and settings.PDF_PRERENDU
+            and demander_pdf_en_tache_de_fond(facture, fingerprint)
+        ):
+            response = reponse_en_cours()
+            response["Retry-After"] = "2"
+            return response
+        try:
+            nom, _ = get_facture_pdf(facture, gabarit, limiter=True)
+        except RenduPdfSature:
+            response = HttpResponse(
+                "Trop de PDF en cours de génération, réessayez dans quelques secondes.",
+                status=503,
+            )
+            response["Retry-After"] = "5"
+            return response
+        response = reponse_fichier_pdf(nom, f"facture_{facture.numero}.pdf")
+    response["ETag"] = etag
+    # Le navigateur doit revalider à chaque téléchargement
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class _FluxZip:
+    """
+    Flux d'écriture non positionnable : zipfile y écrit, le générateur le vide
+    """
+
+    def __init__(self):
+        self.morceaux = []
+
+    def write(self, data):
+        self.morceaux.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b"".join(self.morceaux)
+        self.morceaux = []
+        return data
+
+
+def iter_zip_factures(factures, taille_bloc=64 * 1024):
+    """
+    Générateur produisant, morceau par morceau, une archive ZIP des PDF des
+    factures. Chaque PDF est lu depuis le cache (ou rendu) puis recopié par
+    blocs : l'archive n'est jamais construite en mémoire ni sur disque.
+    Les PDF manquants sont rendus dans un créneau de rendu, comme les
+    téléchargements. Si aucun ne se libère, le PDF est rendu hors créneau :
+    la réponse (200) est déjà partie, interrompre l'archive la corromprait.
+    """
+    flux = _FluxZip()
+    gabarit = get_gabarit()
+    storage = get_pdf_storage()
+    # Les PDF sont déjà compressés : stockage sans recompression
+    with zipfile.ZipFile(flux, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for facture in factures:
+            try:
+                nom_pdf, _ = get_facture_pdf(facture, gabarit, limiter=True)
+            except RenduPdfSature:
+                logger.warning(
+                    f"Export ZIP : PDF {facture.numero} rendu hors créneau (saturé)"
+                )
+                nom_pdf, _ = get_facture_pdf(facture, gabarit)
+            nom = f"facture_{facture.numero}.pdf"
+            with storage.open(nom_pdf, "rb") as source, archive.open(
+                nom, "w"
+            ) as membre:
+                while bloc := source.read(taille_bloc):
+                    membre.write(bloc)
+                    yield flux.vider()
+            yield flux.vider()
+    yield flux.vider()
+
+
+class GabaritFacture:
+    """
+    Parties invariantes de la mise en page d'une facture : styles, styles de
+    tableaux et blocs société (en-tête, pied de page). Construit une fois par
+    processus, voir get_gabarit().
+    """
+
+    # Marges et largeurs de colonnes
+    MARGES = {
+        "rightMargin": 2 * cm,
+        "leftMargin": 2 * cm,
+        "topMargin": 1.5 * cm,
+        "bottomMargin": 1.5 * cm,
+    }
+    COLONNES_ENTETE = [8 * cm, 8 * cm]
+    COLONNES_LIGNES = [5 * cm, 2 * cm, 2 * cm, 3 * cm, 3 * cm, 2 * cm]
+    COLONNES_TOTAUX = [4 * cm, 4 * cm]
+
+    def __init__(self, societe):
+        self.societe = societe
+
+        # Styles
+        styles = getSampleStyleSheet()
+        self.style_normal = styles["Normal"]
+
+        self.style_entete = TableStyle(
             [
                 ("ALIGN", (0, 0), (0, 0), "LEFT"),
                 ("ALIGN", (1, 0), (1, 0), "RIGHT"),
@@ -90,59 +354,7 @@ def generate_facture_pdf(facture):
                 ("TOPPADDING", (0, 0), (-1, -1), 0),
             ]
         )
-    )
-    elements.append(header_table)
-    elements.append(Spacer(1, 12))
-
-    # Titre
-    elements.append(
-        Paragraph('<para align="center"><b>FACTURE</b></para>', styles["Title"])
-    )
-    elements.append(Spacer(1, 12))
-
-    # Infos facture
-    infos = f"""
-    <b>Numéro de facture :</b> {facture.numero}<br/>
-    <b>Date de facture :</b> {facture.date_emission.strftime('%d/%m/%Y')}<br/>
-    <b>N° client :</b> {facture.client.id}
-    """
-    elements.append(Paragraph(infos, styles["Normal"]))
-    elements.append(Spacer(1, 12))
-
-    # Tableau des lignes de facture
-    data = [["Description", "Quantité", "Unité", "Prix unitaire HT", "Total HT", "TVA"]]
-    # Remplace ceci par tes vraies lignes si tu as un modèle LigneFacture relié à Facture
-    for ligne in getattr(
-        facture, "lignes", []
-    ):  # ou facture.lignefacture_set.all() si related_name absent
-        data.append(
-            [
-                ligne.description,
-                str(ligne.quantite),
-                ligne.unite,
-                f"{ligne.prix_unitaire:.2f} €",
-                f"{ligne.total_ht:.2f} €",
-                f"{ligne.tva} 20%",
-            ]
-        )
-    # Si tu n'as pas de lignes, ajoute une ligne factice :
-    if len(data) == 1:
-        TAUX_TVA = 0.20  # 20%
-        montant_ht = float(facture.montant) / (1 + TAUX_TVA)
-        data.append(
-            [
-                "Projet : " + facture.projet.titre,
-                "1",
-                "",
-                f"{montant_ht:.2f} €",
-                f"{montant_ht:.2f} €",
-                "20 %",
-            ]
-        )
-
-    table = Table(data, colWidths=[5 * cm, 2 * cm, 2 * cm, 3 * cm, 3 * cm, 2 * cm])
-    table.setStyle(
-        TableStyle(
+        self.style_lignes = TableStyle(
             [
                 ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
                 ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
@@ -153,22 +365,7 @@ def generate_facture_pdf(facture):
                 ("FONTSIZE", (0, 1), (-1, -1), 10),
             ]
         )
-    )
-    elements.append(table)
-    elements.append(Spacer(1, 12))
-
-    # Totaux
-    TAUX_TVA = 0.20  # 20%
-    montant_ht = float(facture.montant) / (1 + TAUX_TVA)
-    tva = float(facture.montant) - montant_ht
-    totaux_data = [
-        ["Total HT", f"{montant_ht:.2f} €"],
-        [f"TVA ({int(TAUX_TVA*100)}%)", f"{tva:.2f} €"],
-        ["Total TTC", f"{facture.montant:.2f} €"],
-    ]
-    totaux_table = Table(totaux_data, colWidths=[4 * cm, 4 * cm], hAlign="RIGHT")
-    totaux_table.setStyle(
-        TableStyle(
+        self.style_totaux = TableStyle(
             [
                 ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
                 ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
@@ -176,34 +373,194 @@ def generate_facture_pdf(facture):
                 ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
             ]
         )
-    )
-    elements.append(totaux_table)
-    elements.append(Spacer(1, 12))
 
-    # Conditions de paiement
-    elements.append(
-        Paragraph(
+        # Blocs fixes : le balisage n'est analysé qu'une fois
+        self.bloc_societe = Paragraph(
+            f"<b>{societe.nom}</b><br/>{societe.adresse}<br/>{societe.code_postal} {societe.ville}<br/>"
+            f"Tél : {societe.telephone}<br/>{societe.email}",
+            self.style_normal,
+        )
+        self.titre = Paragraph(
+            '<para align="center"><b>FACTURE</b></para>', styles["Title"]
+        )
+        self.conditions = Paragraph(
             "Conditions de paiement : 30% à la commande, paiement à réception de facture<br/>"
             "Mode de paiement : virement ou chèque",
-            styles["Normal"],
+            self.style_normal,
         )
-    )
-    elements.append(Spacer(1, 8))
-    elements.append(
-        Paragraph(
+        self.remerciements = Paragraph(
             "Nous vous remercions de votre confiance.<br/>Cordialement.",
-            styles["Normal"],
+            self.style_normal,
         )
-    )
-    elements.append(Spacer(1, 16))
-    pied = (
-        f"<b>{societe.nom}</b> - {societe.adresse} - {societe.telephone} - {societe.email}<br/>"
-        f"IBAN : {societe.iban} - BIC : {societe.bic}<br/>"
-        f"SIRET : {societe.siret} - TVA : {societe.tva}"
-    )
-    elements.append(Paragraph(pied, styles["Normal"]))
+        self.pied = Paragraph(
+            f"<b>{societe.nom}</b> - {societe.adresse} - {societe.telephone} - {societe.email}<br/>"
+            f"IBAN : {societe.iban} - BIC : {societe.bic}<br/>"
+            f"SIRET : {societe.siret} - TVA : {societe.tva}",
+            self.style_normal,
+        )
+
+    def fixe(self, paragraphe):
+        """
+        Copie d'un bloc fixe : la mise en page (wrap) modifie le flowable,
+        la copie évite de partager cet état entre deux rendus.
+        """
+        return copy.copy(paragraphe)
+
+    def construire(self, facture):
+        """
+        Retourne la liste des flowables d'une facture
+        """
+        elements = []
 
-    # Génère le PDF
-    doc.build(elements)
+        # En-tête entreprise/client
+        client = facture.client
+        header_data = [
+            [
+                self.fixe(self.bloc_societe),
+                Paragraph(
+                    f"<b>{client.nom}</b><br/>{client.adresse}<br/>{client.email}",
+                    self.style_normal,
+                ),
+            ]
+        ]
+        header_table = Table(header_data, colWidths=self.COLONNES_ENTETE)
+        header_table.setStyle(self.style_entete)
+        elements.append(header_table)
+        elements.append(Spacer(1, 12))
+
+        # Titre
+        elements.append(self.fixe(self.titre))
+        elements.append(Spacer(1, 12))
+
+        # Infos facture
+        infos = f"""
+        <b>Numéro de facture :</b> {facture.numero}<br/>
+        <b>Date de facture :</b> {facture.date_emission.strftime('%d/%m/%Y')}<br/>
+        <b>N° client :</b> {client.id}
+        """
+        elements.append(Paragraph(infos, self.style_normal))
+        elements.append(Spacer(1, 12))
+
+        # Tableau des lignes de facture
+        data = [
+            ["Description", "Quantité", "Unité", "Prix unitaire HT", "Total HT", "TVA"]
+        ]
+        # Remplace ceci par tes vraies lignes si tu as un modèle LigneFacture relié à Facture
+        for ligne in getattr(
+            facture, "lignes", []
+        ):  # ou facture.lignefacture_set.all() si related_name absent
+            data.append(
+                [
+                    ligne.description,
+                    str(ligne.quantite),
+                    ligne.unite,
+                    f"{ligne.prix_unitaire:.2f} €",
+                    f"{ligne.total_ht:.2f} €",
+                    f"{ligne.tva} 20%",
+                ]
+            )
+        montant_ht, tva = calculer_totaux(facture)
+        # Si tu n'as pas de lignes, ajoute une ligne factice :
+        if len(data) == 1:
+            data.append(
+                [
+                    "Projet : " + facture.projet.titre,
+                    "1",
+                    "",
+                    f"{montant_ht:.2f} €",
+                    f"{montant_ht:.2f} €",
+                    "20 %",
+                ]
+            )
+
+        table = Table(data, colWidths=self.COLONNES_LIGNES)
+        table.setStyle(self.style_lignes)
+        elements.append(table)
+        elements.append(Spacer(1, 12))
+
+        # Totaux
+        totaux_data = [
+            ["Total HT", f"{montant_ht:.2f} €"],
+            [f"TVA ({int(TAUX_TVA*100)}%)", f"{tva:.2f} €"],
+            ["Total TTC", f"{facture.montant:.2f} €"],
+        ]
+        totaux_table = Table(totaux_data, colWidths=self.COLONNES_TOTAUX, hAlign="RIGHT")
+        totaux_table.setStyle(self.style_totaux)
+        elements.append(totaux_table)
+        elements.append(Spacer(1, 12))
+
+        # Conditions de paiement
+        elements.append(self.fixe(self.conditions))
+        elements.append(Spacer(1, 8))
+        elements.append(self.fixe(self.remerciements))
+        elements.append(Spacer(1, 16))
+        elements.append(self.fixe(self.pied))
+        return elements
+
+
+# Gabarit du processus courant et version de la société pour laquelle il a été construit
+_gabarit = None
+_gabarit_version = None
+_gabarit_lock = threading.Lock()
+GABARIT_VERSION_CLE = "factures:gabarit_version"
+
+
+def get_gabarit():
+    """
+    Retourne le gabarit de facture du processus, reconstruit lorsque la
+    société a été modifiée. Les autres processus (workers web, Celery) ne
+    voient la modification qu'avec un cache partagé (REDIS_URL) ; avec le
+    cache mémoire local, seul le processus qui l'a faite est à jour.
+    """
+    global _gabarit, _gabarit_version
+    version = cache.get(GABARIT_VERSION_CLE)
+    if _gabarit is None or version != _gabarit_version:
+        with _gabarit_lock:
+            if _gabarit is None or version != _gabarit_version:
+                _gabarit = GabaritFacture(get_societe())
+                _gabarit_version = version
+    return _gabarit
+
+
+def invalider_gabarit():
+    """
+    Appelée par signal à chaque modification de la société : les processus
+    partageant le cache reconstruiront leur gabarit au prochain rendu
+    """
+    global _gabarit
+    cache.set(GABARIT_VERSION_CLE, time.time_ns(), None)
+    _gabarit = None
+
+
+def generate_facture_pdf(facture, destination=None, gabarit=None, moteur=None):
+    """
+    Génère le PDF d'une facture.
+    `destination` est un nom dans le stockage des PDF (par défaut celui de
+    l'empreinte courante) ou un flux ouvert en écriture.
+    `moteur` est le nom du moteur de rendu (par défaut PDF_MOTEUR).
+    Retourne (destination, taille du PDF en octets).
+    """
+    if gabarit is None:
+        gabarit = get_gabarit()
+    moteur = get_moteur(moteur)
+
+    if destination is None:
+        destination = facture_pdf_name(
+            facture, facture_fingerprint(facture, gabarit.societe)
+        )
+
+    if not isinstance(destination, str):
+        # Flux ouvert par l'appelant (benchmark, tests)
+        debut = destination.tell()
+        moteur.rendre(facture, destination, gabarit)
+        return destination, destination.tell() - debut
+
+    # Rendu en mémoire (quelques Ko) puis publication atomique
+    contenu = io.BytesIO()
+    moteur.rendre(facture, contenu, gabarit)
+    publier_pdf(destination, contenu.getvalue())
+    logger.debug(
+        f"PDF facture {facture.numero} : {contenu.tell()} octets ({moteur.nom})"
+    )
 
-    return file_path
+    return destination, contenu.tell()
@@ -0,0 +1,99 @@
+"""
+Verrous du rendu PDF, partagés entre les threads et les processus d'un même
+serveur (fichiers verrouillés avec flock) :
+
+- verrou_facture : un seul rendu à la fois par facture (single-flight) ;
+- creneau_rendu : nombre borné de rendus simultanés (PDF_RENDUS_SIMULTANES).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrous limités aux threads du processus
+    fcntl = None
+
+# Les factures se répartissent sur un nombre fixe de fichiers de verrou
+NB_VERROUS = 256
+
+_verrous_threads = [threading.Lock() for _ in range(NB_VERROUS)]
+_creneaux_threads = {}
+_creneaux_lock = threading.Lock()
+
+
+class RenduPdfSature(Exception):
+    """Aucun créneau de rendu ne s'est libéré dans le délai imparti"""
+
+
+def _chemin_verrou(nom):
+    dossier = settings.PDF_VERROUS_DIR
+    os.makedirs(dossier, exist_ok=True)
+    return os.path.join(dossier, nom)
+
+
+@contextmanager
+def verrou_facture(facture_id):
+    """
+    Verrou exclusif du rendu d'une facture : les requêtes concurrentes
+    attendent le rendu en cours au lieu d'en lancer un second.
+    """
+    indice = facture_id % NB_VERROUS
+    if fcntl is None:
+        with _verrous_threads[indice]:
+            yield
+        return
+
+    with open(_chemin_verrou(f"facture_{indice}.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def creneau_rendu(attente=None):
+    """
+    Réserve l'un des PDF_RENDUS_SIMULTANES créneaux de rendu.
+    Lève RenduPdfSature si aucun ne se libère en `attente` secondes.
+    """
+    nb_creneaux = settings.PDF_RENDUS_SIMULTANES
+    if attente is None:
+        attente = settings.PDF_RENDU_ATTENTE
+    limite = time.monotonic() + attente
+
+    if fcntl is None:
+        with _creneaux_lock:
+            semaphore = _creneaux_threads.setdefault(
+                nb_creneaux, threading.BoundedSemaphore(nb_creneaux)
+            )
+        if not semaphore.acquire(timeout=attente):
+            raise RenduPdfSature()
+        try:
+            yield
+        finally:
+            semaphore.release()
+        return
+
+    while True:
+        for indice in range(nb_creneaux):
+            f = open(_chemin_verrou(f"creneau_{indice}.lock"), "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                continue
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
+            return
+        if time.monotonic() >= limite:
+            raise RenduPdfSature()
+        time.sleep(0.05)
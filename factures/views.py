@@ -1,4 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -7,79 +8,62 @@ from django.http import (
     HttpResponse,
     HttpResponseBadRequest,
     JsonResponse,
-    FileResponse,
     Http404,
+    StreamingHttpResponse,
 )
-from django.db.models import Q
 from .models import Facture
 from .forms import FactureForm, StatutFactureForm
+from .utils import facture_pdf_response, iter_zip_factures
+from .tasks import planifier_pdf_facture
+from .services import (
+    EXPORT_CSV_ENTETE,
+    filtrer_liste_factures,
+    lignes_csv_factures,
+)
+from clients.services import choix_clients
+from mini_crm.exports import export_en_arriere_plan, reponse_csv, reponse_pdf_liste
+from mini_crm.pagination import paginer_par_curseur
 from projets.models import Projet
-import csv
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
 from datetime import datetime
-import os
 
 # Create your views here.
 
+# Colonnes chargées pour la liste des factures
+COLONNES_LISTE = [
+    "numero",
+    "montant",
+    "date_emission",
+    "date_echeance",
+    "statut_paiement",
+    "client__nom",
+    "projet__titre",
+]
 
-@login_required
-def facture_list(request):
-    factures = Facture.objects.all()
-
-    # Récupération des paramètres de filtrage
-    search_query = request.GET.get("q", "").strip()
-    client_id = request.GET.get("client", "").strip()
-    statut = request.GET.get("statut", "").strip()
-    date_debut = request.GET.get("date_debut", "").strip()
-    date_fin = request.GET.get("date_fin", "").strip()
-
-    # Filtrage par recherche textuelle
-    if search_query:
-        factures = factures.filter(
-            Q(numero__icontains=search_query)
-            | Q(client__nom__icontains=search_query)
-            | Q(projet__titre__icontains=search_query)
-        )
 
-    # Filtrage par client
-    if client_id:
-        factures = factures.filter(client_id=client_id)
+def _filtrer_factures(request, factures):
+    """
+    Applique les filtres de la liste des factures (recherche, client, statut, dates)
+    """
+    return filtrer_liste_factures(request.GET, factures)
 
-    # Filtrage par statut
-    if statut:
-        factures = factures.filter(statut_paiement=statut)
 
-    # Filtrage par date
-    if date_debut:
-        factures = factures.filter(date_emission__gte=date_debut)
-    if date_fin:
-        factures = factures.filter(date_emission__lte=date_fin)
+@login_required
+def facture_list(request):
+    factures = _filtrer_factures(request, Facture.objects.all())
 
-    # Tri par date d'émission décroissante
-    factures = factures.order_by("-date_emission")
+    # Seules les colonnes affichées sont chargées, client et projet par jointure
+    factures = factures.select_related("client", "projet").only(*COLONNES_LISTE)
 
-    # Pagination
-    paginate_by = 10
-    page = request.GET.get("page", 1)
-    start = (int(page) - 1) * paginate_by
-    end = start + paginate_by
-    total_pages = (factures.count() + paginate_by - 1) // paginate_by
+    # Pagination par curseur sur (date d'émission, id) décroissants : pas de
+    # COUNT ni d'OFFSET, le nombre de requêtes ne dépend pas de la page
+    page_obj = paginer_par_curseur(factures, request.GET, "date_emission", par_page=10)
 
     context = {
-        "factures": factures[start:end],
-        "clients": Facture.objects.values_list("client", flat=True).distinct(),
+        "factures": page_obj,
+        "clients": choix_clients(),
         "statut_choices": Facture.STATUT_CHOICES,
-        "is_paginated": True,
-        "page_obj": {
-            "number": int(page),
-            "has_previous": int(page) > 1,
-            "has_next": int(page) < total_pages,
-            "previous_page_number": int(page) - 1,
-            "next_page_number": int(page) + 1,
-        },
-        "paginator": {"page_range": range(1, total_pages + 1)},
+        "is_paginated": page_obj.has_previous or page_obj.has_next,
+        "page_obj": page_obj,
     }
 
     return render(request, "factures/facture_list.html", context)
@@ -104,19 +88,9 @@ def facture_create(request):
     if request.method == "POST":
         form = FactureForm(request.POST)
         if form.is_valid():
-            facture = form.save(commit=False)
-            # Si aucun numéro n'est fourni, en générer un
-            if not facture.numero:
-                dernier_numero = Facture.objects.order_by("-numero").first()
-                if dernier_numero and dernier_numero.numero.startswith("FACT-"):
-                    try:
-                        numero = int(dernier_numero.numero.split("-")[1]) + 1
-                    except (IndexError, ValueError):
-                        numero = 1
-                else:
-                    numero = 1
-                facture.numero = f"FACT-{numero:03d}"
-            facture.save()
+            # Sans numéro saisi, Facture.save en alloue un (compteur annuel)
+            facture = form.save()
+            planifier_pdf_facture(facture)
             messages.success(request, "Facture créée avec succès.")
             return redirect("factures:facture_detail", pk=facture.pk)
         else:
@@ -137,7 +111,8 @@ def facture_update(request, pk):
     if request.method == "POST":
         form = FactureForm(request.POST, instance=facture)
         if form.is_valid():
-            form.save()
+            facture = form.save()
+            planifier_pdf_facture(facture)
             messages.success(request, "Facture mise à jour avec succès.")
             return redirect("factures:facture_detail", pk=facture.pk)
     else:
@@ -169,132 +144,49 @@ def get_projets_client(request):
 
 @login_required
 def export_csv(request):
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = (
-        f'attachment; filename="factures_{datetime.now().strftime("%Y%m%d")}.csv"'
-    )
+    # Application des filtres
+    factures = _filtrer_factures(request, Facture.objects.all()).order_by("id")
 
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "Numéro",
-            "Client",
-            "Projet",
-            "Montant",
-            "Date d'émission",
-            "Date d'échéance",
-            "Statut",
-        ]
+    redirection = export_en_arriere_plan(
+        request, "factures", "csv", factures, reverse("factures:facture_list")
     )
+    if redirection:
+        return redirection
 
-    factures = Facture.objects.all()
-
-    # Application des filtres
-    search_query = request.GET.get("q", "").strip()
-    client_id = request.GET.get("client", "").strip()
-    statut = request.GET.get("statut", "").strip()
-    date_debut = request.GET.get("date_debut", "").strip()
-    date_fin = request.GET.get("date_fin", "").strip()
-
-    if search_query:
-        factures = factures.filter(
-            Q(numero__icontains=search_query)
-            | Q(client__nom__icontains=search_query)
-            | Q(projet__titre__icontains=search_query)
-        )
-    if client_id:
-        factures = factures.filter(client_id=client_id)
-    if statut:
-        factures = factures.filter(statut_paiement=statut)
-    if date_debut:
-        factures = factures.filter(date_emission__gte=date_debut)
-    if date_fin:
-        factures = factures.filter(date_emission__lte=date_fin)
-
-    for facture in factures:
-        writer.writerow(
-            [
-                facture.numero,
-                facture.client.nom,
-                facture.projet.titre,
-                facture.montant,
-                facture.date_emission.strftime("%d/%m/%Y"),
-                (
-                    facture.date_echeance.strftime("%d/%m/%Y")
-                    if facture.date_echeance
-                    else "-"
-                ),
-                facture.get_statut_paiement_display(),
-            ]
-        )
-
-    return response
+    return reponse_csv(
+        f"factures_{datetime.now().strftime('%Y%m%d')}.csv",
+        EXPORT_CSV_ENTETE,
+        lignes_csv_factures(factures),
+    )
 
 
 @login_required
 def export_pdf(request):
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = (
-        f'attachment; filename="factures_{datetime.now().strftime("%Y%m%d")}.pdf"'
-    )
+    return reponse_pdf_liste(request, "factures", reverse("factures:facture_list"))
 
-    doc = SimpleDocTemplate(response, pagesize=letter)
-    elements = []
-
-    # En-tête
-    data = [
-        [
-            "Numéro",
-            "Client",
-            "Projet",
-            "Montant",
-            "Date d'émission",
-            "Date d'échéance",
-            "Statut",
-        ]
-    ]
-
-    # Données
-    factures = Facture.objects.all()
-    for facture in factures:
-        data.append(
-            [
-                facture.numero,
-                facture.client.nom,
-                facture.projet.titre,
-                f"{facture.montant} €",
-                facture.date_emission.strftime("%d/%m/%Y"),
-                (
-                    facture.date_echeance.strftime("%d/%m/%Y")
-                    if facture.date_echeance
-                    else "-"
-                ),
-                facture.get_statut_paiement_display(),
-            ]
-        )
 
-    # Création du tableau
-    table = Table(data)
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 14),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
-                ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 1), (-1, -1), 12),
-                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-            ]
-        )
+@login_required
+def export_zip(request):
+    """
+    Archive ZIP des PDF des factures filtrées, produite en flux
+    """
+    factures = _filtrer_factures(
+        request, Facture.objects.select_related("client", "projet")
+    ).order_by("-date_emission")
+
+    redirection = export_en_arriere_plan(
+        request, "factures", "zip", factures, reverse("factures:facture_list")
     )
+    if redirection:
+        return redirection
 
-    elements.append(table)
-    doc.build(elements)
+    response = StreamingHttpResponse(
+        iter_zip_factures(factures.iterator(chunk_size=200)),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="factures_{datetime.now().strftime("%Y%m%d")}.zip"'
+    )
     return response
 
 
@@ -316,14 +208,20 @@ def update_statut_facture(request, pk):
 
 @login_required
 def telecharger_facture_pdf(request, pk):
-    facture = get_object_or_404(Facture, pk=pk)
-    filepath = facture.generer_pdf()
+    facture = get_object_or_404(
+        Facture.objects.select_related("client", "projet"), pk=pk
+    )
 
-    if os.path.exists(filepath):
-        response = FileResponse(open(filepath, "rb"), content_type="application/pdf")
-        response["Content-Disposition"] = (
-            f'attachment; filename="facture_{facture.numero}.pdf"'
+    def reponse_en_cours():
+        # Le PDF est en cours de rendu : la page relance le téléchargement
+        return render(
+            request,
+            "factures/facture_pdf_en_cours.html",
+            {"facture": facture},
+            status=202,
         )
-        return response
-    else:
+
+    try:
+        return facture_pdf_response(request, facture, reponse_en_cours)
+    except OSError:
         raise Http404("Le PDF n'a pas pu être généré")
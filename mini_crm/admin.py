@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "user",
+        "type_export",
+        "format",
+        "statut",
+        "lignes_traitees",
+        "total_lignes",
+        "date_creation",
+    ]
+    list_filter = ["statut", "type_export", "format"]
+    readonly_fields = ["date_creation", "date_debut", "date_fin"]
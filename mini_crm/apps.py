@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MiniCrmConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "mini_crm"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,186 @@
+"""
+Indicateurs du tableau de bord.
+
+DashboardMetrics lit les indicateurs de factures dans l'agrégat mensuel
+ChiffreAffairesMensuel (agrégation conditionnelle sur quelques lignes par
+mois, plus la série du graphique), les compteurs de projets en une requête
+et le classement des meilleurs clients dans les totaux tenus sur Client. Le
+résultat est mis en cache DASHBOARD_CACHE_TTL secondes ; les
+enregistrements et suppressions de factures, projets et clients
+l'invalident (mini_crm.signals). L'ETag de l'API est une empreinte des
+indicateurs servis : identique d'un processus à l'autre pour les mêmes
+données.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import ChiffreAffairesMensuel, ajouter_mois
+from factures.services import serie_chiffre_affaires
+from projets.models import Projet
+
+CLE_METRIQUES = "dashboard:metriques"
+CLE_STATS_ENTETE = "dashboard:stats_entete"
+# Factures émises et non réglées
+STATUTS_IMPAYES = ["envoyée", "en_retard"]
+NB_MOIS_EVOLUTION = 6
+NB_TOP_CLIENTS = 5
+MOIS_FR = {
+    1: "Janvier",
+    2: "Février",
+    3: "Mars",
+    4: "Avril",
+    5: "Mai",
+    6: "Juin",
+    7: "Juillet",
+    8: "Août",
+    9: "Septembre",
+    10: "Octobre",
+    11: "Novembre",
+    12: "Décembre",
+}
+
+
+class DashboardMetrics:
+    """Indicateurs du tableau de bord à la date `maintenant` (par défaut : now)"""
+
+    def __init__(self, maintenant=None):
+        maintenant = timezone.localtime(maintenant or timezone.now())
+        self.debut_mois = maintenant.date().replace(day=1)
+        self.debut_annee = self.debut_mois.replace(month=1)
+        # Premier mois de l'évolution (mois calendaires, mois en cours compris)
+        self.debut_evolution = ajouter_mois(self.debut_mois, 1 - NB_MOIS_EVOLUTION)
+
+    @classmethod
+    def obtenir(cls):
+        """Indicateurs courants, depuis le cache si possible"""
+        metriques = cache.get(CLE_METRIQUES)
+        if metriques is None:
+            metriques = cls().calculer()
+            cache.set(CLE_METRIQUES, metriques, settings.DASHBOARD_CACHE_TTL)
+        return metriques
+
+    @classmethod
+    def invalider(cls):
+        """
+        Invalide les indicateurs et les statistiques d'en-tête. Répété à la
+        validation de la transaction : un calcul fait entre-temps sur les
+        anciennes données est écarté.
+        """
+        cls._invalider()
+        transaction.on_commit(cls._invalider)
+
+    @staticmethod
+    def _invalider():
+        cache.delete_many([CLE_METRIQUES, CLE_STATS_ENTETE])
+
+    @staticmethod
+    def etag(metriques):
+        """Empreinte des indicateurs `metriques`, tirée des données elles-mêmes"""
+        contenu = json.dumps(metriques, sort_keys=True, default=str)
+        return f"dashboard-{hashlib.sha256(contenu.encode()).hexdigest()[:32]}"
+
+    def calculer(self):
+        """Calcule les indicateurs (quatre requêtes)"""
+        metriques = {**self._metriques_factures(), **self._metriques_projets()}
+        metriques.update(self._evolution())
+        metriques["top_clients"] = self._top_clients()
+        return metriques
+
+    def _metriques_factures(self):
+        payee = Q(statut_paiement="payée")
+        impayee = Q(statut_paiement__in=STATUTS_IMPAYES)
+        du_mois = Q(mois=self.debut_mois)
+        resultats = ChiffreAffairesMensuel.objects.aggregate(
+            factures_impayees=Sum("nb_factures", filter=impayee),
+            montant_impaye=Sum("montant", filter=impayee),
+            chiffre_affaire=Sum("montant", filter=payee),
+            ca_mois=Sum("montant", filter=payee & du_mois),
+            ca_mois_precedent=Sum(
+                "montant", filter=payee & Q(mois=ajouter_mois(self.debut_mois, -1))
+            ),
+            ca_annee=Sum("montant", filter=payee & Q(mois__gte=self.debut_annee)),
+            factures_mois=Sum("nb_factures", filter=du_mois),
+            factures_en_retard=Sum(
+                "nb_factures", filter=Q(statut_paiement="en_retard")
+            ),
+            factures_payees_mois=Sum("nb_factures", filter=payee & du_mois),
+            nb_echeances=Sum("nb_echeances", filter=payee),
+            jours_echeance=Sum("jours_echeance", filter=payee),
+        )
+        resultats = {cle: valeur or 0 for cle, valeur in resultats.items()}
+        # Délai moyen entre l'émission et l'échéance des factures payées
+        nb_echeances = resultats.pop("nb_echeances")
+        jours = resultats.pop("jours_echeance")
+        resultats["delai_paiement"] = jours // nb_echeances if nb_echeances else 0
+        factures_mois = resultats["factures_mois"]
+        resultats["taux_conversion"] = (
+            round(resultats["factures_payees_mois"] / factures_mois * 100, 1)
+            if factures_mois
+            else 0
+        )
+        return resultats
+
+    def _evolution(self):
+        """Chiffre d'affaires encaissé des derniers mois, pour le graphique"""
+        serie = serie_chiffre_affaires(self.debut_evolution, self.debut_mois)
+        return {
+            "ca_labels": [
+                f"{MOIS_FR[point['mois'].month]} {point['mois'].year}"
+                for point in serie
+            ],
+            "ca_data": [float(point["montant"]) for point in serie],
+        }
+
+    @staticmethod
+    def _metriques_projets():
+        return Projet.objects.aggregate(
+            projets_en_cours=Count("id", filter=Q(statut="en_cours")),
+            projets_termines=Count("id", filter=Q(statut="termine")),
+            projets_en_attente=Count("id", filter=Q(statut="en_attente")),
+        )
+
+    @staticmethod
+    def _top_clients():
+        """
+        Clients ayant le plus facturé (nom, total_factures, montant_total),
+        lus dans les totaux tenus à jour sur Client (client_total_facture_idx) :
+        brouillons et factures annulées n'y comptent pas
+        """
+        return list(
+            Client.objects.order_by("-total_facture", "id").values(
+                "id",
+                "nom",
+                total_factures=F("nb_factures"),
+                montant_total=F("total_facture"),
+            )[:NB_TOP_CLIENTS]
+        )
+
+
+def stats_entete():
+    """
+    Statistiques d'en-tête (factures en attente, projets en cours, clients
+    ayant au moins un projet), mises en cache comme les indicateurs : deux
+    requêtes au plus, aucune si le cache est à jour
+    """
+    stats = cache.get(CLE_STATS_ENTETE)
+    if stats is None:
+        stats = {
+            "factures_en_attente": ChiffreAffairesMensuel.objects.filter(
+                statut_paiement="envoyée"
+            ).aggregate(total=Sum("nb_factures"))["total"]
+            or 0,
+            **Projet.objects.aggregate(
+                projets_en_cours=Count("id", filter=Q(statut="en_cours")),
+                clients_actifs=Count("client", distinct=True),
+            ),
+        }
+        cache.set(CLE_STATS_ENTETE, stats, settings.DASHBOARD_CACHE_TTL)
+    return stats
@@ -0,0 +1,204 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from clients.models import Client
+from factures.models import Facture
+from factures.services import reconstruire_chiffre_affaires_mensuel
+from projets.models import Projet
+
+from .services import DashboardMetrics, stats_entete
+
+
+def le(annee, mois, jour):
+    return timezone.make_aware(datetime(annee, mois, jour, 12))
+
+
+class DashboardMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_a = Client.objects.create(nom="Alpha", email="a@example.com")
+        self.client_b = Client.objects.create(nom="Beta", email="b@example.com")
+        Client.objects.create(nom="Sans facture", email="c@example.com")
+        self.projet = Projet.objects.create(
+            titre="Projet",
+            client=self.client_a,
+            date_debut=date(2025, 1, 1),
+            statut="en_cours",
+        )
+        Projet.objects.create(
+            titre="Terminé",
+            client=self.client_b,
+            date_debut=date(2025, 1, 1),
+            statut="termine",
+        )
+        self.maintenant = le(2025, 3, 31)
+
+    def facture(self, client, montant, emission=None, statut="payée", echeance=None):
+        facture = Facture.objects.create(
+            client=client,
+            projet=self.projet,
+            montant=montant,
+            statut_paiement=statut,
+            date_echeance=echeance,
+        )
+        if emission:
+            # date_emission est fixée à la création : agrégat mensuel recalculé
+            Facture.objects.filter(pk=facture.pk).update(date_emission=emission)
+            reconstruire_chiffre_affaires_mensuel()
+        return facture
+
+    def test_indicateurs(self):
+        self.facture(self.client_a, 100, le(2025, 3, 2), echeance=date(2025, 4, 1))
+        self.facture(self.client_a, 50, le(2025, 3, 5), statut="envoyée")
+        self.facture(self.client_b, 30, le(2025, 2, 28), statut="en_retard")
+        self.facture(self.client_b, 200, le(2025, 2, 10))
+        self.facture(self.client_a, 70, le(2024, 12, 31))
+
+        with self.assertNumQueries(4):
+            metriques = DashboardMetrics(self.maintenant).calculer()
+
+        self.assertEqual(metriques["chiffre_affaire"], Decimal("370"))
+        self.assertEqual(metriques["ca_mois"], Decimal("100"))
+        self.assertEqual(metriques["ca_mois_precedent"], Decimal("200"))
+        self.assertEqual(metriques["ca_annee"], Decimal("300"))
+        self.assertEqual(metriques["factures_impayees"], 2)
+        self.assertEqual(metriques["montant_impaye"], Decimal("80"))
+        self.assertEqual(metriques["factures_en_retard"], 1)
+        self.assertEqual(metriques["factures_mois"], 2)
+        self.assertEqual(metriques["factures_payees_mois"], 1)
+        self.assertEqual(metriques["taux_conversion"], 50.0)
+        self.assertEqual(metriques["delai_paiement"], 30)
+        self.assertEqual(metriques["projets_en_cours"], 1)
+        self.assertEqual(metriques["projets_termines"], 1)
+        self.assertEqual(metriques["projets_en_attente"], 0)
+        self.assertEqual(
+            [c["nom"] for c in metriques["top_clients"]],
+            ["Beta", "Alpha", "Sans facture"],
+        )
+
+    def test_brouillons_et_annulees_hors_impayes_et_classement(self):
+        """
+        Écarts voulus avec l'ancienne vue : le statut inexistant « impayée »
+        donnait toujours 0 impayé, et le classement des clients comptait
+        brouillons et factures annulées
+        """
+        self.facture(self.client_a, 100, statut="envoyée")
+        self.facture(self.client_a, 40, statut="en_retard")
+        self.facture(self.client_a, 500, statut="brouillon")
+        self.facture(self.client_b, 300)
+        self.facture(self.client_b, 900, statut="annulée")
+
+        # Anciennes définitions
+        self.assertEqual(Facture.objects.filter(statut_paiement="impayée").count(), 0)
+        anciens = Client.objects.annotate(
+            total_factures=Count("factures"), montant_total=Sum("factures__montant")
+        ).order_by("-montant_total")
+        self.assertEqual(
+            [(c.nom, c.total_factures, c.montant_total) for c in anciens[:2]],
+            [("Beta", 2, Decimal("1200")), ("Alpha", 3, Decimal("640"))],
+        )
+
+        metriques = DashboardMetrics().calculer()
+        self.assertEqual(metriques["factures_impayees"], 2)
+        self.assertEqual(metriques["montant_impaye"], Decimal("140"))
+        self.assertEqual(
+            [
+                (c["nom"], c["total_factures"], c["montant_total"])
+                for c in metriques["top_clients"][:2]
+            ],
+            [("Beta", 1, Decimal("300")), ("Alpha", 2, Decimal("140"))],
+        )
+
+    def test_evolution_par_mois_calendaire(self):
+        self.facture(self.client_a, 100, le(2025, 3, 1))
+        self.facture(self.client_a, 40, le(2025, 2, 28))
+        self.facture(self.client_a, 10, le(2024, 10, 1))
+        self.facture(self.client_a, 999, le(2024, 9, 30))
+
+        metriques = DashboardMetrics(self.maintenant).calculer()
+
+        self.assertEqual(
+            metriques["ca_labels"],
+            [
+                "Octobre 2024",
+                "Novembre 2024",
+                "Décembre 2024",
+                "Janvier 2025",
+                "Février 2025",
+                "Mars 2025",
+            ],
+        )
+        self.assertEqual(metriques["ca_data"], [10.0, 0.0, 0.0, 0.0, 40.0, 100.0])
+
+    def test_cache_invalide_par_les_modifications(self):
+        with self.assertNumQueries(4):
+            DashboardMetrics.obtenir()
+        with self.assertNumQueries(0):
+            self.assertEqual(DashboardMetrics.obtenir()["projets_en_cours"], 1)
+
+        self.projet.statut = "termine"
+        self.projet.save()
+        self.assertEqual(DashboardMetrics.obtenir()["projets_en_cours"], 0)
+
+        self.facture(self.client_a, 25)
+        self.assertEqual(DashboardMetrics.obtenir()["chiffre_affaire"], Decimal("25"))
+
+    def test_vue_sans_calcul_des_indicateurs(self):
+        user = User.objects.create_user(username="commercial", password="secret")
+        self.client.force_login(user)
+        stats_entete()
+
+        # Session, utilisateur et notifications non lues : les indicateurs
+        # sont chargés ensuite depuis l'API
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("dashboard:dashboard"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse("api:dashboard_metrics"))
+
+
+class StatsEnteteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_obj = Client.objects.create(nom="Alpha", email="a@example.com")
+        Client.objects.create(nom="Sans projet", email="b@example.com")
+        self.projets = [
+            Projet.objects.create(
+                titre=f"Projet {i}",
+                client=self.client_obj,
+                date_debut=date(2025, 1, 1),
+                statut="en_cours",
+            )
+            for i in range(2)
+        ]
+        Facture.objects.create(
+            client=self.client_obj, projet=self.projets[0], montant=100
+        )
+
+    def test_stats_en_cache(self):
+        with self.assertNumQueries(2):
+            stats = stats_entete()
+        self.assertEqual(
+            stats,
+            {"factures_en_attente": 1, "projets_en_cours": 2, "clients_actifs": 1},
+        )
+        with self.assertNumQueries(0):
+            stats_entete()
+
+    def test_invalidation_par_les_signaux(self):
+        stats_entete()
+        self.projets[1].statut = "termine"
+        self.projets[1].save()
+        self.assertEqual(stats_entete()["projets_en_cours"], 1)
+
+        facture = Facture.objects.get()
+        facture.statut_paiement = "payée"
+        facture.save()
+        self.assertEqual(stats_entete()["factures_en_attente"], 0)
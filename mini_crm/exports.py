@@ -0,0 +1,253 @@
+"""
+Exports des listes (clients, projets, factures).
+
+- CSV en flux : les lignes sont lues par blocs avec un curseur
+  (QuerySet.iterator) et écrites au fil de la réponse, la mémoire reste
+  constante quel que soit le nombre de lignes ;
+- PDF paginé : un tableau (LongTable, en-tête répété) par bloc de lignes,
+  construit au moment où ReportLab le met en page, écrit dans un fichier
+  temporaire puis diffusé ;
+- ZIP des PDF des factures.
+
+Au-delà du seuil de son format (EXPORT_CSV_LIGNES_MAX,
+EXPORT_PDF_LIGNES_MAX, EXPORT_ZIP_LIGNES_MAX), un export est confié à
+Celery (ExportJob) au lieu d'être produit dans la requête.
+"""
+
+import csv
+import itertools
+import tempfile
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, TableStyle
+
+# Définitions des exports de listes, par type : fonction(params) -> dict
+EXPORTS_LISTES = {
+    "clients": "clients.services.export_liste_clients",
+    "projets": "projets.services.export_liste_projets",
+    "factures": "factures.services.export_liste_factures",
+}
+# Formats disponibles par type d'export
+FORMATS_EXPORT = {
+    "clients": ["csv", "pdf"],
+    "projets": ["csv", "pdf"],
+    "factures": ["csv", "pdf", "zip"],
+}
+
+STYLE_TABLEAU_PDF = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 11),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+        ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, -1), 9),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ]
+)
+
+
+class _Tampon:
+    """Pseudo-fichier : csv.writer retourne directement la ligne formatée"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def iter_csv(entete, lignes):
+    """
+    Génère le CSV ligne par ligne à partir d'un itérable de tuples
+    """
+    writer = csv.writer(_Tampon())
+    yield writer.writerow(entete)
+    for ligne in lignes:
+        yield writer.writerow(ligne)
+
+
+def iter_projection(queryset, champs, chunk_size=None):
+    """
+    Parcourt `queryset` en ne chargeant que `champs` (tuples, jointures
+    résolues par la base) par blocs de EXPORT_CHUNK_SIZE lignes
+    """
+    return queryset.values_list(*champs).iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def reponse_csv(nom_fichier, entete, lignes):
+    """
+    Réponse HTTP qui diffuse le CSV au fur et à mesure de sa génération
+    """
+    response = StreamingHttpResponse(
+        iter_csv(entete, lignes), content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{nom_fichier}"'
+    return response
+
+
+def get_export_liste(type_export, params):
+    """
+    Retourne la définition de l'export `type_export` filtré par `params` :
+    nom, titre, entete, queryset, lignes (fonction du queryset) et largeurs
+    des colonnes (cm)
+    """
+    return import_string(EXPORTS_LISTES[type_export])(params)
+
+
+class _DocumentParBlocs(SimpleDocTemplate):
+    """
+    Document alimenté bloc par bloc : le tableau suivant n'est construit
+    qu'une fois le dernier en attente mis en page (hook afterFlowable), la
+    mémoire ne garde que les lignes du bloc en cours.
+    """
+
+    def construire(self, flowables):
+        flowables = iter(flowables)
+        self._a_mettre_en_page = [next(flowables)]
+        self._suivants = flowables
+        self.build(self._a_mettre_en_page)
+
+    def afterFlowable(self, flowable):
+        # build() consomme la liste passée : on la réalimente quand elle se vide
+        if not self._a_mettre_en_page:
+            suivant = next(self._suivants, None)
+            if suivant is not None:
+                self._a_mettre_en_page.append(suivant)
+
+
+def ecrire_pdf_liste(destination, export, taille_bloc=None, lignes=None):
+    """
+    Écrit le PDF paginé de l'export dans `destination` (chemin ou flux)
+    """
+    taille_bloc = taille_bloc or settings.EXPORT_PDF_TAILLE_BLOC
+    largeurs = [largeur * cm for largeur in export["largeurs"]]
+    if lignes is None:
+        lignes = export["lignes"](export["queryset"])
+    lignes = iter(lignes)
+
+    def tableaux():
+        while bloc := list(itertools.islice(lignes, taille_bloc)):
+            tableau = LongTable(
+                [export["entete"]] + bloc, colWidths=largeurs, repeatRows=1
+            )
+            tableau.setStyle(STYLE_TABLEAU_PDF)
+            yield tableau
+
+    doc = _DocumentParBlocs(
+        destination,
+        pagesize=landscape(A4),
+        leftMargin=1 * cm,
+        rightMargin=1 * cm,
+        topMargin=1 * cm,
+        bottomMargin=1 * cm,
+        title=export["titre"],
+    )
+    titre = Paragraph(export["titre"], getSampleStyleSheet()["Title"])
+    doc.construire(itertools.chain([titre], tableaux()))
+
+
+def seuil_arriere_plan(format_export):
+    """Nombre de lignes au-delà duquel un export est confié à Celery"""
+    return {
+        "csv": settings.EXPORT_CSV_LIGNES_MAX,
+        "pdf": settings.EXPORT_PDF_LIGNES_MAX,
+        "zip": settings.EXPORT_ZIP_LIGNES_MAX,
+    }[format_export]
+
+
+def export_en_arriere_plan(request, type_export, format_export, queryset, url_liste):
+    """
+    Si l'export dépasse le seuil de son format, crée un ExportJob et
+    retourne la redirection vers la liste (une notification donnera le
+    lien de téléchargement). Retourne None si l'export peut être produit
+    dans la requête.
+    """
+    nb_lignes = queryset.count()
+    if nb_lignes <= seuil_arriere_plan(format_export):
+        return None
+
+    from .tasks import lancer_export
+
+    lancer_export(request.user, type_export, format_export, request.GET.dict())
+    messages.info(
+        request,
+        f"L'export comporte {nb_lignes} lignes : il est généré en arrière-plan. "
+        "Une notification vous avertira lorsqu'il sera prêt.",
+    )
+    parametres = request.GET.urlencode()
+    return redirect(f"{url_liste}?{parametres}" if parametres else url_liste)
+
+
+def reponse_pdf_liste(request, type_export, url_liste):
+    """
+    Réponse de l'export PDF d'une liste filtrée par request.GET
+    """
+    export = get_export_liste(type_export, request.GET)
+    redirection = export_en_arriere_plan(
+        request, type_export, "pdf", export["queryset"], url_liste
+    )
+    if redirection:
+        return redirection
+
+    # Rendu dans un fichier temporaire (supprimé à sa fermeture) puis diffusé
+    fichier = tempfile.TemporaryFile()
+    ecrire_pdf_liste(fichier, export)
+    fichier.seek(0)
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=f"{export['nom']}_{timezone.now():%Y%m%d}.pdf",
+        content_type="application/pdf",
+    )
+
+
+def _compter(elements, progression, pas):
+    """Parcourt `elements` en appelant progression(n) toutes les `pas` lignes"""
+    n = 0
+    for n, element in enumerate(elements, start=1):
+        yield element
+        if n % pas == 0:
+            progression(n)
+    progression(n)
+
+
+def ecrire_export(type_export, format_export, params, fichier, progression=None):
+    """
+    Écrit l'export dans `fichier` (binaire, ouvert en écriture).
+    `progression(n)` est appelée toutes les EXPORT_CHUNK_SIZE lignes.
+    """
+    export = get_export_liste(type_export, params)
+    progression = progression or (lambda n: None)
+    pas = settings.EXPORT_CHUNK_SIZE
+
+    if format_export == "csv":
+        lignes = _compter(export["lignes"](export["queryset"]), progression, pas)
+        for ligne in iter_csv(export["entete"], lignes):
+            fichier.write(ligne.encode("utf-8"))
+    elif format_export == "pdf":
+        lignes = _compter(export["lignes"](export["queryset"]), progression, pas)
+        ecrire_pdf_liste(fichier, export, lignes=lignes)
+    elif format_export == "zip" and type_export == "factures":
+        from factures.utils import iter_zip_factures
+
+        factures = (
+            export["queryset"].select_related("client", "projet").iterator(chunk_size=200)
+        )
+        # Un PDF par facture : progression plus fine que pour les lignes
+        for morceau in iter_zip_factures(_compter(factures, progression, 10)):
+            fichier.write(morceau)
+    else:
+        raise ValueError(f"Format {format_export} indisponible pour {type_export}")
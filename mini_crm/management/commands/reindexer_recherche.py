@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mini_crm.recherche import SOURCES_RECHERCHE, reindexer
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "types",
+            nargs="*",
+            help=f"Types à réindexer ({', '.join(SOURCES_RECHERCHE)})",
+        )
+
+    def handle(self, *args, **options):
+        inconnus = set(options["types"]) - set(SOURCES_RECHERCHE)
+        if inconnus:
+            raise CommandError(f"Types inconnus : {', '.join(sorted(inconnus))}")
+        for type_objet, nombre in reindexer(options["types"]).items():
+            self.stdout.write(f"{type_objet} : {nombre} documents")
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit"))
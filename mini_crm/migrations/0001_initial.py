@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_export', models.CharField(choices=[('clients', 'Clients'), ('projets', 'Projets'), ('factures', 'Factures')], max_length=20)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('pdf', 'PDF'), ('zip', 'ZIP des PDF')], max_length=10)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('total_lignes', models.PositiveIntegerField(blank=True, null=True)),
+                ('lignes_traitees', models.PositiveIntegerField(default=0)),
+                ('fichier', models.CharField(blank=True, max_length=255)),
+                ('taille', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export',
+                'verbose_name_plural': 'Exports',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
@@ -0,0 +1,187 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:02
+
+from django.db import migrations, models
+from django.urls import reverse
+
+TAILLE_LOT = 500
+
+# Index plein texte selon la base : table FTS5 synchronisée par triggers
+# (SQLite) ou colonne tsvector générée indexée en GIN (PostgreSQL)
+INDEX_SQL = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE mini_crm_recherche_fts USING fts5(
+            titre, contenu,
+            content='mini_crm_documentrecherche', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER mini_crm_recherche_ai AFTER INSERT ON mini_crm_documentrecherche
+        BEGIN
+            INSERT INTO mini_crm_recherche_fts(rowid, titre, contenu)
+            VALUES (new.id, new.titre, new.contenu);
+        END
+        """,
+        """
+        CREATE TRIGGER mini_crm_recherche_ad AFTER DELETE ON mini_crm_documentrecherche
+        BEGIN
+            INSERT INTO mini_crm_recherche_fts(mini_crm_recherche_fts, rowid, titre, contenu)
+            VALUES ('delete', old.id, old.titre, old.contenu);
+        END
+        """,
+        """
+        CREATE TRIGGER mini_crm_recherche_au AFTER UPDATE ON mini_crm_documentrecherche
+        BEGIN
+            INSERT INTO mini_crm_recherche_fts(mini_crm_recherche_fts, rowid, titre, contenu)
+            VALUES ('delete', old.id, old.titre, old.contenu);
+            INSERT INTO mini_crm_recherche_fts(rowid, titre, contenu)
+            VALUES (new.id, new.titre, new.contenu);
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        ALTER TABLE mini_crm_documentrecherche ADD COLUMN vecteur tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple'::regconfig, coalesce(titre, '')), 'A')
+            || setweight(to_tsvector('simple'::regconfig, coalesce(contenu, '')), 'B')
+        ) STORED
+        """,
+        """
+        CREATE INDEX mini_crm_recherche_vecteur
+        ON mini_crm_documentrecherche USING GIN (vecteur)
+        """,
+    ],
+}
+SUPPRESSION_SQL = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS mini_crm_recherche_ai",
+        "DROP TRIGGER IF EXISTS mini_crm_recherche_ad",
+        "DROP TRIGGER IF EXISTS mini_crm_recherche_au",
+        "DROP TABLE IF EXISTS mini_crm_recherche_fts",
+    ],
+    "postgresql": [
+        "DROP INDEX IF EXISTS mini_crm_recherche_vecteur",
+        "ALTER TABLE mini_crm_documentrecherche DROP COLUMN IF EXISTS vecteur",
+    ],
+}
+
+
+def creer_index(apps, schema_editor):
+    for sql in INDEX_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def _nom_client(client):
+    return f"{client.prenom} {client.nom}" if client.prenom else client.nom
+
+
+def _documents(apps):
+    """
+    Objets à indexer, par type : (queryset, fonction objet -> (titre,
+    contenu, lien)). Reprend les documents de *.services.document_recherche_*
+    sur les modèles historiques.
+    """
+    Client = apps.get_model("clients", "Client")
+    Interaction = apps.get_model("clients", "Interaction")
+    Projet = apps.get_model("projets", "Projet")
+    Facture = apps.get_model("factures", "Facture")
+    return {
+        "client": (
+            Client.objects.all(),
+            lambda c: (
+                _nom_client(c),
+                " ".join(
+                    filter(
+                        None,
+                        [c.nom, c.prenom, c.email, c.telephone, c.ville, c.notes],
+                    )
+                ),
+                reverse("clients:client_detail", args=[c.pk]),
+            ),
+        ),
+        "projet": (
+            Projet.objects.select_related("client"),
+            lambda p: (
+                p.titre,
+                f"{p.client.nom} {p.description}",
+                reverse("projets:projet_detail", args=[p.pk]),
+            ),
+        ),
+        "facture": (
+            Facture.objects.select_related("client", "projet"),
+            lambda f: (
+                f.numero,
+                f"{f.client.nom} {f.projet.titre} {f.notes}",
+                reverse("factures:facture_detail", args=[f.pk]),
+            ),
+        ),
+        "interaction": (
+            Interaction.objects.select_related("client"),
+            lambda i: (
+                f"{i.get_type_display()} - {_nom_client(i.client)}",
+                i.description,
+                reverse("clients:client_detail", args=[i.client_id]),
+            ),
+        ),
+    }
+
+
+def remplir_documents(apps, schema_editor):
+    """Documents des objets existants, insérés par lots"""
+    DocumentRecherche = apps.get_model("mini_crm", "DocumentRecherche")
+    for type_objet, (queryset, construire) in _documents(apps).items():
+        lot = []
+        for objet in queryset.iterator(chunk_size=TAILLE_LOT):
+            titre, contenu, lien = construire(objet)
+            lot.append(
+                DocumentRecherche(
+                    type=type_objet,
+                    objet_id=objet.pk,
+                    titre=titre[:255],
+                    contenu=contenu,
+                    lien=lien,
+                )
+            )
+            if len(lot) == TAILLE_LOT:
+                DocumentRecherche.objects.bulk_create(lot)
+                lot = []
+        DocumentRecherche.objects.bulk_create(lot)
+
+
+def supprimer_index(apps, schema_editor):
+    for sql in SUPPRESSION_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mini_crm', '0001_initial'),
+        ('clients', '0004_tag_interaction_client_tags'),
+        ('projets', '0001_initial'),
+        ('factures', '0004_echeancierfacturation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('client', 'Client'), ('projet', 'Projet'), ('facture', 'Facture'), ('interaction', 'Interaction')], max_length=20)),
+                ('objet_id', models.PositiveBigIntegerField()),
+                ('titre', models.CharField(max_length=255)),
+                ('contenu', models.TextField(blank=True)),
+                ('lien', models.CharField(blank=True, max_length=255)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'constraints': [models.UniqueConstraint(fields=('type', 'objet_id'), name='document_recherche_unique')],
+            },
+        ),
+        migrations.RunPython(creer_index, supprimer_index),
+        migrations.RunPython(remplir_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class ExportJob(models.Model):
+    """
+    Export d'une liste (clients, projets, factures) exécuté en arrière-plan
+    par Celery. Le fichier produit est conservé dans le stockage par défaut.
+    """
+
+    TYPE_CHOICES = [
+        ("clients", "Clients"),
+        ("projets", "Projets"),
+        ("factures", "Factures"),
+    ]
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("pdf", "PDF"),
+        ("zip", "ZIP des PDF"),
+    ]
+    STATUT_CHOICES = [
+        ("en_attente", "En attente"),
+        ("en_cours", "En cours"),
+        ("termine", "Terminé"),
+        ("echec", "Échec"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="exports")
+    type_export = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    # Filtres de la liste (paramètres GET)
+    params = models.JSONField(default=dict, blank=True)
+    statut = models.CharField(
+        max_length=20, choices=STATUT_CHOICES, default="en_attente"
+    )
+
+    # Progression en nombre de lignes
+    total_lignes = models.PositiveIntegerField(null=True, blank=True)
+    lignes_traitees = models.PositiveIntegerField(default=0)
+
+    # Nom du fichier produit dans le stockage
+    fichier = models.CharField(max_length=255, blank=True)
+    taille = models.PositiveBigIntegerField(null=True, blank=True)
+    erreur = models.TextField(blank=True)
+
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Export"
+        verbose_name_plural = "Exports"
+        ordering = ["-date_creation"]
+
+    def __str__(self):
+        return f"Export {self.type_export} ({self.format}) - {self.get_statut_display()}"
+
+    @property
+    def progression(self):
+        """Pourcentage de lignes traitées, None tant que le total est inconnu"""
+        if self.statut == "termine":
+            return 100
+        if not self.total_lignes:
+            return None
+        return min(100, int(self.lignes_traitees * 100 / self.total_lignes))
+
+    @property
+    def nom_telechargement(self):
+        return f"{self.type_export}_{self.date_creation:%Y%m%d_%H%M%S}.{self.format}"
+
+
+class DocumentRecherche(models.Model):
+    """
+    Texte indexé d'un objet (client, projet, facture, interaction) pour la
+    recherche plein texte. L'index lui-même dépend de la base : table FTS5
+    sous SQLite, colonne tsvector et index GIN sous PostgreSQL (voir la
+    migration 0002 et mini_crm.recherche).
+    """
+
+    TYPE_CHOICES = [
+        ("client", "Client"),
+        ("projet", "Projet"),
+        ("facture", "Facture"),
+        ("interaction", "Interaction"),
+    ]
+
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    objet_id = models.PositiveBigIntegerField()
+    titre = models.CharField(max_length=255)
+    contenu = models.TextField(blank=True)
+    # Page de l'objet dans l'interface
+    lien = models.CharField(max_length=255, blank=True)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["type", "objet_id"], name="document_recherche_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_display()} {self.objet_id} - {self.titre}"
@@ -0,0 +1,102 @@
+"""
+Pagination par curseur (keyset) des listes triées par date décroissante.
+
+La page suivante est sélectionnée par « (date, id) < dernier élément affiché »
+au lieu d'un OFFSET : le coût d'une page ne dépend pas de sa profondeur et
+aucun COUNT n'est nécessaire (une ligne de plus est lue pour savoir s'il
+existe une page suivante).
+"""
+
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db.models import Q
+
+
+@dataclass
+class PageCurseur:
+    elements: list
+    has_next: bool = False
+    has_previous: bool = False
+    curseur_suivant: str = ""
+    curseur_precedent: str = ""
+    liens: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+
+def encoder_curseur(date, pk):
+    """Curseur opaque d'un élément : date ISO et identifiant"""
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{pk}".encode()).decode()
+
+
+def decoder_curseur(curseur):
+    """Retourne (date, id) du curseur, ou None s'il est absent ou invalide"""
+    if not curseur:
+        return None
+    try:
+        date, pk = base64.urlsafe_b64decode(curseur.encode()).decode().split("|")
+        return datetime.fromisoformat(date), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def paginer_par_curseur(queryset, params, champ_date, par_page=10):
+    """
+    Page de `queryset` triée par (`champ_date`, id) décroissants.
+    `params` (request.GET) peut contenir `apres` (page suivante) ou `avant`
+    (page précédente) ; un curseur invalide ramène à la première page.
+    """
+    apres = decoder_curseur(params.get("apres"))
+    avant = None if apres else decoder_curseur(params.get("avant"))
+
+    if avant:
+        date, pk = avant
+        # Page précédente : lecture en ordre croissant à partir du curseur
+        lignes = list(
+            queryset.filter(
+                Q(**{f"{champ_date}__gt": date}) | Q(**{champ_date: date, "id__gt": pk})
+            ).order_by(champ_date, "id")[: par_page + 1]
+        )
+        if len(lignes) <= par_page:
+            # Retour en tête de liste : première page complète
+            avant = None
+        else:
+            page = PageCurseur(
+                list(reversed(lignes[:par_page])), has_next=True, has_previous=True
+            )
+    if not avant:
+        if apres:
+            date, pk = apres
+            queryset = queryset.filter(
+                Q(**{f"{champ_date}__lt": date}) | Q(**{champ_date: date, "id__lt": pk})
+            )
+        lignes = list(queryset.order_by(f"-{champ_date}", "-id")[: par_page + 1])
+        page = PageCurseur(
+            lignes[:par_page],
+            has_next=len(lignes) > par_page,
+            has_previous=apres is not None,
+        )
+
+    if page.elements:
+        premier, dernier = page.elements[0], page.elements[-1]
+        page.curseur_precedent = encoder_curseur(getattr(premier, champ_date), premier.pk)
+        page.curseur_suivant = encoder_curseur(getattr(dernier, champ_date), dernier.pk)
+
+    # Liens conservant les filtres de la liste
+    for cle, curseur, disponible in [
+        ("avant", page.curseur_precedent, page.has_previous),
+        ("apres", page.curseur_suivant, page.has_next),
+    ]:
+        if disponible and curseur:
+            parametres = params.copy()
+            for ancien in ("page", "apres", "avant"):
+                parametres.pop(ancien, None)
+            parametres[cle] = curseur
+            page.liens[cle] = f"?{parametres.urlencode()}"
+    return page
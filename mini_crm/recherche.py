@@ -0,0 +1,260 @@
+"""
+Recherche plein texte sur les clients, projets, factures et interactions.
+
+Chaque objet indexé a un DocumentRecherche (titre, contenu, lien) tenu à
+jour par les signaux post_save / post_delete (mini_crm.signals). L'index
+dépend de la base :
+
+- SQLite : table virtuelle FTS5, alimentée par triggers, classement bm25 ;
+- PostgreSQL : colonne tsvector générée, index GIN, classement ts_rank ;
+- autres bases : recherche icontains sur les documents (sans index).
+
+Chaque mot saisi est cherché en préfixe (« dup » trouve « Dupont ») et tous
+les mots doivent être présents.
+"""
+
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import DocumentRecherche
+
+# Objets indexés, par type : modèle, fonction objet -> (titre, contenu, lien),
+# jointures utiles au document, relations dont le document reprend le nom
+# de l'objet et champs de ce nom (les relations ne sont réindexées que
+# lorsqu'ils changent)
+SOURCES_RECHERCHE = {
+    "client": {
+        "modele": "clients.Client",
+        "document": "clients.services.document_recherche_client",
+        "select_related": [],
+        "dependants": ["projets", "factures", "interactions"],
+        "champs_dependants": ["nom", "prenom"],
+    },
+    "projet": {
+        "modele": "projets.Projet",
+        "document": "projets.services.document_recherche_projet",
+        "select_related": ["client"],
+        "dependants": ["factures"],
+        "champs_dependants": ["titre"],
+    },
+    "facture": {
+        "modele": "factures.Facture",
+        "document": "factures.services.document_recherche_facture",
+        "select_related": ["client", "projet"],
+        "dependants": [],
+        "champs_dependants": [],
+    },
+    "interaction": {
+        "modele": "clients.Interaction",
+        "document": "clients.services.document_recherche_interaction",
+        "select_related": ["client"],
+        "dependants": [],
+        "champs_dependants": [],
+    },
+}
+TAILLE_LOT_INDEX = 500
+TABLE_FTS = "mini_crm_recherche_fts"
+TABLE_DOCUMENTS = DocumentRecherche._meta.db_table
+
+
+def get_modele(type_objet):
+    return apps.get_model(SOURCES_RECHERCHE[type_objet]["modele"])
+
+
+def type_de_modele(modele):
+    """Type de recherche d'un modèle, None s'il n'est pas indexé"""
+    label = modele._meta.label
+    for type_objet, source in SOURCES_RECHERCHE.items():
+        if source["modele"] == label:
+            return type_objet
+    return None
+
+
+def indexer_objets(type_objet, objets):
+    """
+    Crée ou met à jour les documents de `objets` par INSERT groupés
+    (ON CONFLICT DO UPDATE). Retourne le nombre d'objets indexés.
+    """
+    construire = import_string(SOURCES_RECHERCHE[type_objet]["document"])
+    documents = []
+    for objet in objets:
+        titre, contenu, lien = construire(objet)
+        documents.append(
+            DocumentRecherche(
+                type=type_objet,
+                objet_id=objet.pk,
+                titre=titre[:255],
+                contenu=contenu,
+                lien=lien,
+            )
+        )
+    DocumentRecherche.objects.bulk_create(
+        documents,
+        batch_size=TAILLE_LOT_INDEX,
+        update_conflicts=True,
+        unique_fields=["type", "objet_id"],
+        update_fields=["titre", "contenu", "lien", "date_maj"],
+    )
+    return len(documents)
+
+
+def indexer_queryset(type_objet, queryset):
+    """Indexe un queryset par lots, jointures du document comprises"""
+    queryset = queryset.select_related(*SOURCES_RECHERCHE[type_objet]["select_related"])
+    total = 0
+    lot = []
+    for objet in queryset.iterator(chunk_size=TAILLE_LOT_INDEX):
+        lot.append(objet)
+        if len(lot) == TAILLE_LOT_INDEX:
+            total += indexer_objets(type_objet, lot)
+            lot = []
+    return total + indexer_objets(type_objet, lot)
+
+
+def valeurs_dependants(objet):
+    """
+    Valeurs des champs de l'objet repris dans les documents de ses
+    dépendants (nom du client, titre du projet). None si l'un n'est pas
+    chargé.
+    """
+    champs = SOURCES_RECHERCHE[type_de_modele(type(objet))]["champs_dependants"]
+    if set(champs) & objet.get_deferred_fields():
+        return None
+    return tuple(getattr(objet, champ) for champ in champs)
+
+
+def indexer(objet, cree=False):
+    """
+    Indexe un objet enregistré et, si son nom a changé depuis sa lecture
+    (Client.from_db, Projet.from_db), les objets dont le document le
+    reprend (factures d'un projet renommé par exemple)
+    """
+    type_objet = type_de_modele(type(objet))
+    indexer_objets(type_objet, [objet])
+    relations = SOURCES_RECHERCHE[type_objet]["dependants"]
+    if not relations:
+        return
+    enregistrees = getattr(objet, "_valeurs_dependants", None)
+    valeurs = valeurs_dependants(objet)
+    objet._valeurs_dependants = valeurs
+    # Valeurs inconnues (instance construite à la main, champs différés) :
+    # les dépendants sont réindexés par précaution
+    if cree or (enregistrees is not None and enregistrees == valeurs):
+        return
+    for relation in relations:
+        dependants = getattr(objet, relation).all()
+        indexer_queryset(type_de_modele(dependants.model), dependants)
+
+
+def desindexer(objet):
+    DocumentRecherche.objects.filter(
+        type=type_de_modele(type(objet)), objet_id=objet.pk
+    ).delete()
+
+
+def reindexer(types=None):
+    """
+    Reconstruit l'index des `types` (tous par défaut) : documents recréés
+    et documents des objets supprimés retirés. Retourne {type: nombre}.
+    """
+    resultat = {}
+    for type_objet in types or SOURCES_RECHERCHE:
+        modele = get_modele(type_objet)
+        resultat[type_objet] = indexer_queryset(type_objet, modele.objects.all())
+        DocumentRecherche.objects.filter(type=type_objet).exclude(
+            objet_id__in=modele.objects.values("pk")
+        ).delete()
+    return resultat
+
+
+def mots_recherche(texte):
+    """Mots (lettres et chiffres) de la saisie"""
+    return re.findall(r"\w+", texte or "")
+
+
+def _requete_index(texte, types=None):
+    """
+    SQL (et paramètres) des documents correspondant à `texte` :
+    colonnes id, type, objet_id, titre, contenu, lien, score (plus grand =
+    plus pertinent). None si la saisie ne contient aucun mot.
+    """
+    mots = mots_recherche(texte)
+    if not mots:
+        return None
+    filtre_types, params_types = "", []
+    if types:
+        filtre_types = f" AND d.type IN ({', '.join(['%s'] * len(types))})"
+        params_types = list(types)
+    colonnes = "d.id, d.type, d.objet_id, d.titre, d.contenu, d.lien"
+
+    if connection.vendor == "sqlite":
+        # bm25 est négatif (plus petit = meilleur) ; le titre pèse 10 fois plus
+        expression = " ".join(f'"{mot}"*' for mot in mots)
+        sql = (
+            f"SELECT {colonnes}, -bm25({TABLE_FTS}, 10.0, 1.0) AS score "
+            f"FROM {TABLE_FTS} JOIN {TABLE_DOCUMENTS} d ON d.id = {TABLE_FTS}.rowid "
+            f"WHERE {TABLE_FTS} MATCH %s{filtre_types}"
+        )
+        return sql, [expression] + params_types
+    if connection.vendor == "postgresql":
+        expression = " & ".join(f"{mot}:*" for mot in mots)
+        sql = (
+            f"SELECT {colonnes}, ts_rank(d.vecteur, to_tsquery('simple', %s)) AS score "
+            f"FROM {TABLE_DOCUMENTS} d "
+            f"WHERE d.vecteur @@ to_tsquery('simple', %s){filtre_types}"
+        )
+        return sql, [expression, expression] + params_types
+
+    # Base sans index plein texte : chaque mot dans le titre ou le contenu
+    conditions = " AND ".join(
+        "(UPPER(d.titre) LIKE UPPER(%s) OR UPPER(d.contenu) LIKE UPPER(%s))"
+        for _ in mots
+    )
+    params = [f"%{mot}%" for mot in mots for _ in range(2)]
+    sql = (
+        f"SELECT {colonnes}, 1.0 AS score FROM {TABLE_DOCUMENTS} d "
+        f"WHERE {conditions}{filtre_types}"
+    )
+    return sql, params + params_types
+
+
+def rechercher(texte, types=None, limite=20):
+    """
+    Recherche globale : liste des résultats classés par pertinence
+    (type, id, titre, extrait, lien, score)
+    """
+    requete = _requete_index(texte, types)
+    if requete is None:
+        return []
+    sql, params = requete
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} ORDER BY score DESC, d.id LIMIT %s", params + [limite])
+        lignes = cursor.fetchall()
+    return [
+        {
+            "type": type_objet,
+            "id": objet_id,
+            "titre": titre,
+            "extrait": contenu[:200],
+            "lien": lien,
+            "score": round(float(score), 4),
+        }
+        for _, type_objet, objet_id, titre, contenu, lien, score in lignes
+    ]
+
+
+def filtrer_par_recherche(queryset, texte):
+    """
+    Restreint `queryset` (modèle indexé) aux objets correspondant à
+    `texte`, par une sous-requête sur l'index. Sans mot, le queryset est
+    retourné tel quel.
+    """
+    requete = _requete_index(texte, [type_de_modele(queryset.model)])
+    if requete is None:
+        return queryset
+    sql, params = requete
+    return queryset.filter(pk__in=RawSQL(f"SELECT objet_id FROM ({sql}) r", params))
@@ -12,9 +12,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 from logging.handlers import RotatingFileHandler  # noqa: F401 (used via LOGGING config)
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -125,11 +127,18 @@ DATABASES = {
     }
 }
 
-# Priorité aux tests → SQLite en mémoire
+# Priorité aux tests → SQLite. La base de test est un fichier temporaire
+# plutôt qu'en mémoire pour être partagée entre threads et processus
+# (tests de concurrence)
 if os.environ.get("TESTING") == "True":
     DATABASES["default"] = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
+        "TEST": {
+            "NAME": os.path.join(
+                tempfile.gettempdir(), f"mini_crm_tests_{os.getpid()}.sqlite3"
+            )
+        },
     }
 # Utiliser DATABASE_URL si fourni (dev/prod) sinon la config par défaut reste SQLite
 elif os.environ.get("DATABASE_URL"):
@@ -238,10 +247,108 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
+CELERY_BEAT_SCHEDULE = {
+    "nettoyer-pdfs-orphelins": {
+        "task": "factures.tasks.nettoyer_pdfs_orphelins",
+        "schedule": crontab(hour=3, minute=0),  # Tous les jours à 3h
+    },
+    "purger-exports": {
+        "task": "mini_crm.tasks.purger_exports",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "facturer-echeanciers": {
+        "task": "factures.tasks.facturer_echeanciers",
+        "schedule": crontab(hour=6, minute=0),
+    },
+}
+# Exécution synchrone des tâches pendant les tests, sans broker
+if os.environ.get("TESTING") == "True":
+    CELERY_TASK_ALWAYS_EAGER = True
+    CELERY_BROKER_URL = "memory://"
+    CELERY_RESULT_BACKEND = "cache+memory://"
+    # Celery donne priorité aux variables d'environnement (chargées depuis .env)
+    os.environ["CELERY_BROKER_URL"] = CELERY_BROKER_URL
+    os.environ["CELERY_RESULT_BACKEND"] = CELERY_RESULT_BACKEND
+
+# Pré-rendu des PDF de factures par Celery après chaque enregistrement.
+# Tant que le PDF n'est pas prêt, le téléchargement répond 202 ; passé
+# PDF_PRERENDU_DELAI secondes (worker absent), il est rendu dans la requête.
+# À activer explicitement là où un worker tourne (docker-compose.prod.yml) :
+# sans worker, chaque premier téléchargement attendrait le délai.
+PDF_PRERENDU = (
+    os.environ.get("PDF_PRERENDU", "False").lower() == "true"
+    and os.environ.get("TESTING") != "True"
+)
+PDF_PRERENDU_DELAI = int(os.environ.get("PDF_PRERENDU_DELAI", "30"))
+# Rendus PDF simultanés par serveur lors des téléchargements ; au-delà de
+# PDF_RENDU_ATTENTE secondes d'attente, la requête répond 503
+PDF_RENDUS_SIMULTANES = int(os.environ.get("PDF_RENDUS_SIMULTANES", "2"))
+PDF_RENDU_ATTENTE = float(os.environ.get("PDF_RENDU_ATTENTE", "10"))
+# Livraison des PDF par nginx (X-Accel-Redirect) : Django ne fait que le
+# contrôle d'accès. Désactivé en développement (diffusion par Django)
+PDF_X_ACCEL_REDIRECT = os.environ.get("PDF_X_ACCEL_REDIRECT", "False").lower() == "true"
+PDF_X_ACCEL_PREFIX = os.environ.get("PDF_X_ACCEL_PREFIX", "/protected-media/")
+# Moteur de rendu des factures : "reportlab" (mise en page programmée) ou
+# "weasyprint" (gabarit HTML/CSS, nécessite Pango). Voir bench_pdf --moteurs
+PDF_MOTEUR = os.environ.get("PDF_MOTEUR", "reportlab")
+# Moteur WeasyPrint uniquement : polices réduites aux glyphes utilisés,
+# images optimisées et flux compressés. Sans effet avec ReportLab, dont le
+# rendu est déjà compressé
+PDF_COMPACT = os.environ.get("PDF_COMPACT", "True").lower() == "true"
+PDF_VERROUS_DIR = os.environ.get(
+    "PDF_VERROUS_DIR", os.path.join(tempfile.gettempdir(), "mini_crm_pdf")
+)
+
+# Exports CSV diffusés en flux : nombre de lignes lues par bloc
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))
+# Exports PDF des listes : lignes par tableau
+EXPORT_PDF_TAILLE_BLOC = int(os.environ.get("EXPORT_PDF_TAILLE_BLOC", "500"))
+# Nombre de lignes au-delà duquel un export est produit en tâche de fond
+# (ExportJob, notification à la fin) plutôt que dans la requête
+EXPORT_CSV_LIGNES_MAX = int(os.environ.get("EXPORT_CSV_LIGNES_MAX", "100000"))
+EXPORT_PDF_LIGNES_MAX = int(os.environ.get("EXPORT_PDF_LIGNES_MAX", "2000"))
+EXPORT_ZIP_LIGNES_MAX = int(os.environ.get("EXPORT_ZIP_LIGNES_MAX", "200"))
+# Durée de conservation des exports générés
+EXPORT_RETENTION_JOURS = int(os.environ.get("EXPORT_RETENTION_JOURS", "7"))
+# Facturation récurrente : échéanciers traités par transaction
+FACTURATION_TAILLE_LOT = int(os.environ.get("FACTURATION_TAILLE_LOT", "500"))
+# Cache partagé entre les serveurs web et les workers Celery (Redis) : une
+# invalidation par signal dans un processus (gabarit des factures,
+# indicateurs) vaut pour tous. Cache mémoire local par processus sans
+# REDIS_URL (développement, tests) : chaque processus ne voit que ses
+# propres invalidations
+if os.environ.get("REDIS_URL") and os.environ.get("TESTING") != "True":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL"),
+            "KEY_PREFIX": "mini_crm",
+        }
+    }
+# Durée de mise en cache des indicateurs du tableau de bord (secondes) ;
+# les modifications de factures, projets et clients invalident le cache
+DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", "60"))
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Stockage des PDF générés : disque local (MEDIA_ROOT) par défaut. Pour
+# plusieurs serveurs web, utiliser un stockage partagé (ex. S3 avec
+# django-storages) via PDF_STORAGE_BACKEND.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "factures_pdf": {
+        "BACKEND": os.environ.get(
+            "PDF_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage"
+        ),
+    },
+}
+
 # Configuration Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -374,6 +481,9 @@ SPECTACULAR_SETTINGS = {
         {"name": "clients", "description": "Gestion des clients"},
         {"name": "factures", "description": "Gestion des factures"},
         {"name": "projets", "description": "Gestion des projets"},
+        {"name": "recherche", "description": "Recherche globale"},
+        {"name": "dashboard", "description": "Indicateurs du tableau de bord"},
+        {"name": "exports", "description": "Exports en arrière-plan"},
         {"name": "authentification", "description": "Authentification"},
     ],
     "SECURITY": [{"Token": []}],
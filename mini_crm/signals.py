@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+
+from clients.models import Client
+from factures.models import Facture
+from projets.models import Projet
+
+from .dashboard.services import DashboardMetrics
+from .recherche import SOURCES_RECHERCHE, desindexer, get_modele, indexer
+
+
+def indexer_objet_enregistre(sender, instance, created=False, raw=False, **kwargs):
+    """Met à jour le document de recherche d'un objet enregistré"""
+    if not raw:
+        indexer(instance, cree=created)
+
+
+def desindexer_objet_supprime(sender, instance, **kwargs):
+    desindexer(instance)
+
+
+for type_objet in SOURCES_RECHERCHE:
+    modele = get_modele(type_objet)
+    post_save.connect(
+        indexer_objet_enregistre, sender=modele, dispatch_uid=f"recherche_{type_objet}"
+    )
+    post_delete.connect(
+        desindexer_objet_supprime, sender=modele, dispatch_uid=f"recherche_{type_objet}"
+    )
+
+
+def invalider_tableau_de_bord(sender, **kwargs):
+    """
+    Une facture, un projet ou un client modifié invalide les indicateurs et
+    les statistiques d'en-tête (cache partagé)
+    """
+    DashboardMetrics.invalider()
+
+
+for modele in (Client, Facture, Projet):
+    post_save.connect(
+        invalider_tableau_de_bord,
+        sender=modele,
+        dispatch_uid=f"dashboard_{modele._meta.label_lower}",
+    )
+    post_delete.connect(
+        invalider_tableau_de_bord,
+        sender=modele,
+        dispatch_uid=f"dashboard_{modele._meta.label_lower}",
+    )
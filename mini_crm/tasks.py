@@ -0,0 +1,108 @@
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .exports import ecrire_export, get_export_liste
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+
+def dossier_exports(user_id):
+    """Dossier des exports d'un utilisateur dans le stockage par défaut"""
+    return f"exports/{user_id}"
+
+
+def lancer_export(user, type_export, format_export, params):
+    """
+    Crée l'ExportJob et planifie son exécution une fois la transaction validée
+    """
+    job = ExportJob.objects.create(
+        user=user, type_export=type_export, format=format_export, params=params
+    )
+
+    def envoyer():
+        try:
+            executer_export.delay(job.id)
+        except Exception as e:
+            logger.warning(f"Export {job.id} non planifié : {e}")
+            ExportJob.objects.filter(pk=job.pk).update(
+                statut="echec", erreur="File d'attente indisponible"
+            )
+
+    transaction.on_commit(envoyer)
+    return job
+
+
+@shared_task
+def executer_export(job_id):
+    """
+    Produit le fichier d'un ExportJob dans le stockage, en enregistrant la
+    progression, puis notifie l'utilisateur
+    """
+    from notifications.services import NotificationService
+
+    job = ExportJob.objects.select_related("user").get(pk=job_id)
+    job.statut = "en_cours"
+    job.date_debut = timezone.now()
+    job.total_lignes = get_export_liste(job.type_export, job.params)["queryset"].count()
+    job.save(update_fields=["statut", "date_debut", "total_lignes"])
+
+    def progression(lignes):
+        ExportJob.objects.filter(pk=job.pk).update(lignes_traitees=lignes)
+
+    # Rendu dans un fichier temporaire puis copie dans le stockage
+    descripteur, chemin = tempfile.mkstemp(suffix=f".{job.format}")
+    try:
+        with os.fdopen(descripteur, "wb") as f:
+            ecrire_export(job.type_export, job.format, job.params, f, progression)
+        with open(chemin, "rb") as f:
+            job.fichier = default_storage.save(
+                f"{dossier_exports(job.user_id)}/{job.id}_{job.nom_telechargement}",
+                File(f),
+            )
+    except Exception as e:
+        logger.exception(f"Échec de l'export {job.id}")
+        job.statut = "echec"
+        job.erreur = str(e)
+        job.date_fin = timezone.now()
+        job.save(update_fields=["statut", "erreur", "date_fin"])
+        return None
+    finally:
+        os.remove(chemin)
+
+    job.refresh_from_db(fields=["lignes_traitees"])
+    job.statut = "termine"
+    job.taille = default_storage.size(job.fichier)
+    job.date_fin = timezone.now()
+    job.save(update_fields=["fichier", "statut", "taille", "date_fin"])
+
+    NotificationService.creer_notification(
+        job.user,
+        "EXPORT",
+        f"Votre export {job.get_type_export_display().lower()} "
+        f"({job.get_format_display()}) est prêt.",
+        lien=reverse("telecharger_export", args=[job.id]),
+    )
+    logger.info(f"Export {job.id} terminé : {job.fichier}")
+    return job.fichier
+
+
+@shared_task
+def purger_exports():
+    """Tâche planifiée : supprime les exports plus anciens que EXPORT_RETENTION_JOURS"""
+    limite = timezone.now() - timedelta(days=settings.EXPORT_RETENTION_JOURS)
+    anciens = ExportJob.objects.filter(date_creation__lt=limite)
+    for fichier in anciens.exclude(fichier="").values_list("fichier", flat=True):
+        default_storage.delete(fichier)
+    supprimes, _ = anciens.delete()
+    return supprimes
@@ -1,20 +1,19 @@
 from django import template
-from django.db.models import Count
-from factures.models import Facture
-from projets.models import Projet
-from clients.models import Client
+
+from mini_crm.dashboard.services import stats_entete
+from notifications.models import Notification
 
 register = template.Library()
 
 
 @register.simple_tag
 def get_user_stats():
-    factures_en_attente = Facture.objects.filter(statut_paiement="envoyée").count()
-    projets_en_cours = Projet.objects.filter(statut="en_cours").count()
-    clients_actifs = Client.objects.filter(projets__isnull=False).distinct().count()
+    # Servies par le cache partagé, invalidé par les signaux des modèles :
+    # utilisable dans base.html sans requête supplémentaire par page
+    return stats_entete()
+
 
-    return {
-        "factures_en_attente": factures_en_attente,
-        "projets_en_cours": projets_en_cours,
-        "clients_actifs": clients_actifs,
-    }
+@register.simple_tag
+def notifications_non_lues(user):
+    """Nombre de notifications non lues de l'utilisateur"""
+    return Notification.objects.filter(user=user, lu=False).count()
@@ -0,0 +1,38 @@
+"""
+Normalisation du texte pour les colonnes de recherche : minuscules, sans
+accents ni espaces superflus (« Orléans » -> « orleans »).
+"""
+
+import unicodedata
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+
+
+def normaliser(texte):
+    """Texte en minuscules, sans accents, espaces réduits"""
+    decompose = unicodedata.normalize("NFKD", texte or "")
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c))
+    return " ".join(sans_accents.lower().split())
+
+
+def filtrer_par_mots(queryset, champs, texte):
+    """
+    Chaque mot normalisé de `texte` doit figurer dans l'un des `champs`
+    (colonnes déjà normalisées). La comparaison est un LIKE sensible à la
+    casse, sans fonction appliquée à la colonne : sous PostgreSQL, elle
+    utilise les index trigrammes des colonnes.
+    """
+    mots = normaliser(texte).split()
+    if not mots:
+        return queryset
+    return queryset.filter(
+        reduce(
+            and_,
+            (
+                reduce(or_, (Q(**{f"{champ}__contains": mot}) for champ in champs))
+                for mot in mots
+            ),
+        )
+    )
@@ -19,6 +19,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 from django.contrib.auth import views as auth_views
+from .views import telecharger_export
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -29,6 +30,7 @@ urlpatterns = [
     path("", RedirectView.as_view(url="factures/", permanent=True)),
     path("dashboard/", include("mini_crm.dashboard.urls")),
     path("notifications/", include("notifications.urls")),
+    path("exports/<int:pk>/", telecharger_export, name="telecharger_export"),
     path("", include("societe.urls")),
     # API URLs
     path("api/v1/", include("api.urls", namespace="api")),
@@ -0,0 +1,27 @@
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+
+from .models import ExportJob
+
+
+def reponse_fichier_export(job):
+    """Téléchargement du fichier d'un export terminé"""
+    if job.statut != "termine" or not default_storage.exists(job.fichier):
+        raise Http404("Export indisponible")
+    return FileResponse(
+        default_storage.open(job.fichier),
+        as_attachment=True,
+        filename=job.nom_telechargement,
+    )
+
+
+@login_required
+def telecharger_export(request, pk):
+    """
+    Téléchargement d'un export généré en arrière-plan, réservé à
+    l'utilisateur qui l'a demandé
+    """
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    return reponse_fichier_export(job)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='lien',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('ECHEANCE', 'Échéance de paiement'), ('RETARD', 'Retard de paiement'), ('CREATION', 'Nouvelle facture'), ('MODIFICATION', 'Modification de facture'), ('EXPORT', 'Export disponible')], max_length=20),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from factures.models import Facture
 
@@ -9,20 +10,37 @@ class Notification(models.Model):
         ("RETARD", "Retard de paiement"),
         ("CREATION", "Nouvelle facture"),
         ("MODIFICATION", "Modification de facture"),
+        ("EXPORT", "Export disponible"),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Index composites (user, date_creation) dans Meta.indexes
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     facture = models.ForeignKey(
         Facture, on_delete=models.CASCADE, null=True, blank=True
     )
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     message = models.TextField()
+    # Lien associé (ex. téléchargement d'un export généré en arrière-plan)
+    lien = models.CharField(max_length=255, blank=True)
     date_creation = models.DateTimeField(auto_now_add=True)
     lu = models.BooleanField(default=False)
     date_lecture = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-date_creation"]
+        indexes = [
+            # Notifications d'un utilisateur, les plus récentes d'abord
+            models.Index(
+                fields=["user", "date_creation"], name="notification_user_date_idx"
+            ),
+            # Notifications non lues (compteur du menu) : index partiel, la
+            # condition « NOT lu » est reprise telle quelle par les requêtes
+            models.Index(
+                fields=["user", "date_creation"],
+                condition=Q(lu=False),
+                name="notification_non_lue_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.type} - {self.message[:50]}"
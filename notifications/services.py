@@ -1,5 +1,4 @@
 from django.utils import timezone
-from datetime import timedelta
 from .models import Notification
 from factures.models import Facture
 from django.contrib.auth.models import User
@@ -7,20 +6,42 @@ from django.contrib.auth.models import User
 
 class NotificationService:
     @staticmethod
-    def creer_notification(user, type_notification, message, facture=None):
+    def creer_notification(user, type_notification, message, facture=None, lien=""):
         return Notification.objects.create(
-            user=user, type=type_notification, message=message, facture=facture
+            user=user,
+            type=type_notification,
+            message=message,
+            facture=facture,
+            lien=lien,
         )
 
+    @staticmethod
+    def notifier_creations(factures):
+        """
+        Notifie les membres du staff de la création de `factures`, en un
+        seul INSERT groupé. Retourne le nombre de notifications créées.
+        """
+        staff_users = list(User.objects.filter(is_staff=True))
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=user,
+                    type="CREATION",
+                    message=f"La facture {facture.numero} a été émise "
+                    f"({facture.montant} €)",
+                    facture=facture,
+                )
+                for facture in factures.only("id", "numero", "montant")
+                for user in staff_users
+            ],
+            batch_size=1000,
+        )
+        return len(notifications)
+
     @staticmethod
     def verifier_echeances():
         """Vérifie les factures dont l'échéance approche"""
-        date_limite = timezone.now().date() + timedelta(days=7)
-        factures = Facture.objects.filter(
-            date_echeance__lte=date_limite,
-            date_echeance__gt=timezone.now().date(),
-            statut_paiement="envoyée",
-        )
+        factures = Facture.objects.echeance_proche(jours=7)
 
         for facture in factures:
             jours_restants = (facture.date_echeance - timezone.now().date()).days
@@ -35,9 +56,7 @@ class NotificationService:
     @staticmethod
     def verifier_retards():
         """Vérifie les factures en retard de paiement"""
-        factures = Facture.objects.filter(
-            date_echeance__lt=timezone.now().date(), statut_paiement="envoyée"
-        )
+        factures = Facture.objects.en_retard()
 
         for facture in factures:
             jours_retard = (timezone.now().date() - facture.date_echeance).days
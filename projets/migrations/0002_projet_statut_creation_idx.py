@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_interaction_client_date_idx'),
+        ('projets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['statut', 'date_creation'], name='projet_statut_creation_idx'),
+        ),
+    ]
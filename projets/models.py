@@ -27,6 +27,22 @@ class Projet(models.Model):
     def __str__(self):
         return self.titre
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from mini_crm.recherche import valeurs_dependants
+
+        instance = super().from_db(db, field_names, values)
+        # Titre enregistré : les documents des factures ne sont réindexés que
+        # s'il change
+        instance._valeurs_dependants = valeurs_dependants(instance)
+        return instance
+
     class Meta:
         verbose_name = "Projet"
         verbose_name_plural = "Projets"
+        indexes = [
+            # Projets par statut (tableau de bord, liste filtrée triée par création)
+            models.Index(
+                fields=["statut", "date_creation"], name="projet_statut_creation_idx"
+            )
+        ]
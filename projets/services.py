@@ -0,0 +1,148 @@
+from django.db.models import (
+    Count,
+    DecimalField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+
+from factures.models import STATUTS_ENCOURS, STATUTS_FACTURES, Facture
+from mini_crm.exports import iter_projection
+from mini_crm.recherche import filtrer_par_recherche
+
+from .models import Projet
+
+EXPORT_ENTETE = ["Titre", "Client", "Statut", "Date de début", "Date de fin", "Montant"]
+
+# Tris proposés par la liste des projets (paramètre `tri`, `-` pour décroissant)
+TRIS_PROJETS = {
+    "titre": "titre",
+    "client": "client__nom",
+    "date_debut": "date_debut",
+    "statut": "statut",
+    "montant": "montant",
+    "nb_factures": "nb_factures",
+    "total_facture": "total_facture",
+    "encours": "encours",
+}
+TRI_DEFAUT = "-date_creation"
+
+
+def filtrer_projets(params, projets=None):
+    """
+    Applique les filtres de la liste des projets (recherche, statut, client)
+    lus dans `params` (request.GET ou dictionnaire)
+    """
+    if projets is None:
+        projets = Projet.objects.all()
+
+    search_query = params.get("q", "").strip()
+    statut = params.get("statut", "").strip()
+    client_id = params.get("client", "").strip()
+    date_debut = params.get("date_debut", "").strip()
+
+    if search_query:
+        projets = filtrer_par_recherche(projets, search_query)
+    if statut:
+        projets = projets.filter(statut=statut)
+    # Valeurs invalides (client non numérique, date mal formée) ignorées
+    if client_id.isdigit():
+        projets = projets.filter(client_id=int(client_id))
+    try:
+        date_debut = parse_date(date_debut)
+    except ValueError:
+        date_debut = None
+    if date_debut:
+        projets = projets.filter(date_debut__gte=date_debut)
+
+    return projets
+
+
+def _sous_requete_factures(agregat, statuts, output_field):
+    """Agrégat des factures du projet de la ligne, 0 sans facture"""
+    factures = (
+        Facture.objects.filter(projet=OuterRef("pk"), statut_paiement__in=statuts)
+        .order_by()
+        .values("projet")
+        .annotate(valeur=agregat)
+        .values("valeur")
+    )
+    return Coalesce(Subquery(factures), Value(0), output_field=output_field)
+
+
+def annoter_facturation(projets):
+    """
+    Ajoute à chaque projet nb_factures, total_facture et encours, calculés
+    par des sous-requêtes corrélées : elles ne sont évaluées que pour les
+    lignes de la page (ou pour le tri) et ignorées par count()
+    """
+    return projets.annotate(
+        nb_factures=_sous_requete_factures(
+            Count("id"), STATUTS_FACTURES, IntegerField()
+        ),
+        total_facture=_sous_requete_factures(
+            Sum("montant"), STATUTS_FACTURES, DecimalField()
+        ),
+        encours=_sous_requete_factures(Sum("montant"), STATUTS_ENCOURS, DecimalField()),
+    )
+
+
+def trier_projets(projets, tri):
+    """
+    Trie selon `tri` (clé de TRIS_PROJETS, préfixée de `-` pour un tri
+    décroissant) ; un tri inconnu donne le tri par défaut. L'id départage
+    les ex aequo pour une pagination stable.
+    """
+    champ = TRIS_PROJETS.get((tri or "").lstrip("-"))
+    if champ is None:
+        return projets.order_by(TRI_DEFAUT, "-id")
+    if tri.startswith("-"):
+        return projets.order_by(f"-{champ}", "-id")
+    return projets.order_by(champ, "id")
+
+
+def lignes_export_projets(projets):
+    """
+    Lignes des exports CSV et PDF des projets, client joint en SQL
+    """
+    statuts = dict(Projet.STATUT_CHOICES)
+    for titre, client, statut, debut, fin, montant in iter_projection(
+        projets,
+        ["titre", "client__nom", "statut", "date_debut", "date_fin", "montant"],
+    ):
+        yield [
+            titre,
+            client,
+            statuts.get(statut, statut),
+            debut.strftime("%d/%m/%Y"),
+            fin.strftime("%d/%m/%Y") if fin else "-",
+            montant if montant is not None else "-",
+        ]
+
+
+def export_liste_projets(params):
+    """
+    Export de la liste des projets filtrée par `params`
+    """
+    return {
+        "nom": "projets",
+        "titre": "Liste des projets",
+        "entete": EXPORT_ENTETE,
+        "queryset": filtrer_projets(params).order_by("id"),
+        "lignes": lignes_export_projets,
+        "largeurs": [7, 6, 3, 3.5, 3.5, 3.5],
+    }
+
+
+def document_recherche_projet(projet):
+    """Document de recherche d'un projet : (titre, contenu, lien)"""
+    return (
+        projet.titre,
+        f"{projet.client.nom} {projet.description}",
+        reverse("projets:projet_detail", args=[projet.pk]),
+    )
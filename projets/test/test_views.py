@@ -1,6 +1,7 @@
 from django.test import TestCase, Client as TestClient
 from django.urls import reverse
 from django.contrib.auth.models import User
+from factures.models import Facture
 from projets.models import Projet
 from clients.models import Client
 from django.utils import timezone
@@ -83,3 +84,84 @@ class ProjetViewTest(TestCase):
         )
         self.assertEqual(response.status_code, 302)
         self.assertFalse(Projet.objects.filter(id=self.projet.id).exists())
+
+
+class ProjetListTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="testuser", password="testpassword")
+        self.client.login(username="testuser", password="testpassword")
+        self.client_obj = Client.objects.create(
+            nom="Client de test", email="client@example.com"
+        )
+        self.url = reverse("projets:projet_list")
+
+    def creer_projets(self, nombre):
+        return Projet.objects.bulk_create(
+            Projet(
+                titre=f"Projet {i:03d}",
+                description="-",
+                client=self.client_obj,
+                date_debut=timezone.now().date(),
+            )
+            for i in range(nombre)
+        )
+
+    def test_totaux_de_facturation_annotes(self):
+        projet, autre = self.creer_projets(2)
+        for montant, statut in [(100, "payée"), (250, "envoyée"), (40, "en_retard")]:
+            Facture.objects.create(
+                client=self.client_obj,
+                projet=projet,
+                montant=montant,
+                statut_paiement=statut,
+            )
+        Facture.objects.create(
+            client=self.client_obj, projet=projet, montant=999, statut_paiement="annulée"
+        )
+
+        response = self.client.get(self.url, {"tri": "-total_facture"})
+        premier, second = response.context["projets"]
+        self.assertEqual(premier.pk, projet.pk)
+        self.assertEqual(
+            (premier.nb_factures, premier.total_facture, premier.encours), (3, 390, 290)
+        )
+        self.assertEqual((second.nb_factures, second.total_facture), (0, 0))
+
+    def test_tri_et_pagination(self):
+        self.creer_projets(25)
+        response = self.client.get(self.url, {"tri": "titre", "page": "3"})
+        self.assertEqual(
+            [p.titre for p in response.context["projets"]],
+            [f"Projet {i:03d}" for i in range(20, 25)],
+        )
+        # Le lien de page suivante conserve le tri
+        response = self.client.get(self.url, {"tri": "-titre"})
+        self.assertContains(response, "?tri=-titre&page=2")
+        self.assertEqual(response.context["projets"][0].titre, "Projet 024")
+
+    def test_parametres_invalides(self):
+        self.creer_projets(3)
+        response = self.client.get(self.url, {"page": "abc", "tri": "inconnu"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["projets"]), 3)
+
+    def test_filtres_invalides_ignores(self):
+        self.creer_projets(2)
+        for params in [
+            {"client": "abc"},
+            {"date_debut": "hier"},
+            {"date_debut": "2025-02-30"},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context["projets"]), 2)
+
+    def test_requetes_constantes(self):
+        self.creer_projets(15)
+        self.client.get(self.url)  # menu des clients mis en cache
+        # session, utilisateur, COUNT, page, notifications
+        with self.assertNumQueries(5):
+            self.client.get(self.url, {"tri": "encours"})
+        self.creer_projets(40)
+        with self.assertNumQueries(5):
+            self.client.get(self.url, {"tri": "encours", "page": "4"})
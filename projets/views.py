@@ -1,16 +1,46 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from clients.services import choix_clients
 from .models import Projet
 from .forms import ProjetForm
+from .services import annoter_facturation, filtrer_projets, trier_projets
 
 # Create your views here.
 
 
 @login_required
 def projet_list(request):
-    projets = Projet.objects.all()
-    return render(request, "projets/projet_list.html", {"projets": projets})
+    projets = filtrer_projets(request.GET)
+    tri = request.GET.get("tri", "")
+
+    # Client joint, totaux de facturation calculés en SQL pour la page seule
+    projets = annoter_facturation(projets.select_related("client"))
+    projets = trier_projets(projets, tri)
+
+    paginator = Paginator(projets, 10)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    # Paramètres conservés par les liens de tri et de pagination
+    parametres = request.GET.copy()
+    parametres.pop("page", None)
+    parametres_tri = parametres.copy()
+    parametres_tri.pop("tri", None)
+
+    context = {
+        "projets": page_obj,
+        "page_obj": page_obj,
+        "paginator": paginator,
+        "is_paginated": page_obj.has_other_pages(),
+        "page_range": paginator.get_elided_page_range(page_obj.number),
+        "parametres": parametres.urlencode(),
+        "parametres_tri": parametres_tri.urlencode(),
+        "tri": tri,
+        "clients": choix_clients(),
+        "statut_choices": Projet.STATUT_CHOICES,
+    }
+    return render(request, "projets/projet_list.html", context)
 
 
 @login_required
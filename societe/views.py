@@ -8,6 +8,7 @@ def societe_edit(request):
     if request.method == "POST":
         form = SocieteForm(request.POST, instance=societe)
         if form.is_valid():
+            # Le gabarit des factures est invalidé par signal (factures.signals)
             form.save()
             return redirect("societe_edit")
     else: